@@ -0,0 +1,9 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Línea de comandos del sistema de agua potable (python -m agua)
+
+Importación CSV, recibos, reportes, respaldos y mantenimiento sin abrir la
+interfaz gráfica, para programarlos con cron o el Programador de tareas.
+Ver agua/cli.py.
+"""
@@ -0,0 +1,5 @@
+import sys
+
+from agua.cli import main
+
+sys.exit(main())
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Operaciones por lotes del sistema de agua potable sin interfaz gráfica
+
+Cada subcomando importa solo los módulos que usa: ninguno carga Tkinter ni
+PIL, y ReportLab solo se carga para generar recibos. Sale con código 1 si
+hubo errores, para usarse desde cron.
+
+Uso:
+    python -m agua importar usuarios usuarios.csv [--actualizar] [--validar]
+    python -m agua importar pagos pagos_2024.csv --anio 2024
+    python -m agua importar pagos historico.csv      (columnas 2019-01... o formato largo)
+    python -m agua recibos --desde 2024-01-01 --hasta 2024-01-31
+    python -m agua reporte ingresos_mensuales ingresos.xlsx
+    python -m agua respaldo [--listar] [--retencion]
+    python -m agua restaurar SNAPSHOT|ARCHIVO.db
+    python -m agua mantenimiento [--vacuum] [--retencion]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+from typing import List, Optional
+
+from config.settings import DATABASE_BACKUP_DIR, DATABASE_NAME, RECEIPT_DIR
+
+# Errores que se muestran de una importación antes de resumir el resto
+ERRORES_MOSTRADOS = 20
+
+
+def _usar_base(db_path: str):
+    """Hace que get_db_manager (CSVImporter, exporter, recibos, respaldos) use db_path"""
+    import query_stats
+    from database import reiniciar_db_manager
+
+    query_stats.activar_si_configurado()
+    return reiniciar_db_manager(db_path)
+
+
+# === COMANDOS ===
+
+def importar(args) -> int:
+    _usar_base(args.db)
+    from csv_importer import CSVImporter
+
+    importador = CSVImporter()
+    if args.tipo == 'usuarios' and args.actualizar:
+        resumen, errores = importador.upsert_users_from_csv(args.archivo, args.procesos, args.validar)
+        print(f"{args.archivo}: {resumen['insertados']} usuarios nuevos, {resumen['actualizados']} "
+              f"actualizados y {resumen['sin_cambios']} sin cambios{' (validación)' if args.validar else ''}")
+    else:
+        if args.tipo == 'usuarios':
+            importados, errores = importador.import_users_from_csv(args.archivo, args.procesos, args.validar)
+        else:
+            importados, errores = importador.import_payments_from_csv(args.archivo, args.anio, args.procesos,
+                                                                      args.validar)
+        if args.validar:
+            print(f"Validación de {args.archivo}: se importarían {importados} {args.tipo}")
+        else:
+            print(f"{importados} {args.tipo} importados de {args.archivo}")
+
+    # La validación muestra el reporte completo
+    mostrados = errores if args.validar else errores[:ERRORES_MOSTRADOS]
+    for error in mostrados:
+        print(f"  - {error}")
+    if len(errores) > len(mostrados):
+        print(f"  ... y {len(errores) - len(mostrados)} errores más")
+    return 1 if errores else 0
+
+
+def _pagos_para_recibos(db, args) -> List[int]:
+    """Ids de pago indicados con --pago o que cumplen --desde/--hasta/--usuario"""
+    if args.pago:
+        return args.pago
+
+    condiciones, parametros = [], []
+    if args.desde:
+        condiciones.append('date(p.fecha_pago) >= ?')
+        parametros.append(args.desde)
+    if args.hasta:
+        condiciones.append('date(p.fecha_pago) <= ?')
+        parametros.append(args.hasta)
+    if args.usuario is not None:
+        condiciones.append('u.numero = ?')
+        parametros.append(args.usuario)
+
+    conn = db.get_connection()
+    try:
+        filas = conn.execute(f'''
+            SELECT p.id FROM pagos p
+            JOIN usuarios u ON p.usuario_id = u.id
+            WHERE {' AND '.join(condiciones)}
+            ORDER BY p.id
+        ''', parametros).fetchall()
+    finally:
+        conn.close()
+    return [fila[0] for fila in filas]
+
+
+def recibos(args) -> int:
+    if not (args.pago or args.desde or args.hasta or args.usuario is not None):
+        print("Indique los pagos con --pago o con --desde/--hasta/--usuario")
+        return 2
+
+    db = _usar_base(args.db)
+    try:
+        from receipt_generator import ReceiptGenerator
+    except ImportError as e:
+        print(f"No se pueden generar recibos: falta la dependencia {e.name} (pip install reportlab)")
+        return 1
+
+    pagos = _pagos_para_recibos(db, args)
+    generador = ReceiptGenerator()
+    generador.receipts_dir = args.carpeta
+    generador.ensure_directories()
+
+    fallidos = []
+    for pago_id in pagos:
+        if not generador.generate_receipt(pago_id):
+            fallidos.append(pago_id)
+
+    print(f"{len(pagos) - len(fallidos)} recibos generados en {args.carpeta}")
+    if fallidos:
+        print(f"  No se generaron los recibos de los pagos: {', '.join(map(str, fallidos))}")
+    return 1 if fallidos else 0
+
+
+def reporte(args) -> int:
+    _usar_base(args.db)
+    from exporter import export_report
+
+    try:
+        filas = export_report(args.reporte, args.archivo, args.formato)
+    except (ValueError, OSError, sqlite3.Error) as e:
+        print(f"Error al exportar: {e}")
+        return 1
+    print(f"{filas} filas exportadas a {args.archivo}")
+    return 0
+
+
+def respaldo(args) -> int:
+    from backup_manager import BackupManager
+
+    _usar_base(args.db)
+    gestor = BackupManager(args.db, args.respaldos)
+    if args.listar:
+        for snapshot in gestor.list_snapshots():
+            print(f"  {snapshot['nombre']}  {snapshot['fecha']}")
+        return 0
+
+    nombre = gestor.create_snapshot()
+    if not nombre:
+        print("No se pudo crear el respaldo")
+        return 1
+    print(f"Respaldo creado: {nombre}")
+    if args.retencion:
+        print(f"{gestor.apply_retention()} respaldos antiguos eliminados")
+    return 0
+
+
+def restaurar(args) -> int:
+    from backup_manager import BackupManager
+
+    # El gestor global apunta a --db: al restaurar se reinicia ese y no uno
+    # sobre agua_potable.db del directorio actual
+    _usar_base(args.db)
+    gestor = BackupManager(args.db, args.respaldos)
+    if os.path.isfile(args.origen):
+        exito, errores = gestor.restore_database(args.origen)
+    else:
+        exito, errores = gestor.restore_snapshot(args.origen)
+
+    if not exito:
+        print(f"No se restauró {args.origen}:")
+        for error in errores:
+            print(f"  - {error}")
+        return 1
+    print(f"Base de datos restaurada desde {args.origen} (el estado anterior quedó respaldado)")
+    return 0
+
+
+def mantenimiento(args) -> int:
+    # Abrir con DatabaseManager aplica las migraciones pendientes
+    db = _usar_base(args.db)
+    conn = db.get_connection()
+    conn.row_factory = None
+    try:
+        problemas = [fila[0] for fila in conn.execute('PRAGMA integrity_check')]
+        if problemas != ['ok']:
+            print("La verificación de integridad encontró problemas:")
+            for problema in problemas:
+                print(f"  - {problema}")
+            return 1
+        print("Integridad: ok")
+
+        huerfanos = conn.execute('PRAGMA foreign_key_check').fetchall()
+        if huerfanos:
+            print(f"Referencias rotas: {len(huerfanos)} (tablas: "
+                  f"{', '.join(sorted({fila[0] for fila in huerfanos}))})")
+
+        conn.execute('ANALYZE')
+        conn.execute('PRAGMA optimize')
+        print("Estadísticas del planificador actualizadas")
+
+        if args.vacuum:
+            antes = os.path.getsize(args.db)
+            conn.execute('VACUUM')
+            print(f"VACUUM: {antes // 1024} KB -> {os.path.getsize(args.db) // 1024} KB")
+    except sqlite3.Error as e:
+        print(f"Error de mantenimiento: {e}")
+        return 1
+    finally:
+        conn.close()
+
+    if args.retencion:
+        from backup_manager import BackupManager
+        eliminados = BackupManager(args.db, args.respaldos).apply_retention()
+        print(f"{eliminados} respaldos antiguos eliminados")
+    return 1 if huerfanos else 0
+
+
+# === ARGUMENTOS ===
+
+def _crear_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m agua', description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--db', default=DATABASE_NAME, help='Archivo de la base de datos')
+    sub = parser.add_subparsers(dest='comando', required=True)
+
+    p = sub.add_parser('importar', help='Importar usuarios o pagos desde CSV')
+    p.add_argument('tipo', choices=['usuarios', 'pagos'])
+    p.add_argument('archivo')
+    p.add_argument('--anio', type=int, help='Año de los pagos si las columnas son solo meses (1-12)')
+    p.add_argument('--actualizar', action='store_true',
+                   help='Usuarios: actualizar los existentes en lugar de rechazarlos')
+    p.add_argument('--validar', action='store_true',
+                   help='Solo revisar el archivo completo, sin guardar nada')
+    p.add_argument('--procesos', type=int,
+                   help='Procesos de lectura (por omisión, todos los núcleos en archivos grandes)')
+    p.set_defaults(funcion=importar)
+
+    p = sub.add_parser('recibos', help='Generar recibos PDF de varios pagos')
+    p.add_argument('--pago', type=int, nargs='+', help='Ids de pago')
+    p.add_argument('--desde', metavar='AAAA-MM-DD', help='Pagos desde esta fecha')
+    p.add_argument('--hasta', metavar='AAAA-MM-DD', help='Pagos hasta esta fecha')
+    p.add_argument('--usuario', type=int, metavar='NUMERO', help='Solo pagos de este usuario')
+    p.add_argument('--carpeta', default=RECEIPT_DIR, help='Carpeta de los PDF')
+    p.set_defaults(funcion=recibos)
+
+    from exporter import REPORTES
+    p = sub.add_parser('reporte', help='Exportar un reporte a CSV o XLSX')
+    p.add_argument('reporte', choices=list(REPORTES))
+    p.add_argument('archivo', help='Archivo de salida (.csv o .xlsx)')
+    p.add_argument('--formato', choices=['csv', 'xlsx'], help='Por omisión, según la extensión')
+    p.set_defaults(funcion=reporte)
+
+    p = sub.add_parser('respaldo', help='Crear un respaldo incremental')
+    p.add_argument('--listar', action='store_true', help='Solo listar los respaldos')
+    p.add_argument('--retencion', action='store_true', help='Aplicar la política de retención')
+    p.set_defaults(funcion=respaldo)
+
+    p = sub.add_parser('restaurar', help='Restaurar desde un snapshot o un archivo .db')
+    p.add_argument('origen', help='Nombre del snapshot (ver respaldo --listar) o archivo .db')
+    p.set_defaults(funcion=restaurar)
+
+    p = sub.add_parser('mantenimiento', help='Migrar, verificar integridad y optimizar')
+    p.add_argument('--vacuum', action='store_true', help='Compactar el archivo (bloquea la base)')
+    p.add_argument('--retencion', action='store_true', help='Aplicar la retención de respaldos')
+    p.set_defaults(funcion=mantenimiento)
+
+    for nombre in ('respaldo', 'restaurar', 'mantenimiento'):
+        sub.choices[nombre].add_argument('--respaldos', default=DATABASE_BACKUP_DIR,
+                                         help='Carpeta de respaldos')
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _crear_parser().parse_args(argv)
+    return args.funcion(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cliente del servicio HTTP local (ver api_server.py)
+
+ClienteAPI tiene los mismos nombres y argumentos de método que el gestor de
+base de datos, así que las ventanas existentes funcionan sin cambios:
+get_db_manager() devuelve un ClienteAPI cuando API_SERVER_URL está definido
+en config/settings.py. Los registros llegan como diccionarios y los meses
+ya pagados se reportan con el mismo MesesYaPagadosError que sin servicio.
+
+Uso:
+    db = ClienteAPI("http://192.168.1.10:8765")
+    usuario = db.buscar_usuario_por_numero(15)
+    meses = db.obtener_pagos_usuario_anio(usuario['id'], 2025)
+"""
+
+import http.client
+import inspect
+import json
+import threading
+from typing import Any, Dict
+from urllib.parse import urlsplit
+
+from api_server import ESCRITURAS, LECTURAS, MODELOS
+from database import MesesYaPagadosError
+
+
+class ErrorAPI(Exception):
+    """El servicio respondió con un error"""
+
+
+class ClienteAPI:
+    def __init__(self, url: str, token: str = None, timeout: float = 10.0):
+        """
+        Args:
+            url: Dirección del servicio, por ejemplo "http://192.168.1.10:8765"
+            token: Clave configurada en el servicio (--token), si la tiene
+            timeout: Segundos máximos de espera por respuesta
+        """
+        partes = urlsplit(url)
+        self.url = url
+        self.host = partes.hostname
+        self.port = partes.port or 80
+        self.token = token
+        self.timeout = timeout
+
+        # Una conexión keep-alive por hilo
+        self._local = threading.local()
+
+        # método -> (modelo, es_lectura, firma)
+        self._metodos: Dict[str, tuple] = {}
+        for es_lectura, tabla in ((True, LECTURAS), (False, ESCRITURAS)):
+            for modelo, metodos in tabla.items():
+                for metodo in metodos:
+                    firma = inspect.signature(getattr(MODELOS[modelo], metodo))
+                    self._metodos[metodo] = (modelo, es_lectura, firma)
+
+    def _conexion(self) -> http.client.HTTPConnection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            self._local.conn = conn
+        return conn
+
+    def _descartar_conexion(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def llamar(self, modelo: str, metodo: str, reintentar: bool = False, **argumentos) -> Any:
+        """
+        Ejecuta un método en el servicio
+
+        Args:
+            modelo: 'usuarios', 'pagos', 'configuracion' o 'sistema'
+            metodo: Nombre del método del modelo
+            reintentar: Repetir una vez si la conexión se había cerrado
+                        (solo para consultas; una escritura podría duplicarse)
+            **argumentos: Argumentos del método por nombre
+
+        Returns:
+            El resultado del método (registros como diccionarios)
+
+        Raises:
+            ConnectionError: Si no se pudo hablar con el servicio
+            MesesYaPagadosError: Si registrar_pago encontró meses ya pagados
+            ErrorAPI: Si el servicio respondió con otro error
+        """
+        cuerpo = json.dumps(argumentos).encode('utf-8')
+        headers = {'Content-Type': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f"Bearer {self.token}"
+
+        intentos = 2 if reintentar else 1
+        for intento in range(intentos):
+            try:
+                conn = self._conexion()
+                conn.request('POST', f"/api/{modelo}/{metodo}", cuerpo, headers)
+                respuesta = conn.getresponse()
+                datos = respuesta.read()
+                break
+            except (http.client.HTTPException, OSError) as e:
+                self._descartar_conexion()
+                if intento == intentos - 1:
+                    raise ConnectionError(f"No se pudo conectar con el servicio en {self.url}: {e}") from e
+
+        if respuesta.getheader('Connection', '').lower() == 'close':
+            self._descartar_conexion()
+
+        try:
+            datos = json.loads(datos or b'{}')
+        except ValueError:
+            raise ErrorAPI(f"Respuesta inválida del servicio (HTTP {respuesta.status})") from None
+
+        if datos.get('tipo') == 'MesesYaPagadosError':
+            raise MesesYaPagadosError(datos['anio'], datos['meses'])
+        if respuesta.status != 200:
+            raise ErrorAPI(datos.get('error') or f"HTTP {respuesta.status}")
+        return datos.get('resultado')
+
+    def estado(self) -> Dict:
+        """Comprueba que el servicio responde"""
+        conn = self._conexion()
+        try:
+            conn.request('GET', '/api/estado')
+            return json.loads(conn.getresponse().read())
+        except (http.client.HTTPException, OSError) as e:
+            self._descartar_conexion()
+            raise ConnectionError(f"No se pudo conectar con el servicio en {self.url}: {e}") from e
+
+    def __getattr__(self, nombre: str):
+        metodos = self.__dict__.get('_metodos', {})
+        if nombre not in metodos:
+            raise AttributeError(f"El servicio no ofrece '{nombre}'")
+
+        modelo, es_lectura, firma = metodos[nombre]
+
+        def metodo(*args, **kwargs):
+            # Pasar todo por nombre, como lo espera el servicio
+            enlazados = firma.bind(None, *args, **kwargs)
+            argumentos = {}
+            for parametro, valor in list(enlazados.arguments.items())[1:]:
+                if firma.parameters[parametro].kind is inspect.Parameter.VAR_KEYWORD:
+                    argumentos.update(valor)
+                else:
+                    argumentos[parametro] = valor
+            return self.llamar(modelo, nombre, reintentar=es_lectura, **argumentos)
+
+        metodo.__name__ = nombre
+        return metodo
@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Servicio HTTP local para usar el sistema desde varias terminales
+
+Una sola máquina abre agua_potable.db y las demás terminales de la red
+local se conectan a este servicio (ver api_client.py). Las consultas se
+atienden en un grupo de hilos lectores, cada uno con su conexión abierta;
+todas las modificaciones pasan, en orden de llegada, por una sola tarea
+escritora, así que nunca compiten dos escrituras por el archivo.
+
+Protocolo (JSON sobre HTTP/1.1 con keep-alive):
+    GET  /api/estado               -> {"ok": true, "esquema": 5}
+    POST /api/<modelo>/<metodo>    cuerpo: {"argumento": valor, ...}
+                                   -> {"resultado": ...} o {"error": "..."}
+
+Un mes ya pagado responde 409 con {"error", "tipo": "MesesYaPagadosError",
+"anio", "meses"}, y el cliente vuelve a lanzar MesesYaPagadosError.
+
+Modelos: usuarios (UserModel), pagos (PaymentModel), configuracion
+(ConfigurationModel) y sistema (versiones de las tablas).
+
+Uso:
+    python api_server.py [--host 0.0.0.0] [--port 8765] [--lectores 4] [--token SECRETO]
+"""
+
+import argparse
+import asyncio
+import functools
+import hmac
+import inspect
+import json
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Tuple
+
+from config.settings import API_SERVER_HOST, API_SERVER_PORT, DATABASE_NAME
+from database import MesesYaPagadosError
+from migrations import ESQUEMA_VERSION
+from models import ConfigurationModel, DatabaseManager, PaymentModel, UserModel
+from records import Record
+
+
+class SistemaModel:
+    """Consultas del servicio que no pertenecen a ningún modelo"""
+
+    def __init__(self, db=None):
+        self.db = db
+
+    def obtener_versiones_tablas(self) -> Dict[str, int]:
+        """Versión de cada tabla (ver versiones_tablas en migrations.py)"""
+        conn = self.db.get_connection()
+        try:
+            return {row[0]: row[1] for row in conn.execute('SELECT tabla, version FROM versiones_tablas')}
+        except sqlite3.Error as e:
+            print(f"Error al obtener versiones de tablas: {e}")
+            return {}
+        finally:
+            conn.close()
+
+
+# Clase de cada modelo expuesto
+MODELOS = {
+    'usuarios': UserModel,
+    'pagos': PaymentModel,
+    'configuracion': ConfigurationModel,
+    'sistema': SistemaModel,
+}
+
+# Métodos expuestos: los de lectura se atienden en paralelo, los de
+# escritura uno a la vez
+LECTURAS = {
+    'usuarios': ('get_next_user_number', 'buscar_usuario_por_numero',
+                 'buscar_usuarios_por_nombre', 'obtener_todos_usuarios'),
+    'pagos': ('obtener_pagos_usuario_anio', 'obtener_historial_pagos_usuario',
+              'obtener_detalle_pago'),
+    'configuracion': ('obtener_configuracion', 'verificar_pin', 'obtener_conceptos_cobro',
+                      'obtener_tarifas'),
+    'sistema': ('obtener_versiones_tablas',),
+}
+
+ESCRITURAS = {
+    'usuarios': ('crear_usuario', 'actualizar_usuario', 'cambiar_estado_usuario',
+                 'cambiar_estado_usuarios'),
+    'pagos': ('registrar_pago', 'registrar_cargo_masivo'),
+    'configuracion': ('actualizar_configuracion', 'crear_concepto_cobro',
+                      'actualizar_concepto_cobro', 'agregar_tarifa'),
+}
+
+TAMANO_MAXIMO_CUERPO = 1024 * 1024
+
+ESTADOS_HTTP = {
+    200: 'OK',
+    400: 'Bad Request',
+    401: 'Unauthorized',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    409: 'Conflict',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error',
+}
+
+
+class _ConexionPersistente(sqlite3.Connection):
+    """
+    Conexión que sigue abierta cuando un modelo llama a close()
+
+    Los modelos abren y cierran una conexión en cada método; en el servicio
+    cada hilo reutiliza la suya. close() solo descarta una transacción que
+    haya quedado pendiente.
+    """
+
+    def close(self):
+        if self.in_transaction:
+            self.rollback()
+
+    def cerrar(self):
+        """Cierra la conexión de verdad"""
+        super().close()
+
+
+class PooledDatabaseManager(DatabaseManager):
+    """DatabaseManager de models con una conexión abierta por hilo"""
+
+    def __init__(self, db_path: str = DATABASE_NAME, wal: bool = False):
+        """
+        Args:
+            db_path: Ruta al archivo de la base de datos SQLite
+            wal: Activar journal_mode=WAL (las lecturas no esperan a las
+                 escrituras; solo sirve si nadie más abre el archivo por red)
+        """
+        self._local = threading.local()
+        self._conexiones = []
+        self._lock = threading.Lock()
+        super().__init__(db_path)
+
+        if wal:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                conn.execute('PRAGMA journal_mode=WAL')
+            finally:
+                conn.close()
+
+    def get_connection(self) -> sqlite3.Connection:
+        """Conexión del hilo actual (se crea la primera vez)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, factory=_ConexionPersistente,
+                                   check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+            with self._lock:
+                self._conexiones.append(conn)
+        return conn
+
+    def cerrar_conexiones(self):
+        """Cierra las conexiones de todos los hilos"""
+        with self._lock:
+            for conn in self._conexiones:
+                conn.cerrar()
+            self._conexiones.clear()
+            self._local = threading.local()
+
+
+def _a_json(valor: Any) -> Any:
+    """Convierte registros (y listas de registros) a tipos serializables"""
+    if isinstance(valor, Record):
+        return valor.to_dict()
+    if isinstance(valor, (list, tuple)):
+        return [_a_json(v) for v in valor]
+    return valor
+
+
+class APIServer:
+    def __init__(self, db_path: str = DATABASE_NAME, host: str = API_SERVER_HOST,
+                 port: int = API_SERVER_PORT, lectores: int = 4, token: str = None,
+                 wal: bool = False):
+        """
+        Args:
+            db_path: Ruta al archivo de la base de datos SQLite
+            host: Dirección en la que escucha ('0.0.0.0' para toda la red local)
+            port: Puerto (0 elige uno libre)
+            lectores: Hilos (y conexiones) para consultas
+            token: Si se indica, las peticiones deben traer 'Authorization: Bearer <token>'
+            wal: Ver PooledDatabaseManager
+        """
+        self.host = host
+        self.port = port
+        self.token = token
+        self.db = PooledDatabaseManager(db_path, wal=wal)
+        self.modelos = {nombre: cls(self.db) for nombre, cls in MODELOS.items()}
+
+        self._lectores = ThreadPoolExecutor(max_workers=lectores, thread_name_prefix='lector')
+        self._hilo_escritor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='escritor')
+        self._cola_escrituras = None
+        self._tarea_escritor = None
+        self._servidor = None
+        self._clientes = {}  # writer -> tarea que atiende la conexión
+
+    # === CICLO DE VIDA ===
+
+    async def iniciar(self):
+        """Abre el puerto y arranca la tarea escritora"""
+        self._cola_escrituras = asyncio.Queue()
+        self._tarea_escritor = asyncio.create_task(self._escritor())
+        self._servidor = await asyncio.start_server(self._atender, self.host, self.port)
+        self.port = self._servidor.sockets[0].getsockname()[1]
+
+    async def detener(self):
+        """Deja de aceptar conexiones, termina las escrituras pendientes y cierra la base"""
+        self._servidor.close()
+        tareas = list(self._clientes.values())
+        for tarea in tareas:
+            tarea.cancel()
+        await asyncio.gather(*tareas, return_exceptions=True)
+        await self._servidor.wait_closed()
+
+        await self._cola_escrituras.join()
+        self._tarea_escritor.cancel()
+
+        self._lectores.shutdown(wait=True)
+        self._hilo_escritor.shutdown(wait=True)
+        self.db.cerrar_conexiones()
+
+    async def servir(self):
+        """Atiende peticiones hasta que se interrumpa el proceso"""
+        await self.iniciar()
+        print(f"Servicio escuchando en http://{self.host}:{self.port} (base: {self.db.db_path})")
+        try:
+            await self._servidor.serve_forever()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            await self.detener()
+
+    # === EJECUCIÓN DE MÉTODOS ===
+
+    async def _escritor(self):
+        """Única tarea que ejecuta modificaciones, una a la vez y en orden de llegada"""
+        loop = asyncio.get_running_loop()
+        while True:
+            funcion, futuro = await self._cola_escrituras.get()
+            try:
+                resultado = await loop.run_in_executor(self._hilo_escritor, funcion)
+            except Exception as e:
+                if not futuro.done():
+                    futuro.set_exception(e)
+            else:
+                if not futuro.done():
+                    futuro.set_result(resultado)
+            finally:
+                self._cola_escrituras.task_done()
+
+    async def escribir(self, funcion):
+        """Encola una modificación y espera su resultado"""
+        futuro = asyncio.get_running_loop().create_future()
+        await self._cola_escrituras.put((funcion, futuro))
+        return await futuro
+
+    async def leer(self, funcion):
+        """Ejecuta una consulta en uno de los hilos lectores"""
+        return await asyncio.get_running_loop().run_in_executor(self._lectores, funcion)
+
+    async def despachar(self, metodo_http: str, ruta: str, cuerpo: bytes) -> Tuple[int, dict]:
+        """
+        Resuelve una petición
+
+        Returns:
+            Tuple[int, dict]: (estado HTTP, respuesta)
+        """
+        partes = ruta.split('?', 1)[0].strip('/').split('/')
+        if partes == ['api', 'estado']:
+            return 200, {'ok': True, 'esquema': ESQUEMA_VERSION}
+
+        if len(partes) != 3 or partes[0] != 'api':
+            return 404, {'error': f"Ruta no encontrada: {ruta}"}
+
+        _api, modelo, metodo = partes
+        if metodo in LECTURAS.get(modelo, ()):
+            escritura = False
+        elif metodo in ESCRITURAS.get(modelo, ()):
+            escritura = True
+        else:
+            return 404, {'error': f"Método no disponible: {modelo}/{metodo}"}
+
+        if metodo_http != 'POST':
+            return 405, {'error': "Use POST"}
+
+        try:
+            argumentos = json.loads(cuerpo or b'{}')
+        except ValueError:
+            argumentos = None
+        if not isinstance(argumentos, dict):
+            return 400, {'error': "El cuerpo debe ser un objeto JSON"}
+
+        funcion = getattr(self.modelos[modelo], metodo)
+        try:
+            inspect.signature(funcion).bind(**argumentos)
+        except TypeError as e:
+            return 400, {'error': f"Argumentos inválidos: {e}"}
+
+        llamada = functools.partial(funcion, **argumentos)
+        try:
+            if escritura:
+                resultado = await self.escribir(llamada)
+            else:
+                resultado = await self.leer(llamada)
+        except MesesYaPagadosError as e:
+            return 409, {'error': str(e), 'tipo': 'MesesYaPagadosError',
+                         'anio': e.anio, 'meses': e.meses}
+        except Exception as e:
+            return 500, {'error': str(e)}
+
+        return 200, {'resultado': _a_json(resultado)}
+
+    # === HTTP ===
+
+    def _autorizado(self, headers: Dict[str, str]) -> bool:
+        if not self.token:
+            return True
+        return hmac.compare_digest(headers.get('authorization', ''), f"Bearer {self.token}")
+
+    async def _atender(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Atiende las peticiones de una conexión (varias si el cliente usa keep-alive)"""
+        self._clientes[writer] = asyncio.current_task()
+        try:
+            while True:
+                linea = await reader.readline()
+                if not linea:
+                    break
+
+                try:
+                    metodo_http, ruta, version = linea.decode('latin-1').split()
+                except ValueError:
+                    await self._responder(writer, 400, {'error': "Petición inválida"}, False)
+                    break
+
+                headers = {}
+                while True:
+                    linea = await reader.readline()
+                    if linea in (b'\r\n', b'\n', b''):
+                        break
+                    clave, _, valor = linea.decode('latin-1').partition(':')
+                    headers[clave.strip().lower()] = valor.strip()
+
+                mantener = (version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close')
+
+                try:
+                    longitud = int(headers.get('content-length') or 0)
+                except ValueError:
+                    longitud = -1
+                if longitud < 0 or longitud > TAMANO_MAXIMO_CUERPO:
+                    await self._responder(writer, 413, {'error': "Cuerpo demasiado grande"}, False)
+                    break
+                cuerpo = await reader.readexactly(longitud) if longitud else b''
+
+                if self._autorizado(headers):
+                    estado, respuesta = await self.despachar(metodo_http, ruta, cuerpo)
+                else:
+                    estado, respuesta = 401, {'error': "Token inválido"}
+
+                await self._responder(writer, estado, respuesta, mantener)
+                if not mantener:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except asyncio.CancelledError:
+            pass  # El servicio se está deteniendo
+        finally:
+            self._clientes.pop(writer, None)
+            writer.close()
+
+    async def _responder(self, writer: asyncio.StreamWriter, estado: int, respuesta: dict,
+                         mantener: bool):
+        datos = json.dumps(respuesta, ensure_ascii=False).encode('utf-8')
+        encabezado = (
+            f"HTTP/1.1 {estado} {ESTADOS_HTTP[estado]}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(datos)}\r\n"
+            f"Connection: {'keep-alive' if mantener else 'close'}\r\n\r\n"
+        )
+        writer.write(encabezado.encode('latin-1') + datos)
+        await writer.drain()
+
+
+def iniciar_en_hilo(**opciones):
+    """
+    Arranca el servicio en un hilo con su propio event loop (pruebas y benchmarks)
+
+    Args:
+        **opciones: Argumentos de APIServer (port=0 elige un puerto libre)
+
+    Returns:
+        Tuple[APIServer, Callable]: El servidor ya escuchando y la función para detenerlo
+    """
+    listo = threading.Event()
+    estado = {}
+
+    def correr():
+        loop = asyncio.new_event_loop()
+        try:
+            servidor = APIServer(**opciones)
+            loop.run_until_complete(servidor.iniciar())
+            estado.update(loop=loop, servidor=servidor)
+        except Exception as e:
+            estado['error'] = e
+            listo.set()
+            loop.close()
+            return
+        listo.set()
+        loop.run_forever()
+        loop.run_until_complete(servidor.detener())
+        loop.close()
+
+    hilo = threading.Thread(target=correr, name='api_server', daemon=True)
+    hilo.start()
+    listo.wait()
+    if 'error' in estado:
+        raise estado['error']
+
+    def detener():
+        estado['loop'].call_soon_threadsafe(estado['loop'].stop)
+        hilo.join()
+
+    return estado['servidor'], detener
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--db', default=DATABASE_NAME, help='Archivo de la base de datos')
+    parser.add_argument('--host', default=API_SERVER_HOST)
+    parser.add_argument('--port', type=int, default=API_SERVER_PORT)
+    parser.add_argument('--lectores', type=int, default=4, help='Hilos para consultas')
+    parser.add_argument('--token', help='Clave que deben enviar los clientes')
+    parser.add_argument('--wal', action='store_true', help='Usar journal_mode=WAL')
+    args = parser.parse_args()
+
+    servidor = APIServer(args.db, args.host, args.port, args.lectores, args.token, args.wal)
+    try:
+        asyncio.run(servidor.servir())
+    except KeyboardInterrupt:
+        print("Servicio detenido")
+
+
+if __name__ == '__main__':
+    main()
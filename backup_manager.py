@@ -0,0 +1,627 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Respaldos incrementales programados de la base de datos del sistema de agua potable
+
+Cada respaldo (snapshot) divide el archivo SQLite en páginas, calcula el hash
+SHA-256 de cada una y guarda en un almacén direccionado por contenido solo las
+páginas que todavía no existen. Un snapshot es un pequeño manifiesto JSON que
+apunta a bloques de índices (también guardados por contenido), de modo que
+conservar meses de historia cuesta poco más que las páginas que cambiaron.
+
+Estructura de DATABASE_BACKUP_DIR:
+    objects/ab/cdef...   páginas y bloques de índices comprimidos con zlib
+    snapshots/*.json     un manifiesto por snapshot
+    respaldos.lock       bloqueo entre procesos del almacén
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from config.settings import (
+    DATABASE_NAME, DATABASE_BACKUP_DIR, BACKUP_INTERVAL_MINUTES, BACKUP_RETENTION
+)
+from database import ESQUEMA_VERSION, TABLAS_REQUERIDAS, invalidar_caches
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Número de hashes de página agrupados en cada bloque de índice
+PAGINAS_POR_BLOQUE = 256
+
+# SQLite nunca usa la página que contiene el "pending byte" (offset 1 GiB);
+# en Windows está bloqueada, así que no se lee y se respalda como ceros
+PENDING_BYTE = 0x40000000
+
+FORMATO_FECHA = '%Y%m%d_%H%M%S'
+LONGITUD_HASH = 32
+
+
+def copy_database(origen: str, destino: str):
+    """Copia una base de datos con la API de backup de SQLite (copia consistente)"""
+    src = sqlite3.connect(_read_only_uri(origen), uri=True)
+    dst = sqlite3.connect(destino)
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+
+
+def _read_only_uri(path: str) -> str:
+    return f"{Path(path).resolve().as_uri()}?mode=ro"
+
+
+def _lock_file(f):
+    """Bloqueo exclusivo de un archivo abierto; espera a que otro proceso lo suelte"""
+    if fcntl:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        return
+    f.seek(0)
+    while True:
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            # LK_LOCK se rinde tras 10 intentos de un segundo
+            continue
+
+
+def _unlock_file(f):
+    if fcntl:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def validate_database_file(path: str) -> List[str]:
+    """
+    Valida que un archivo sea una base de datos utilizable por el sistema
+
+    Revisa la cabecera SQLite, PRAGMA integrity_check, las tablas y columnas
+    requeridas y que la versión del esquema no sea más nueva que la de la aplicación.
+
+    Returns:
+        List[str]: Lista de errores (vacía si el archivo es válido)
+    """
+    if not os.path.isfile(path):
+        return ["Archivo no encontrado"]
+
+    with open(path, 'rb') as f:
+        if f.read(16) != b'SQLite format 3\x00':
+            return ["El archivo no es una base de datos SQLite"]
+
+    errores = []
+    try:
+        conn = sqlite3.connect(_read_only_uri(path), uri=True)
+    except sqlite3.Error as e:
+        return [f"No se pudo abrir el archivo: {e}"]
+
+    try:
+        resultado = [row[0] for row in conn.execute('PRAGMA integrity_check(20)')]
+        if resultado != ['ok']:
+            errores.extend(f"Integridad: {mensaje}" for mensaje in resultado)
+            return errores
+
+        for tabla, columnas in TABLAS_REQUERIDAS.items():
+            existentes = {row[1] for row in conn.execute(f'PRAGMA table_info({tabla})')}
+            if not existentes:
+                errores.append(f"Falta la tabla '{tabla}'")
+                continue
+            faltantes = [c for c in columnas if c not in existentes]
+            if faltantes:
+                errores.append(f"La tabla '{tabla}' no tiene las columnas: {', '.join(faltantes)}")
+
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        if version > ESQUEMA_VERSION:
+            errores.append(f"El respaldo usa el esquema versión {version}, "
+                           f"más nuevo que el de esta aplicación ({ESQUEMA_VERSION})")
+    except sqlite3.Error as e:
+        errores.append(f"Error al validar el archivo: {e}")
+    finally:
+        conn.close()
+
+    return errores
+
+
+class BackupManager:
+    def __init__(self, db_path: str = DATABASE_NAME, backup_dir: str = DATABASE_BACKUP_DIR):
+        """
+        Inicializa el gestor de respaldos incrementales
+
+        Args:
+            db_path: Ruta a la base de datos SQLite a respaldar
+            backup_dir: Directorio donde se guardan objetos y snapshots
+        """
+        self.db_path = db_path
+        self.backup_dir = backup_dir
+        self.objects_dir = os.path.join(backup_dir, 'objects')
+        self.snapshots_dir = os.path.join(backup_dir, 'snapshots')
+        self._lock = threading.RLock()
+        self._lock_path = os.path.join(backup_dir, 'respaldos.lock')
+        self._lock_file = None
+        self._lock_depth = 0
+        self.ensure_directories()
+
+    def ensure_directories(self):
+        """Asegura que existan los directorios del almacén"""
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.snapshots_dir, exist_ok=True)
+
+    @contextmanager
+    def _store_lock(self):
+        """
+        Bloqueo exclusivo del almacén entre hilos y entre procesos
+
+        Todas las terminales comparten el directorio de respaldos: mientras una
+        crea un snapshot, otra no puede aplicar la retención y borrar como
+        basura los objetos que todavía no referencia ningún manifiesto.
+        Es reentrante dentro del mismo gestor.
+        """
+        with self._lock:
+            if self._lock_depth == 0:
+                f = open(self._lock_path, 'a+b')
+                try:
+                    _lock_file(f)
+                except OSError:
+                    f.close()
+                    raise
+                self._lock_file = f
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    _unlock_file(self._lock_file)
+                    self._lock_file.close()
+                    self._lock_file = None
+
+    # === ALMACÉN DIRECCIONADO POR CONTENIDO ===
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], digest[2:])
+
+    def _write_object(self, digest: str, data: bytes) -> int:
+        """Guarda un objeto si no existe. Devuelve los bytes escritos en disco."""
+        path = self._object_path(digest)
+        if os.path.exists(path):
+            return 0
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        comprimido = zlib.compress(data, 6)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(comprimido)
+        os.replace(tmp_path, path)
+        return len(comprimido)
+
+    def _read_object(self, digest: str) -> bytes:
+        """Lee un objeto y verifica su integridad"""
+        with open(self._object_path(digest), 'rb') as f:
+            data = zlib.decompress(f.read())
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f"Objeto dañado en el almacén de respaldos: {digest}")
+        return data
+
+    # === SNAPSHOTS ===
+
+    def create_snapshot(self) -> Optional[str]:
+        """
+        Crea un snapshot incremental de la base de datos
+
+        Returns:
+            str: Nombre del snapshot creado, None si hay error
+        """
+        try:
+            with self._store_lock():
+                return self._create_snapshot()
+        except (sqlite3.Error, OSError, ValueError) as e:
+            print(f"Error al crear respaldo incremental: {e}")
+            return None
+
+    def _create_snapshot(self) -> str:
+        # Primero una copia consistente con la API de backup: el bloqueo de
+        # lectura dura solo lo que tarda copiar las páginas (y en modo WAL
+        # incluye los últimos commits). Calcular hashes y comprimir se hace
+        # sobre la copia, sin bloquear a las demás terminales.
+        fd, copia_temporal = tempfile.mkstemp(suffix='.db', dir=self.backup_dir)
+        os.close(fd)
+
+        try:
+            conn = sqlite3.connect(self.db_path)
+            destino = sqlite3.connect(copia_temporal)
+            try:
+                conn.backup(destino)
+                page_size = destino.execute('PRAGMA page_size').fetchone()[0]
+                page_count = destino.execute('PRAGMA page_count').fetchone()[0]
+            finally:
+                destino.close()
+                conn.close()
+
+            conocidos = self._known_page_hashes()
+            pagina_bloqueo = PENDING_BYTE // page_size
+            digests = []
+            paginas_nuevas = 0
+            bytes_escritos = 0
+
+            with open(copia_temporal, 'rb') as f:
+                for numero in range(page_count):
+                    if numero == pagina_bloqueo:
+                        f.seek(page_size, os.SEEK_CUR)
+                        datos = bytes(page_size)
+                    else:
+                        datos = f.read(page_size)
+                        if len(datos) != page_size:
+                            raise ValueError("El archivo de base de datos está truncado")
+
+                    digest = hashlib.sha256(datos).digest()
+                    if digest not in conocidos:
+                        escritos = self._write_object(digest.hex(), datos)
+                        if escritos:
+                            paginas_nuevas += 1
+                            bytes_escritos += escritos
+                        conocidos.add(digest)
+                    digests.append(digest)
+        finally:
+            if os.path.exists(copia_temporal):
+                os.remove(copia_temporal)
+
+        # Agrupar los hashes en bloques de índice, también direccionados por contenido
+        bloques = []
+        for inicio in range(0, len(digests), PAGINAS_POR_BLOQUE):
+            contenido = b''.join(digests[inicio:inicio + PAGINAS_POR_BLOQUE])
+            digest_bloque = hashlib.sha256(contenido).hexdigest()
+            bytes_escritos += self._write_object(digest_bloque, contenido)
+            bloques.append(digest_bloque)
+
+        ahora = datetime.now()
+        nombre = self._new_snapshot_name(ahora)
+        manifiesto = {
+            'version': 1,
+            'creado': ahora.isoformat(timespec='seconds'),
+            'archivo': os.path.basename(self.db_path),
+            'page_size': page_size,
+            'page_count': page_count,
+            'bloques': bloques,
+            'paginas_nuevas': paginas_nuevas,
+            'bytes_escritos': bytes_escritos,
+        }
+
+        path = os.path.join(self.snapshots_dir, f"{nombre}.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifiesto, f, indent=1)
+        os.replace(tmp_path, path)
+
+        return nombre
+
+    def _new_snapshot_name(self, fecha: datetime) -> str:
+        base = fecha.strftime(FORMATO_FECHA)
+        nombre = base
+        sufijo = 1
+        while os.path.exists(os.path.join(self.snapshots_dir, f"{nombre}.json")):
+            nombre = f"{base}_{sufijo}"
+            sufijo += 1
+        return nombre
+
+    def list_snapshots(self) -> List[Dict]:
+        """
+        Lista los snapshots disponibles, del más reciente al más antiguo
+
+        Returns:
+            List[Dict]: Manifiestos con las claves adicionales 'nombre' y 'fecha'
+        """
+        snapshots = []
+        for archivo in os.listdir(self.snapshots_dir):
+            if not archivo.endswith('.json'):
+                continue
+            try:
+                manifiesto = self.load_snapshot(archivo[:-5])
+            except (OSError, ValueError) as e:
+                print(f"Snapshot ilegible {archivo}: {e}")
+                continue
+            snapshots.append(manifiesto)
+
+        snapshots.sort(key=lambda s: (s['fecha'], s['nombre']), reverse=True)
+        return snapshots
+
+    def load_snapshot(self, nombre: str) -> Dict:
+        """Carga el manifiesto de un snapshot"""
+        with open(os.path.join(self.snapshots_dir, f"{nombre}.json"), 'r', encoding='utf-8') as f:
+            manifiesto = json.load(f)
+        manifiesto['nombre'] = nombre
+        manifiesto['fecha'] = datetime.fromisoformat(manifiesto['creado'])
+        return manifiesto
+
+    def _page_hashes(self, manifiesto: Dict) -> List[bytes]:
+        """Obtiene la lista ordenada de hashes de página de un snapshot"""
+        digests = []
+        for digest_bloque in manifiesto['bloques']:
+            contenido = self._read_object(digest_bloque)
+            digests.extend(contenido[i:i + LONGITUD_HASH]
+                           for i in range(0, len(contenido), LONGITUD_HASH))
+        return digests
+
+    def _known_page_hashes(self) -> Set[bytes]:
+        """Hashes de página del último snapshot, para no consultar el disco por cada página"""
+        snapshots = self.list_snapshots()
+        if not snapshots:
+            return set()
+        try:
+            return set(self._page_hashes(snapshots[0]))
+        except (OSError, ValueError):
+            return set()
+
+    def restore_snapshot_to(self, nombre: str, destino: str) -> str:
+        """
+        Reconstruye el archivo de base de datos de un snapshot
+
+        Args:
+            nombre: Nombre del snapshot
+            destino: Ruta del archivo a generar (se sobrescribe)
+
+        Returns:
+            str: Ruta del archivo reconstruido
+        """
+        manifiesto = self.load_snapshot(nombre)
+        digests = self._page_hashes(manifiesto)
+        if len(digests) != manifiesto['page_count']:
+            raise ValueError(f"El snapshot {nombre} está incompleto")
+
+        with open(destino, 'wb') as f:
+            for digest in digests:
+                datos = self._read_object(digest.hex())
+                if len(datos) != manifiesto['page_size']:
+                    raise ValueError(f"Página con tamaño inesperado en el snapshot {nombre}")
+                f.write(datos)
+            f.flush()
+            os.fsync(f.fileno())
+
+        return destino
+
+    # === RESTAURACIÓN ===
+
+    def restore_database(self, origen: str) -> Tuple[bool, List[str]]:
+        """
+        Restaura la base de datos desde un archivo de respaldo sin reiniciar la aplicación
+
+        El archivo se valida, se copia a un archivo temporal junto a la base de
+        datos y se vuelve a validar. Luego se escribe sobre la base con la API
+        de backup de SQLite, en una sola transacción de escritura: las demás
+        terminales esperan el bloqueo y después ven la base restaurada, sin
+        un momento en que puedan confirmar cambios que se pierdan. No se
+        renombra el archivo, así que funciona aunque otro proceso lo tenga
+        abierto (Windows). Antes se toma un snapshot de la base actual para
+        poder deshacer. Al terminar se reinicia el gestor global de base de datos.
+
+        Args:
+            origen: Ruta del archivo de respaldo (.db)
+
+        Returns:
+            tuple: (exito, errores)
+        """
+        errores = validate_database_file(origen)
+        if errores:
+            return False, errores
+
+        staging = f"{self.db_path}.restaurando"
+        try:
+            with self._store_lock():
+                try:
+                    copy_database(origen, staging)
+                    errores = validate_database_file(staging)
+                    if errores:
+                        return False, errores
+
+                    # Snapshot de seguridad del estado actual
+                    if os.path.exists(self.db_path) and not self.create_snapshot():
+                        return False, ["No se pudo respaldar la base de datos actual antes de restaurar"]
+
+                    self._write_into_database(staging)
+                finally:
+                    if os.path.exists(staging):
+                        os.remove(staging)
+        except (sqlite3.Error, OSError) as e:
+            return False, [f"Error al restaurar: {e}"]
+
+        self._reload_db_managers()
+        return True, []
+
+    def restore_snapshot(self, nombre: str) -> Tuple[bool, List[str]]:
+        """Restaura la base de datos desde un snapshot incremental"""
+        reconstruido = f"{self.db_path}.snapshot"
+        try:
+            # Con el almacén bloqueado: la retención de otra terminal no puede
+            # borrar los objetos mientras se reconstruye
+            with self._store_lock():
+                self.restore_snapshot_to(nombre, reconstruido)
+                return self.restore_database(reconstruido)
+        except (OSError, ValueError) as e:
+            return False, [f"Error al reconstruir el snapshot {nombre}: {e}"]
+        finally:
+            if os.path.exists(reconstruido):
+                os.remove(reconstruido)
+
+    def _write_into_database(self, origen: str, timeout: float = 10.0):
+        """
+        Reemplaza el contenido de la base por el de origen
+
+        backup() con pages=-1 copia todas las páginas en un solo paso, con el
+        bloqueo de escritura tomado de principio a fin; si otra terminal está
+        escribiendo, espera hasta timeout segundos a que termine.
+
+        Raises:
+            TimeoutError: Si la base siguió ocupada (no se modificó nada)
+        """
+        limite = time.monotonic() + timeout
+
+        def progreso(estado, restantes, total):
+            # backup() reintenta sin límite mientras la base esté ocupada
+            if estado in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED) and time.monotonic() > limite:
+                raise TimeoutError("La base de datos sigue ocupada por otra terminal")
+
+        src = sqlite3.connect(_read_only_uri(origen), uri=True)
+        dst = sqlite3.connect(self.db_path, timeout=1.0)
+        try:
+            src.backup(dst, progress=progreso)
+        finally:
+            dst.close()
+            src.close()
+
+    def _reload_db_managers(self):
+        """
+        Reinicia los gestores globales que usan esta base e invalida las cachés
+
+        Los gestores que apuntan a otro archivo (o que todavía no se crearon)
+        no se tocan: crearlos con la ruta por omisión abriría otra base.
+        """
+        invalidar_caches()
+        restaurada = os.path.normcase(os.path.abspath(self.db_path))
+        for nombre in ('database', 'models.database'):
+            modulo = sys.modules.get(nombre)
+            db_path = getattr(getattr(modulo, '_db_manager', None), 'db_path', None)
+            if db_path and os.path.normcase(os.path.abspath(db_path)) == restaurada:
+                modulo.reiniciar_db_manager()
+
+    # === POLÍTICA DE RETENCIÓN ===
+
+    def apply_retention(self, hourly: int = None, daily: int = None, monthly: int = None) -> int:
+        """
+        Elimina los snapshots que no cubre la política de retención y libera
+        los objetos que ya no usa ningún snapshot
+
+        Se conserva el snapshot más reciente de cada una de las últimas
+        `hourly` horas, `daily` días y `monthly` meses que tengan respaldos.
+
+        Returns:
+            int: Número de snapshots eliminados
+        """
+        limites = (
+            ('%Y%m%d%H', BACKUP_RETENTION['hourly'] if hourly is None else hourly),
+            ('%Y%m%d', BACKUP_RETENTION['daily'] if daily is None else daily),
+            ('%Y%m', BACKUP_RETENTION['monthly'] if monthly is None else monthly),
+        )
+
+        with self._store_lock():
+            snapshots = self.list_snapshots()
+            if not snapshots:
+                return 0
+
+            conservar = {snapshots[0]['nombre']}
+            for formato, limite in limites:
+                periodos = set()
+                for snapshot in snapshots:
+                    periodo = snapshot['fecha'].strftime(formato)
+                    if periodo in periodos:
+                        continue
+                    if len(periodos) >= limite:
+                        break
+                    periodos.add(periodo)
+                    conservar.add(snapshot['nombre'])
+
+            eliminados = 0
+            for snapshot in snapshots:
+                if snapshot['nombre'] not in conservar:
+                    os.remove(os.path.join(self.snapshots_dir, f"{snapshot['nombre']}.json"))
+                    eliminados += 1
+
+            if eliminados:
+                self._collect_garbage([s for s in snapshots if s['nombre'] in conservar])
+
+            return eliminados
+
+    def _collect_garbage(self, snapshots: List[Dict]) -> int:
+        """
+        Elimina del almacén los objetos que no referencia ningún snapshot
+
+        Se llama con el almacén bloqueado. Los archivos .tmp son objetos a
+        medio escribir y nunca se borran.
+        """
+        referenciados = set()
+        for snapshot in snapshots:
+            referenciados.update(snapshot['bloques'])
+            referenciados.update(d.hex() for d in self._page_hashes(snapshot))
+
+        eliminados = 0
+        for prefijo in os.listdir(self.objects_dir):
+            carpeta = os.path.join(self.objects_dir, prefijo)
+            if not os.path.isdir(carpeta):
+                continue
+            for resto in os.listdir(carpeta):
+                if resto.endswith('.tmp') or prefijo + resto in referenciados:
+                    continue
+                os.remove(os.path.join(carpeta, resto))
+                eliminados += 1
+        return eliminados
+
+    def run_scheduled_backup(self) -> Optional[str]:
+        """Crea un snapshot y aplica la política de retención"""
+        nombre = self.create_snapshot()
+        if nombre:
+            try:
+                self.apply_retention()
+            except (OSError, ValueError) as e:
+                print(f"Error al aplicar la retención de respaldos: {e}")
+        return nombre
+
+
+class BackupScheduler:
+    """Toma snapshots periódicos en un hilo de fondo"""
+
+    def __init__(self, manager: BackupManager = None, interval_minutes: float = BACKUP_INTERVAL_MINUTES):
+        self.manager = manager or get_backup_manager()
+        self.interval = interval_minutes * 60
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Inicia el respaldo periódico (no hace nada si ya está en marcha)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='BackupScheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Detiene el respaldo periódico"""
+        self._stop_event.set()
+
+    def _seconds_until_next(self) -> float:
+        snapshots = self.manager.list_snapshots()
+        if not snapshots:
+            return 0
+        transcurrido = (datetime.now() - snapshots[0]['fecha']).total_seconds()
+        return max(0.0, self.interval - transcurrido)
+
+    def _run(self):
+        espera = self._seconds_until_next()
+        while not self._stop_event.wait(espera):
+            self.manager.run_scheduled_backup()
+            espera = self.interval
+
+
+# Función de utilidad para obtener una instancia global del gestor de respaldos
+_backup_manager = None
+
+def get_backup_manager() -> BackupManager:
+    """Obtiene una instancia global del gestor de respaldos"""
+    global _backup_manager
+    if _backup_manager is None:
+        _backup_manager = BackupManager()
+    return _backup_manager
@@ -0,0 +1,10 @@
+"""
+Scripts de medición de rendimiento del sistema de agua potable
+
+Cada script se ejecuta desde la raíz del proyecto, por ejemplo:
+    python -m benchmarks.bench_export
+
+benchmarks.suite corre las rutas principales, guarda JSON y compara con
+benchmarks/baseline.json (la base se regenera con --guardar-base en la
+máquina de referencia).
+"""
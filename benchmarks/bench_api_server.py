@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Carga sobre el servicio HTTP local con N clientes concurrentes
+
+Cada cliente es un hilo que repite una mezcla de operaciones de una
+terminal de cobro (buscar usuario, ver sus meses pagados, historial y, en
+una fracción de las operaciones, registrar un pago). Se compara el
+servicio (api_server.py) con N terminales que abren el archivo
+directamente, y se reportan operaciones por segundo, latencias p50/p95/p99
+y errores (por ejemplo "database is locked").
+
+Uso:
+    python -m benchmarks.bench_api_server [--clientes 1 4 16] [--segundos 5] [--escrituras 0.1]
+"""
+
+import argparse
+import itertools
+import random
+import sqlite3
+import threading
+import time
+
+from benchmarks.common import percentiles, seed_payments, temp_database
+
+# Cada pago registrado usa un (año, mes) distinto, posterior a los de
+# seed_payments, para que ninguno choque con un mes ya pagado
+_pagos = itertools.count()
+
+
+def run_client(db, numeros, segundos, escrituras, seed, resultado):
+    """Un cliente: repite operaciones hasta agotar el tiempo"""
+    rng = random.Random(seed)
+    latencias = []
+    errores = 0
+    fin = time.perf_counter() + segundos
+
+    while time.perf_counter() < fin:
+        numero = rng.choice(numeros)
+        inicio = time.perf_counter()
+        try:
+            usuario = db.buscar_usuario_por_numero(numero)
+            if rng.random() < escrituras:
+                k = next(_pagos)
+                db.registrar_pago(usuario['id'], [k % 12 + 1], 2100 + k // 12)
+            else:
+                db.obtener_pagos_usuario_anio(usuario['id'], 2000)
+                db.obtener_historial_pagos_usuario(usuario['id'])
+        except (sqlite3.Error, ConnectionError, OSError):
+            errores += 1
+        latencias.append(time.perf_counter() - inicio)
+
+    resultado.append((latencias, errores))
+
+
+def run_load(crear_db, clientes, numeros, segundos, escrituras) -> dict:
+    """Lanza `clientes` hilos; crear_db() da el gestor que usa cada uno"""
+    resultados = []
+    hilos = [
+        threading.Thread(target=run_client,
+                         args=(crear_db(), numeros, segundos, escrituras, clientes * 100 + i, resultados))
+        for i in range(clientes)
+    ]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    duracion = time.perf_counter() - inicio
+
+    latencias = [l for lista, _ in resultados for l in lista]
+    return {
+        'operaciones': len(latencias),
+        'por_segundo': len(latencias) / duracion,
+        'percentiles': percentiles(latencias),
+        'errores': sum(e for _, e in resultados),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clientes', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--segundos', type=float, default=5.0)
+    parser.add_argument('--escrituras', type=float, default=0.1, help='Fracción de operaciones que registran un pago')
+    parser.add_argument('--usuarios', type=int, default=500)
+    parser.add_argument('--lectores', type=int, default=4, help='Hilos lectores del servicio')
+    args = parser.parse_args()
+
+    from api_client import ClienteAPI
+    from api_server import iniciar_en_hilo
+    from models import UserModel, PaymentModel
+    from models.database import DatabaseManager
+
+    class Terminal:
+        """Una terminal que abre el archivo directamente con los modelos"""
+        def __init__(self):
+            db = DatabaseManager()
+            self.usuarios = UserModel(db)
+            self.pagos = PaymentModel(db)
+
+        def __getattr__(self, nombre):
+            return getattr(self.usuarios, nombre, None) or getattr(self.pagos, nombre)
+
+    with temp_database() as db:
+        seed_payments(db, detail_rows=args.usuarios * 12 * 5, users=args.usuarios)
+        numeros = list(range(1, args.usuarios + 1))
+
+        servidor, detener = iniciar_en_hilo(port=0, lectores=args.lectores)
+        url = f"http://127.0.0.1:{servidor.port}"
+
+        print(f"{args.segundos:.0f} s por prueba, {args.escrituras:.0%} escrituras, "
+              f"{args.usuarios} usuarios\n")
+        print(f"  {'modo':<10} {'clientes':>8} {'ops/s':>9} {'p50 ms':>8} {'p95 ms':>8} "
+              f"{'p99 ms':>8} {'errores':>8}")
+        try:
+            for clientes in args.clientes:
+                for modo, crear_db in (('directo', Terminal), ('servicio', lambda: ClienteAPI(url))):
+                    r = run_load(crear_db, clientes, numeros, args.segundos, args.escrituras)
+                    p = r['percentiles']
+                    print(f"  {modo:<10} {clientes:>8} {r['por_segundo']:>9.0f} {p[50] * 1000:>8.2f} "
+                          f"{p[95] * 1000:>8.2f} {p[99] * 1000:>8.2f} {r['errores']:>8}")
+        finally:
+            detener()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tiempo hasta que la ventana de configuración responde
+
+Mide desde que se crea ConfigurationWindow hasta que Tk terminó de procesar
+los eventos pendientes (root.update()), con las pestañas construidas al
+seleccionarse (como funciona la ventana) y construyendo las tres de una vez
+(como funcionaba antes). También mide el primer cambio a cada pestaña.
+Sin pantalla (DISPLAY) no se puede crear la ventana y no se mide nada.
+
+Uso:
+    python -m benchmarks.bench_config_window [--repeat 10]
+"""
+
+import argparse
+import statistics
+import tkinter as tk
+
+from benchmarks.common import temp_database, timer
+
+
+def measure(eager: bool) -> dict:
+    """
+    Crea la ventana una vez
+
+    Args:
+        eager: Construir todas las pestañas al abrir
+
+    Returns:
+        dict: {'interactiva': segundos, 'pestañas': {nombre: segundos}}
+    """
+    from configuration import ConfigurationWindow
+
+    root = tk.Tk()
+    root.withdraw()
+
+    try:
+        with timer() as t:
+            window = ConfigurationWindow(root)
+            if eager:
+                for name, frame, builder in window.tab_builders.values():
+                    if name not in window.built_tabs:
+                        builder(frame)
+            window.root.update()
+
+        tabs = {}
+        for name, frame, _builder in window.tab_builders.values():
+            if name in window.built_tabs:
+                continue
+            with timer() as t_tab:
+                window.notebook.select(frame)
+                window.root.update()
+            tabs[name] = t_tab['seconds']
+
+        return {'interactiva': t['seconds'], 'pestañas': tabs}
+    finally:
+        root.destroy()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    with temp_database():
+        try:
+            lazy = [measure(eager=False) for _ in range(args.repeat)]
+            eager = [measure(eager=True) for _ in range(args.repeat)]
+        except tk.TclError as e:
+            print(f"Ventana de configuración: no medido ({e})")
+            return
+
+    def mediana_ms(valores):
+        return statistics.median(valores) * 1000
+
+    print(f"Ventana de configuración (mediana de {args.repeat} ejecuciones)\n")
+    print(f"  {'pestañas al seleccionarse':<28} {mediana_ms([r['interactiva'] for r in lazy]):8.1f} ms")
+    print(f"  {'todas las pestañas al abrir':<28} {mediana_ms([r['interactiva'] for r in eager]):8.1f} ms")
+
+    print("\nPrimer cambio a cada pestaña (construcción y carga de datos)")
+    for name in lazy[0]['pestañas']:
+        print(f"  {name:<28} {mediana_ms([r['pestañas'][name] for r in lazy]):8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Memoria y tiempo de la exportación de detalle_pagos a CSV y XLSX
+
+El pico de memoria (tracemalloc) debe ser prácticamente el mismo sin
+importar cuántas filas se exporten.
+
+Uso:
+    python -m benchmarks.bench_export [--rows 100 10000 1000000]
+"""
+
+import argparse
+import os
+import tracemalloc
+
+from benchmarks.common import seed_payments, temp_database, timer
+from exporter import export_report
+
+
+def measure(rows: int, file_format: str) -> dict:
+    """Exporta `rows` registros y devuelve tiempo, pico de memoria y tamaño del archivo"""
+    with temp_database() as db:
+        seed_payments(db, rows)
+        path = f"detalle_pagos.{file_format}"
+
+        tracemalloc.start()
+        with timer() as t:
+            exported = export_report('detalle_pagos', path)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        return {
+            'rows': exported,
+            'format': file_format,
+            'seconds': t['seconds'],
+            'peak_kib': peak / 1024,
+            'size_kib': os.path.getsize(path) / 1024,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[100, 10_000, 200_000])
+    args = parser.parse_args()
+
+    print(f"{'filas':>10} {'formato':>8} {'segundos':>9} {'pico KiB':>10} {'archivo KiB':>12}")
+    for rows in args.rows:
+        for file_format in ('csv', 'xlsx'):
+            r = measure(rows, file_format)
+            print(f"{r['rows']:>10} {r['format']:>8} {r['seconds']:>9.2f} "
+                  f"{r['peak_kib']:>10.0f} {r['size_kib']:>12.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Memoria retenida por obtener_todos_usuarios: registros con __slots__ contra dict(row)
+
+Uso:
+    python -m benchmarks.bench_records [--users 100000]
+"""
+
+import argparse
+import gc
+import tracemalloc
+
+from benchmarks.common import temp_database, timer
+
+
+def seed_users(db, users: int):
+    """Inserta `users` usuarios con todos sus campos llenos"""
+    conn = db.get_connection()
+    try:
+        conn.executemany(
+            "INSERT INTO usuarios (numero, nombre, direccion, telefono, email) VALUES (?, ?, ?, ?, ?)",
+            ((n, f"Usuario {n}", f"Calle {n % 80} #{n}", f"555{n:07d}", f"usuario{n}@correo.com")
+             for n in range(1, users + 1))
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def load_as_dicts(db):
+    """Carga los usuarios como antes: una lista de dict(row)"""
+    conn = db.get_connection()
+    try:
+        return [dict(row) for row in conn.execute('SELECT * FROM usuarios ORDER BY numero')]
+    finally:
+        conn.close()
+
+
+def measure(load) -> dict:
+    """Memoria que queda retenida por el resultado de `load()` y su tiempo"""
+    gc.collect()
+    tracemalloc.start()
+    with timer() as t:
+        result = load()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'rows': len(result), 'seconds': t['seconds'], 'retained': retained, 'peak': peak}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=100_000)
+    args = parser.parse_args()
+
+    with temp_database() as db:
+        seed_users(db, args.users)
+
+        results = {
+            'dict(row)': measure(lambda: load_as_dicts(db)),
+            'registros': measure(db.obtener_todos_usuarios),
+        }
+
+    print(f"{'método':>10} {'filas':>8} {'segundos':>9} {'retenido MiB':>13} {'pico MiB':>9}")
+    for name, r in results.items():
+        print(f"{name:>10} {r['rows']:>8} {r['seconds']:>9.2f} "
+              f"{r['retained'] / 2**20:>13.1f} {r['peak'] / 2**20:>9.1f}")
+
+    ratio = results['registros']['retained'] / results['dict(row)']['retained']
+    print(f"\nLos registros usan {ratio:.0%} de la memoria de los diccionarios")
+
+
+if __name__ == '__main__':
+    main()
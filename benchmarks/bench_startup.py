@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tiempo de arranque: hasta la ventana de PIN y hasta el menú principal
+
+Lanza un intérprete nuevo con `-X importtime` que importa main.py, crea la
+ventana de login y después el menú principal. Para cada fase reporta el
+tiempo desde que se lanzó el proceso y qué módulos se importaron en ella
+(los más costosos primero). Sin pantalla (DISPLAY) solo se mide la fase de
+importación.
+
+Uso:
+    python -m benchmarks.bench_startup [--repeat 5] [--top 8]
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Código que ejecuta el proceso medido; marca cada fase en stderr junto a
+# la salida de -X importtime
+PROCESO = r'''
+import os, sys, time
+T0 = float(os.environ['AGUA_BENCH_T0'])
+
+def marca(fase):
+    sys.stderr.write(f"@@ {fase} {time.time() - T0:.6f}\n")
+    sys.stderr.flush()
+
+try:
+    import main
+    marca('importar main')
+
+    from auth import LoginWindow
+    login = LoginWindow()
+    login.root.update()
+    marca('ventana de login')
+    login.root.destroy()
+
+    app = main.MainApplication()
+    app.root.update()
+    marca('menu principal')
+    app.backup_scheduler.stop()
+    app.root.destroy()
+except Exception as e:
+    sys.stderr.write(f"@@! {e}\n")
+'''
+
+FASES = ('importar main', 'ventana de login', 'menu principal')
+
+
+def run_once() -> dict:
+    """Ejecuta el arranque una vez en un directorio temporal"""
+    tmp_dir = tempfile.mkdtemp(prefix='agua_startup_')
+    try:
+        if os.path.exists(os.path.join(RAIZ, 'logo.jpg')):
+            shutil.copy(os.path.join(RAIZ, 'logo.jpg'), tmp_dir)
+
+        env = dict(os.environ, PYTHONPATH=RAIZ, AGUA_BENCH_T0=repr(time.time()))
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', PROCESO],
+            cwd=tmp_dir, env=env, capture_output=True, text=True
+        )
+        return parse_importtime(proc.stderr)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def parse_importtime(stderr: str) -> dict:
+    """
+    Separa la salida de -X importtime por fase
+
+    Returns:
+        dict: {'tiempos': {fase: segundos}, 'modulos': {fase: [(cumulative_us, modulo)]},
+               'error': mensaje o None}
+    """
+    tiempos = {}
+    modulos = {fase: [] for fase in FASES}
+    error = None
+    fase_actual = FASES[0]
+
+    for line in stderr.splitlines():
+        if line.startswith('@@! '):
+            error = line[4:]
+        elif line.startswith('@@ '):
+            fase, segundos = line[3:].rsplit(' ', 1)
+            tiempos[fase] = float(segundos)
+            siguiente = FASES.index(fase) + 1
+            fase_actual = FASES[siguiente] if siguiente < len(FASES) else None
+        elif line.startswith('import time:') and fase_actual:
+            try:
+                _self, cumulative, nombre = line[len('import time:'):].split('|')
+                cumulative = int(cumulative)
+            except ValueError:
+                continue  # Encabezado de la tabla
+            # Solo los imports de primer nivel: su tiempo acumulado ya incluye a sus hijos
+            if nombre.startswith(' ') and not nombre.startswith('  '):
+                modulos[fase_actual].append((cumulative, nombre.strip()))
+
+    return {'tiempos': tiempos, 'modulos': modulos, 'error': error}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=8, help='Módulos a mostrar por fase')
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.repeat)]
+
+    print(f"Arranque (mediana de {args.repeat} ejecuciones, desde que se lanza el proceso)\n")
+    for fase in FASES:
+        valores = [r['tiempos'][fase] for r in runs if fase in r['tiempos']]
+        if valores:
+            print(f"  {fase:<18} {statistics.median(valores) * 1000:8.1f} ms")
+        else:
+            print(f"  {fase:<18} {'no medido':>11}")
+
+    if runs[-1]['error']:
+        print(f"\n  (el arranque se detuvo: {runs[-1]['error']})")
+
+    # Los módulos de la última ejecución (ya con los .pyc en caché)
+    for fase in FASES:
+        modulos = sorted(runs[-1]['modulos'][fase], reverse=True)
+        if not modulos:
+            continue
+        total = sum(us for us, _ in modulos)
+        print(f"\nImportados en '{fase}': {len(modulos)} módulos, {total / 1000:.1f} ms")
+        for us, nombre in modulos[:args.top]:
+            print(f"  {us / 1000:8.1f} ms  {nombre}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prueba de carga con varias terminales de cobro sobre el mismo archivo
+
+Lanza N procesos (uno por terminal, como cajeros en distintas computadoras
+con la base en una carpeta compartida) que repiten una mezcla de
+operaciones con DatabaseManager: buscar por número, buscar por nombre, ver
+historial, registrar un pago y generar un recibo. Para cada N reporta
+operaciones por segundo, latencias p50/p95/p99 y la proporción de errores
+"database is locked".
+
+Sin --db se genera una base de prueba con benchmarks.generar_datos; con
+--db se trabaja sobre una copia. Sin ReportLab el recibo solo lee los
+datos del pago (obtener_detalle_pago) y no genera el PDF.
+
+Uso:
+    python -m benchmarks.bench_terminales [--terminales 1 2 4 8] [--segundos 10] [--wal]
+"""
+
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import queue
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+from benchmarks.common import percentiles
+
+# (operación, peso) de la mezcla de una terminal
+MEZCLA = [
+    ('buscar_numero', 35),
+    ('buscar_nombre', 15),
+    ('historial', 25),
+    ('registrar_pago', 15),
+    ('recibo', 10),
+]
+
+
+class _SalidaErrores(io.TextIOBase):
+    """
+    Salida estándar de una terminal: DatabaseManager informa sus errores
+    con print, así que se cuentan las líneas de error en lugar de mostrarlas
+    """
+
+    def __init__(self):
+        self.bloqueos = 0
+        self.errores = 0
+
+    def write(self, texto):
+        if 'locked' in texto or 'busy' in texto:
+            self.bloqueos += 1
+        elif 'Error' in texto:
+            self.errores += 1
+        return len(texto)
+
+    def reiniciar(self):
+        bloqueos, errores = self.bloqueos, self.errores
+        self.bloqueos = self.errores = 0
+        return bloqueos, errores
+
+
+def terminal(db_path: str, indice: int, nivel: int, inicio: float, segundos: float, datos: dict, cola):
+    """
+    Una terminal: repite la mezcla desde `inicio` durante `segundos`
+
+    Envía a `cola` {'operacion': [(latencia, bloqueos, errores), ...]}
+    """
+    from database import DatabaseManager, MesesYaPagadosError
+
+    db = DatabaseManager(db_path)
+    rng = random.Random(nivel * 1000 + indice)
+    operaciones = [op for op, _ in MEZCLA]
+    pesos = [peso for _, peso in MEZCLA]
+
+    try:
+        from receipt_generator import ReceiptGenerator
+        # Los PDF quedan en la carpeta temporal de la prueba
+        os.chdir(os.path.dirname(db_path))
+        recibos = ReceiptGenerator()
+    except ImportError:
+        recibos = None
+
+    salida = _SalidaErrores()
+    resultados = {op: [] for op in operaciones}
+    pagos = 0
+
+    # Todas las terminales empiezan a la vez
+    time.sleep(max(0.0, inicio - time.time()))
+    fin = time.perf_counter() + segundos
+
+    with redirect_stdout(salida):
+        while time.perf_counter() < fin:
+            operacion = rng.choices(operaciones, pesos)[0]
+            t0 = time.perf_counter()
+            bloqueo = error = 0
+            try:
+                if operacion == 'buscar_numero':
+                    db.buscar_usuario_por_numero(rng.randint(*datos['numeros']))
+                elif operacion == 'buscar_nombre':
+                    db.buscar_usuarios_por_nombre(rng.choice(datos['nombres']))
+                elif operacion == 'historial':
+                    usuario = db.buscar_usuario_por_numero(rng.randint(*datos['numeros']))
+                    if usuario:
+                        db.obtener_historial_pagos_usuario(usuario.id)
+                elif operacion == 'registrar_pago':
+                    usuario = db.buscar_usuario_por_numero(rng.randint(*datos['numeros']))
+                    if usuario:
+                        # Un año propio de esta terminal para no repetir meses
+                        anio = 3000 + (nivel * 64 + indice) * 1000 + pagos // 12
+                        if not db.registrar_pago(usuario.id, [pagos % 12 + 1], anio):
+                            error = 1
+                        pagos += 1
+                else:
+                    pago_id = rng.randint(1, datos['max_pago'])
+                    if recibos:
+                        recibos.generate_receipt(pago_id)
+                    else:
+                        db.obtener_detalle_pago(pago_id)
+            except MesesYaPagadosError:
+                error = 1
+            except sqlite3.OperationalError as e:
+                if 'locked' in str(e) or 'busy' in str(e):
+                    bloqueo = 1
+                else:
+                    error = 1
+            except sqlite3.Error:
+                error = 1
+
+            impresos = salida.reiniciar()
+            if impresos[0]:
+                bloqueo = 1
+            elif impresos[1] and not bloqueo:
+                error = 1
+            resultados[operacion].append((time.perf_counter() - t0, bloqueo, error))
+
+    cola.put(resultados)
+
+
+def preparar_base(args, carpeta: str) -> str:
+    """Copia de --db o base generada dentro de `carpeta`"""
+    destino = os.path.join(carpeta, 'terminales.db')
+    if args.db:
+        from backup_manager import copy_database
+        copy_database(args.db, destino)
+    else:
+        from benchmarks.generar_datos import GeneradorDatos
+        anio = time.localtime().tm_year
+        GeneradorDatos(args.usuarios, anio - 4, anio, seed=1).escribir_db(destino)
+
+    if args.wal:
+        conn = sqlite3.connect(destino)
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.close()
+    return destino
+
+
+def leer_datos(db_path: str) -> dict:
+    """Rangos de números y pagos y fragmentos de nombre para las búsquedas"""
+    conn = sqlite3.connect(db_path)
+    try:
+        numeros = conn.execute('SELECT MIN(numero), MAX(numero) FROM usuarios').fetchone()
+        max_pago = conn.execute('SELECT COALESCE(MAX(id), 1) FROM pagos').fetchone()[0]
+        nombres = sorted({fila[0].split()[-1] for fila in
+                          conn.execute('SELECT nombre FROM usuarios ORDER BY random() LIMIT 200')})
+    finally:
+        conn.close()
+    return {'numeros': numeros, 'max_pago': max_pago, 'nombres': nombres}
+
+
+def correr_nivel(db_path: str, terminales: int, nivel: int, segundos: float, datos: dict) -> dict:
+    """Corre `terminales` procesos a la vez y junta sus resultados"""
+    contexto = multiprocessing.get_context('spawn')
+    cola = contexto.Queue()
+    # Margen para que todos los procesos terminen de arrancar
+    inicio = time.time() + 1.5 + 0.1 * terminales
+    procesos = [
+        contexto.Process(target=terminal, args=(db_path, i, nivel, inicio, segundos, datos, cola))
+        for i in range(terminales)
+    ]
+    for proceso in procesos:
+        proceso.start()
+    try:
+        # Si una terminal falla, no se queda esperando para siempre
+        resultados = [cola.get(timeout=inicio - time.time() + segundos + 60) for _ in procesos]
+    except queue.Empty:
+        raise RuntimeError("Una terminal terminó sin enviar resultados") from None
+    finally:
+        for proceso in procesos:
+            proceso.join(timeout=5)
+
+    por_operacion = {}
+    todas = []
+    for resultado in resultados:
+        for operacion, muestras in resultado.items():
+            por_operacion.setdefault(operacion, []).extend(muestras)
+            todas.extend(muestras)
+
+    def resumen(muestras):
+        total = len(muestras)
+        return {
+            'operaciones': total,
+            'por_segundo': total / segundos,
+            'percentiles_ms': {p: v * 1000 for p, v in percentiles([m[0] for m in muestras]).items()},
+            'bloqueos': sum(m[1] for m in muestras),
+            'tasa_bloqueos': sum(m[1] for m in muestras) / total if total else 0.0,
+            'errores': sum(m[2] for m in muestras),
+        }
+
+    return {
+        'terminales': terminales,
+        **resumen(todas),
+        'por_operacion': {op: resumen(muestras) for op, muestras in por_operacion.items()},
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--terminales', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--segundos', type=float, default=10.0)
+    parser.add_argument('--db', help='Base a copiar (por omisión se genera una)')
+    parser.add_argument('--usuarios', type=int, default=2000, help='Usuarios de la base generada')
+    parser.add_argument('--wal', action='store_true', help='Usar journal_mode=WAL en la copia')
+    parser.add_argument('--detalle', action='store_true', help='Mostrar cada operación por separado')
+    parser.add_argument('--salida', help='Archivo JSON de resultados')
+    args = parser.parse_args(argv)
+
+    carpeta = tempfile.mkdtemp(prefix='agua_terminales_')
+    try:
+        db_path = preparar_base(args, carpeta)
+        datos = leer_datos(db_path)
+
+        modo = 'WAL' if args.wal else 'rollback journal'
+        print(f"{args.segundos:.0f} s por prueba, {modo}, usuarios {datos['numeros'][0]}-{datos['numeros'][1]}\n")
+        print(f"  {'terminales':>10} {'ops/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>9} "
+              f"{'bloqueos':>9} {'tasa':>7} {'errores':>8}")
+
+        niveles = []
+        for nivel, terminales in enumerate(args.terminales):
+            r = correr_nivel(db_path, terminales, nivel, args.segundos, datos)
+            niveles.append(r)
+            p = r['percentiles_ms']
+            print(f"  {terminales:>10} {r['por_segundo']:>9.0f} {p[50]:>8.2f} {p[95]:>8.2f} {p[99]:>9.2f} "
+                  f"{r['bloqueos']:>9} {r['tasa_bloqueos']:>7.2%} {r['errores']:>8}")
+            if args.detalle:
+                for operacion, d in r['por_operacion'].items():
+                    p = d['percentiles_ms']
+                    print(f"  {'· ' + operacion:>20} {d['por_segundo']:>9.0f} {p[50]:>8.2f} {p[95]:>8.2f} "
+                          f"{p[99]:>9.2f} {d['bloqueos']:>9} {d['tasa_bloqueos']:>7.2%} {d['errores']:>8}")
+
+        if args.salida:
+            with open(args.salida, 'w', encoding='utf-8') as f:
+                json.dump({'modo': modo, 'segundos': args.segundos, 'niveles': niveles}, f, indent=2)
+            print(f"\nResultados guardados en {args.salida}")
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Utilidades compartidas por los benchmarks: base de datos temporal y datos de prueba
+"""
+
+import os
+import random
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+
+import database
+from database import DatabaseManager
+
+
+@contextmanager
+def temp_database():
+    """
+    Crea una base de datos vacía en un directorio temporal
+
+    Durante el bloque el directorio de trabajo es el temporal, así que
+    get_db_manager() y cualquier ruta relativa apuntan a la base de prueba.
+    """
+    previous_cwd = os.getcwd()
+    previous_manager = database._db_manager
+    tmp_dir = tempfile.mkdtemp(prefix='agua_bench_')
+
+    try:
+        os.chdir(tmp_dir)
+        database._db_manager = None
+        yield database.get_db_manager()
+    finally:
+        database._db_manager = previous_manager
+        os.chdir(previous_cwd)
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def seed_payments(db: DatabaseManager, detail_rows: int, users: int = 500, seed: int = 1):
+    """
+    Inserta `users` usuarios y pagos mensuales hasta sumar `detail_rows`
+    registros en detalle_pagos (12 meses por pago)
+    """
+    rng = random.Random(seed)
+    conn = db.get_connection()
+
+    try:
+        conn.executemany(
+            "INSERT INTO usuarios (numero, nombre, direccion) VALUES (?, ?, ?)",
+            ((n, f"Usuario {n}", f"Calle {rng.randint(1, 80)} #{n}") for n in range(1, users + 1))
+        )
+        user_ids = [row[0] for row in conn.execute("SELECT id FROM usuarios")]
+
+        payments = (detail_rows + 11) // 12
+        conn.executemany(
+            "INSERT INTO pagos (id, usuario_id, fecha_pago, total) VALUES (?, ?, ?, ?)",
+            ((p, user_ids[p % len(user_ids)],
+              f"{2000 + p // len(user_ids) % 25}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 10:00:00",
+              600.0)
+             for p in range(1, payments + 1))
+        )
+        # Los pagos de un mismo usuario caen en años distintos, así que ningún
+        # mes se repite (índice idx_detalle_pagos_mes_unico)
+        conn.executemany(
+            "INSERT INTO detalle_pagos (pago_id, usuario_id, concepto, mes, anio, precio, cantidad) "
+            "VALUES (?, ?, 'Mensualidad', ?, ?, 50.0, 1)",
+            ((i // 12 + 1, user_ids[(i // 12 + 1) % len(user_ids)], i % 12 + 1,
+              2000 + i // 12 // len(user_ids))
+             for i in range(detail_rows))
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+@contextmanager
+def timer():
+    """Mide el tiempo del bloque; el resultado queda en el dict devuelto"""
+    result = {}
+    start = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result['seconds'] = time.perf_counter() - start
+
+
+def percentiles(values, points=(50, 95, 99)) -> dict:
+    """Percentiles (por el método del rango más cercano) de una lista de valores"""
+    ordered = sorted(values)
+    if not ordered:
+        return {p: 0.0 for p in points}
+    return {p: ordered[min(len(ordered) - 1, max(0, -(-p * len(ordered) // 100) - 1))] for p in points}
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Generador de datos sintéticos realistas para probar el sistema a escala
+
+Crea usuarios con nombres y domicilios en español y su historial de pagos
+de varios años según un perfil de pago por usuario (puntual, mensual,
+moroso o que dejó de pagar), con cooperaciones, multas y reconexiones.
+Con la misma semilla siempre genera los mismos datos, y cada usuario usa
+su propio generador aleatorio, así que la base y los CSV coinciden.
+
+Escribe directamente en una base nueva con inserciones masivas en una sola
+transacción, o los CSV que acepta CSVImporter (usuarios.csv y un
+pagos_<año>.csv por año, con columnas numero y mes_1..mes_12).
+
+Uso:
+    python -m benchmarks.generar_datos --db prueba.db --usuarios 20000 --anios 12
+    python -m benchmarks.generar_datos --csv datos_csv --usuarios 500 --anios 3
+"""
+
+import argparse
+import csv
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, datetime
+from typing import Iterator, List, Tuple
+
+from config.settings import DEFAULT_CONCEPTS, DEFAULT_MONTHLY_FEE
+
+NOMBRES = [
+    'José', 'María', 'Juan', 'Guadalupe', 'Francisco', 'Juana', 'Antonio', 'Margarita',
+    'Jesús', 'Josefina', 'Pedro', 'Verónica', 'Alejandro', 'Leticia', 'Miguel', 'Rosa',
+    'Manuel', 'Patricia', 'Ricardo', 'Elizabeth', 'Roberto', 'Alejandra', 'Fernando', 'Teresa',
+    'Jorge', 'Gabriela', 'Luis', 'Adriana', 'Carlos', 'Martha', 'Raúl', 'Silvia',
+    'Arturo', 'Claudia', 'Javier', 'Araceli', 'Sergio', 'Yolanda', 'Eduardo', 'Lucía',
+    'Rafael', 'Isabel', 'Daniel', 'Norma', 'Héctor', 'Alicia', 'Mario', 'Irma',
+]
+
+APELLIDOS = [
+    'Hernández', 'García', 'Martínez', 'López', 'González', 'Pérez', 'Rodríguez', 'Sánchez',
+    'Ramírez', 'Cruz', 'Flores', 'Gómez', 'Morales', 'Vázquez', 'Reyes', 'Jiménez',
+    'Torres', 'Díaz', 'Gutiérrez', 'Ruiz', 'Mendoza', 'Aguilar', 'Ortiz', 'Moreno',
+    'Castillo', 'Romero', 'Álvarez', 'Méndez', 'Chávez', 'Rivera', 'Juárez', 'Ramos',
+    'Domínguez', 'Herrera', 'Medina', 'Castro', 'Vargas', 'Guzmán', 'Velázquez', 'Rojas',
+]
+
+CALLES = [
+    'Benito Juárez', 'Hidalgo', 'Morelos', 'Guerrero', 'Allende', 'Zaragoza', 'Independencia',
+    'Reforma', '5 de Mayo', '16 de Septiembre', 'Emiliano Zapata', 'Francisco I. Madero',
+    'Aldama', 'Matamoros', 'Nicolás Bravo', 'Galeana', 'Juan Escutia', 'Niños Héroes',
+    'Las Flores', 'Del Río', 'La Palma', 'Los Pinos', 'El Calvario', 'San José',
+]
+
+BARRIOS = ['Centro', 'San Miguel', 'San Juan', 'La Loma', 'El Carmen', 'Santa Cruz', 'Guadalupe', 'El Llano']
+
+# (perfil, probabilidad): cómo paga cada usuario a lo largo de los años
+PERFILES = [('puntual', 0.55), ('mensual', 0.20), ('moroso', 0.18), ('abandono', 0.07)]
+
+CONCEPTOS = dict(DEFAULT_CONCEPTS)
+
+# Versión del esquema en la que se cargan los datos: la última antes de los
+# triggers que escriben por cada fila (versiones_tablas, uid, cambios)
+VERSION_CARGA = 3
+
+Pago = Tuple[datetime, List[int], int, List[Tuple[str, float]]]
+
+
+class GeneradorDatos:
+    def __init__(self, usuarios: int, anio_inicio: int, anio_fin: int, seed: int = 1):
+        """
+        Args:
+            usuarios: Número de usuarios a generar (números 1..usuarios)
+            anio_inicio: Primer año con pagos
+            anio_fin: Último año con pagos (en el año actual, hasta el mes actual)
+            seed: Semilla; los mismos argumentos dan los mismos datos
+        """
+        self.usuarios = usuarios
+        self.anio_inicio = anio_inicio
+        self.anio_fin = anio_fin
+        self.seed = seed
+        hoy = date.today()
+        self.ultimo_mes = hoy.month if anio_fin >= hoy.year else 12
+        # Segundos de la última escritura: {'carga', 'migraciones'}
+        self.tiempos = {}
+
+    def _rng(self, numero: int) -> random.Random:
+        return random.Random(self.seed * 1_000_003 + numero)
+
+    # === USUARIOS ===
+
+    def usuario(self, numero: int) -> Tuple:
+        """(numero, nombre, direccion, telefono, email, estado, fecha_registro)"""
+        rng = self._rng(numero)
+        nombre = rng.choice(NOMBRES)
+        if rng.random() < 0.25:
+            nombre += ' ' + rng.choice(NOMBRES)
+        apellido1, apellido2 = rng.choice(APELLIDOS), rng.choice(APELLIDOS)
+        nombre_completo = f"{nombre} {apellido1} {apellido2}"
+
+        direccion = f"{rng.choice(CALLES)} #{rng.randint(1, 250)}, Barrio {rng.choice(BARRIOS)}"
+        telefono = f"{rng.choice(['22', '23', '24'])}{rng.randint(10_000_000, 99_999_999)}" \
+            if rng.random() < 0.8 else ''
+        email = ''
+        if rng.random() < 0.3:
+            usuario = f"{nombre.split()[0]}.{apellido1}{rng.randint(1, 99)}".lower()
+            email = f"{usuario}@{rng.choice(['gmail.com', 'hotmail.com', 'yahoo.com.mx'])}"
+
+        # Los primeros números son los usuarios más antiguos
+        anio_registro = self.anio_inicio + int((self.anio_fin - self.anio_inicio + 1) *
+                                                (numero / self.usuarios) ** 3)
+        anio_registro = min(anio_registro, self.anio_fin)
+        fecha_registro = datetime(anio_registro, rng.randint(1, 12), rng.randint(1, 28),
+                                  rng.randint(8, 18), rng.randint(0, 59))
+
+        estado = 'Cancelado' if rng.random() < 0.04 else 'Activo'
+        return (numero, nombre_completo, direccion, telefono, email, estado,
+                fecha_registro.strftime('%Y-%m-%d %H:%M:%S'))
+
+    # === PAGOS ===
+
+    def pagos(self, numero: int, fecha_registro: str) -> Iterator[Pago]:
+        """Pagos de un usuario: (fecha, meses, año, conceptos adicionales)"""
+        # Generador distinto al de usuario() pero igual de reproducible
+        rng = random.Random(self._rng(numero).random())
+        perfil = rng.choices([p for p, _ in PERFILES], [w for _, w in PERFILES])[0]
+        primer_anio = max(self.anio_inicio, int(fecha_registro[:4]))
+        ultimo_anio = self.anio_fin
+        if perfil == 'abandono':
+            ultimo_anio = rng.randint(primer_anio, self.anio_fin)
+
+        for anio in range(primer_anio, ultimo_anio + 1):
+            meses_anio = 12 if anio < self.anio_fin else self.ultimo_mes
+            extras = []
+            if rng.random() < 0.7:
+                extras.append(('Cooperación Anual', CONCEPTOS['Cooperación Anual']))
+            if rng.random() < 0.1:
+                extras.append(('Multa por Inasistencia', CONCEPTOS['Multa por Inasistencia']))
+
+            if perfil == 'puntual':
+                # Todo el año en uno o dos pagos, casi siempre al principio
+                corte = rng.choice([meses_anio, meses_anio, 6]) if meses_anio > 6 else meses_anio
+                grupos = [list(range(1, corte + 1)), list(range(corte + 1, meses_anio + 1))]
+            elif perfil == 'mensual':
+                grupos = [[m] for m in range(1, meses_anio + 1) if rng.random() < 0.95]
+            else:
+                # Moroso: paga atrasos por bloques y deja meses sin pagar
+                pendientes = [m for m in range(1, meses_anio + 1) if rng.random() < 0.75]
+                grupos = []
+                while pendientes:
+                    tamano = rng.randint(2, 5)
+                    grupos.append(pendientes[:tamano])
+                    pendientes = pendientes[tamano:]
+                if grupos and rng.random() < 0.3:
+                    extras.append(('Reconexión', CONCEPTOS['Reconexión']))
+
+            for indice, meses in enumerate(g for g in grupos if g):
+                ultimo = meses[-1]
+                if perfil == 'moroso':
+                    mes_pago = min(12, ultimo + rng.randint(0, 3))
+                else:
+                    mes_pago = max(1, meses[0] - (1 if rng.random() < 0.3 else 0))
+                fecha = datetime(anio, mes_pago, rng.randint(1, 28), rng.randint(8, 17), rng.randint(0, 59))
+                yield fecha, meses, anio, (extras if indice == 0 else [])
+
+    def filas(self) -> Iterator[Tuple[Tuple, List[Pago]]]:
+        """(usuario, pagos) de cada usuario en orden de número"""
+        for numero in range(1, self.usuarios + 1):
+            usuario = self.usuario(numero)
+            yield usuario, list(self.pagos(numero, usuario[6]))
+
+    # === SALIDA ===
+
+    def escribir_db(self, db_path: str) -> dict:
+        """
+        Escribe los datos en una base nueva en una sola transacción
+
+        Los datos se cargan con el esquema de VERSION_CARGA, antes de los
+        triggers que actúan fila por fila; después las migraciones restantes
+        completan versiones, uid y registro de cambios con sentencias sobre
+        toda la tabla, como en cualquier base existente.
+
+        Returns:
+            dict: Filas insertadas por tabla
+        """
+        from migrations import aplicar_migraciones, obtener_version
+
+        if os.path.exists(db_path):
+            raise ValueError(f"{db_path} ya existe; indique una base nueva")
+        aplicar_migraciones(db_path, hasta=VERSION_CARGA)
+
+        inicio = time.perf_counter()
+        conn = sqlite3.connect(db_path, isolation_level=None)
+        conteo = {'usuarios': 0, 'pagos': 0, 'detalle_pagos': 0}
+        try:
+            conn.execute('PRAGMA synchronous = OFF')
+            conn.execute('PRAGMA cache_size = -200000')
+            conn.execute('BEGIN IMMEDIATE')
+            if obtener_version(conn) != VERSION_CARGA:
+                raise ValueError(f"{db_path}: esquema inesperado")
+
+            pago_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM pagos').fetchone()[0]
+            detalles: List[Tuple] = []
+            pagos: List[Tuple] = []
+            usuarios: List[Tuple] = []
+
+            def vaciar():
+                conn.executemany(
+                    'INSERT INTO usuarios (id, numero, nombre, direccion, telefono, email, estado, fecha_registro) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?)', usuarios)
+                conn.executemany(
+                    'INSERT INTO pagos (id, usuario_id, fecha_pago, total, observaciones) VALUES (?, ?, ?, ?, ?)',
+                    pagos)
+                # usuario_id lo llena la migración 5 a partir de pagos
+                conn.executemany(
+                    'INSERT INTO detalle_pagos (pago_id, concepto, mes, anio, precio, cantidad) '
+                    'VALUES (?, ?, ?, ?, ?, 1)', detalles)
+                conteo['usuarios'] += len(usuarios)
+                conteo['pagos'] += len(pagos)
+                conteo['detalle_pagos'] += len(detalles)
+                usuarios.clear()
+                pagos.clear()
+                detalles.clear()
+
+            for usuario, historial in self.filas():
+                usuario_id = usuario[0]
+                usuarios.append((usuario_id, *usuario))
+                for fecha, meses, anio, extras in historial:
+                    pago_id += 1
+                    total = len(meses) * DEFAULT_MONTHLY_FEE + sum(precio for _, precio in extras)
+                    pagos.append((pago_id, usuario_id, fecha.strftime('%Y-%m-%d %H:%M:%S'), total, ''))
+                    detalles.extend((pago_id, 'Mensualidad', mes, anio, DEFAULT_MONTHLY_FEE)
+                                    for mes in meses)
+                    detalles.extend((pago_id, concepto, None, anio, precio)
+                                    for concepto, precio in extras)
+                if len(detalles) >= 50_000:
+                    vaciar()
+            vaciar()
+
+            conn.execute('COMMIT')
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+        cargado = time.perf_counter()
+        aplicar_migraciones(db_path)
+        self.tiempos = {'carga': cargado - inicio, 'migraciones': time.perf_counter() - cargado}
+        return conteo
+
+    def escribir_csv(self, carpeta: str) -> List[str]:
+        """
+        Escribe usuarios.csv y un pagos_<año>.csv por año en los formatos de
+        CSVImporter (los conceptos adicionales no tienen formato CSV y se omiten)
+
+        Returns:
+            List[str]: Rutas de los archivos escritos
+        """
+        os.makedirs(carpeta, exist_ok=True)
+        rutas = [os.path.join(carpeta, 'usuarios.csv')]
+        archivos = []
+        try:
+            f_usuarios = open(rutas[0], 'w', encoding='utf-8', newline='')
+            archivos.append(f_usuarios)
+            usuarios = csv.writer(f_usuarios)
+            usuarios.writerow(['numero', 'nombre', 'direccion', 'telefono', 'email'])
+
+            por_anio = {}
+            for anio in range(self.anio_inicio, self.anio_fin + 1):
+                ruta = os.path.join(carpeta, f'pagos_{anio}.csv')
+                f = open(ruta, 'w', encoding='utf-8', newline='')
+                archivos.append(f)
+                rutas.append(ruta)
+                por_anio[anio] = csv.writer(f)
+                por_anio[anio].writerow(['numero'] + [f'mes_{m}' for m in range(1, 13)])
+
+            for usuario, historial in self.filas():
+                usuarios.writerow(usuario[:5])
+                pagados = {}
+                for _fecha, meses, anio, _extras in historial:
+                    pagados.setdefault(anio, set()).update(meses)
+                for anio, meses in sorted(pagados.items()):
+                    por_anio[anio].writerow([usuario[0]] + ['X' if m in meses else '' for m in range(1, 13)])
+        finally:
+            for f in archivos:
+                f.close()
+        return rutas
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--db', help='Base de datos nueva donde escribir')
+    parser.add_argument('--csv', metavar='CARPETA', help='Carpeta donde escribir los CSV')
+    parser.add_argument('--usuarios', type=int, default=20_000)
+    parser.add_argument('--anios', type=int, default=12, help='Años de historial hasta el actual')
+    parser.add_argument('--hasta', type=int, default=date.today().year, help='Último año con pagos')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    if not args.db and not args.csv:
+        parser.error('indique --db, --csv o ambos')
+    if args.db and os.path.exists(args.db):
+        parser.error(f'{args.db} ya existe; indique una base nueva')
+
+    generador = GeneradorDatos(args.usuarios, args.hasta - args.anios + 1, args.hasta, args.seed)
+
+    if args.db:
+        conteo = generador.escribir_db(args.db)
+        carga = generador.tiempos['carga']
+        print(f"{args.db}: {conteo['usuarios']:,} usuarios, {conteo['pagos']:,} pagos, "
+              f"{conteo['detalle_pagos']:,} detalles")
+        print(f"  carga {carga:.1f} s ({sum(conteo.values()) / carga:,.0f} filas/s), "
+              f"migraciones hasta el esquema actual {generador.tiempos['migraciones']:.1f} s")
+
+    if args.csv:
+        rutas = generador.escribir_csv(args.csv)
+        print(f"{len(rutas)} archivos CSV en {args.csv}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Suite reproducible de las rutas más usadas: consultas, pagos, importación CSV y recibos
+
+Cada caso corre sobre una base temporal con los mismos datos (semilla fija),
+se repite --repeat veces después de una repetición de calentamiento y
+reporta la mediana, el mínimo y el p95 de cada repetición. Los resultados se
+escriben en JSON y se pueden comparar con una base guardada: un caso es
+regresión si su mediana supera la de la base en más del umbral.
+
+Uso:
+    python -m benchmarks.suite [--repeat 7] [--salida resultados.json]
+    python -m benchmarks.suite --guardar-base              # benchmarks/baseline.json
+    python -m benchmarks.suite --comparar benchmarks/baseline.json --umbral 0.25 \\
+        --umbral-caso registrar_pago=0.5
+
+Sale con código 1 si hay regresiones, para usarse en scripts.
+"""
+
+import argparse
+import csv
+import gc
+import itertools
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from benchmarks.common import percentiles, seed_payments, temp_database, timer
+
+BASE_PREDETERMINADA = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+# nombre -> (operaciones por repetición, preparar(db, args) -> función de una repetición)
+CASOS: Dict[str, tuple] = {}
+
+
+def caso(nombre: str, operaciones: int):
+    """Registra un caso de la suite"""
+    def registrar(preparar):
+        CASOS[nombre] = (operaciones, preparar)
+        return preparar
+    return registrar
+
+
+# === CASOS ===
+
+@caso('buscar_usuarios_por_nombre', operaciones=50)
+def preparar_buscar_nombre(db, args):
+    rng = random.Random(args.seed)
+    textos = [f"Usuario {rng.randint(1, 99)}" for _ in range(50)]
+
+    def repeticion():
+        for texto in textos:
+            db.buscar_usuarios_por_nombre(texto)
+    return repeticion
+
+
+@caso('obtener_pagos_usuario_anio', operaciones=200)
+def preparar_pagos_anio(db, args):
+    rng = random.Random(args.seed)
+    consultas = [(rng.randint(1, args.usuarios), 2000 + rng.randint(0, 4)) for _ in range(200)]
+
+    def repeticion():
+        for usuario_id, anio in consultas:
+            db.obtener_pagos_usuario_anio(usuario_id, anio)
+    return repeticion
+
+
+@caso('obtener_historial_pagos_usuario', operaciones=200)
+def preparar_historial(db, args):
+    rng = random.Random(args.seed)
+    usuarios = [rng.randint(1, args.usuarios) for _ in range(200)]
+
+    def repeticion():
+        for usuario_id in usuarios:
+            db.obtener_historial_pagos_usuario(usuario_id)
+    return repeticion
+
+
+@caso('registrar_pago', operaciones=50)
+def preparar_registrar_pago(db, args):
+    rng = random.Random(args.seed)
+    # Cada pago en un (año, mes) sin usar: posteriores a los de seed_payments
+    meses = itertools.count()
+
+    def repeticion():
+        for _ in range(50):
+            k = next(meses)
+            db.registrar_pago(rng.randint(1, args.usuarios), [k % 12 + 1], 2100 + k // 12,
+                              [('Multa', 25.0)] if k % 5 == 0 else None)
+    return repeticion
+
+
+@caso('importar_usuarios_csv', operaciones=1000)
+def preparar_importar_usuarios(db, args):
+    from csv_importer import CSVImporter
+    importador = CSVImporter()
+    lotes = itertools.count(1)
+
+    def repeticion():
+        # Números nuevos en cada repetición para que todos se inserten
+        inicio = 1_000_000 * next(lotes)
+        ruta = 'usuarios_suite.csv'
+        with open(ruta, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['numero', 'nombre', 'direccion', 'telefono', 'email'])
+            for n in range(inicio, inicio + 1000):
+                writer.writerow([n, f"Importado {n}", f"Calle {n % 80}", f"555{n % 10**7:07d}", ''])
+        importados, errores = importador.import_users_from_csv(ruta)
+        assert importados == 1000, errores[:3]
+    return repeticion
+
+
+@caso('importar_pagos_csv', operaciones=1000)
+def preparar_importar_pagos(db, args):
+    from csv_importer import CSVImporter
+    importador = CSVImporter()
+    rng = random.Random(args.seed)
+    anios = itertools.count(2200)
+
+    ruta = 'pagos_suite.csv'
+    with open(ruta, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['numero'] + [f"mes_{m}" for m in range(1, 13)])
+        for n in range(1, 1001):
+            writer.writerow([(n - 1) % args.usuarios + 1] +
+                            ['si' if rng.random() < 0.7 else '' for _ in range(12)])
+
+    def repeticion():
+        # Un año nuevo en cada repetición para que ningún mes esté ya pagado
+        importador.import_payments_from_csv(ruta, next(anios))
+    return repeticion
+
+
+@caso('generate_receipt', operaciones=10)
+def preparar_recibos(db, args):
+    from receipt_generator import ReceiptGenerator
+    generador = ReceiptGenerator()
+    pagos = [db.registrar_pago(usuario_id, [1, 2, 3], 2300 + usuario_id, [('Multa', 25.0)])
+             for usuario_id in range(1, 11)]
+
+    def repeticion():
+        for pago_id in pagos:
+            assert generador.generate_receipt(pago_id)
+    return repeticion
+
+
+# === EJECUCIÓN ===
+
+def correr_caso(nombre: str, args) -> Dict:
+    """Corre un caso en una base temporal nueva y resume sus tiempos"""
+    operaciones, preparar = CASOS[nombre]
+    with temp_database() as db:
+        seed_payments(db, detail_rows=args.usuarios * 12 * 5, users=args.usuarios, seed=args.seed)
+        try:
+            repeticion = preparar(db, args)
+        except ImportError as e:
+            return {'omitido': f"dependencia no instalada ({e.name})"}
+
+        repeticion()  # calentamiento
+        tiempos = []
+        for _ in range(args.repeat):
+            gc.collect()
+            with timer() as t:
+                repeticion()
+            tiempos.append(t['seconds'])
+
+    p = percentiles(tiempos, (95,))
+    mediana = statistics.median(tiempos)
+    return {
+        'operaciones': operaciones,
+        'repeticiones': len(tiempos),
+        'mediana_ms': mediana * 1000,
+        'min_ms': min(tiempos) * 1000,
+        'p95_ms': p[95] * 1000,
+        'por_operacion_us': mediana / operaciones * 1_000_000,
+    }
+
+
+def correr_suite(args, nombres: List[str], progreso: Callable[[str], None] = print) -> Dict:
+    resultados = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'entorno': {
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'sistema': platform.platform(),
+        },
+        'parametros': {'usuarios': args.usuarios, 'repeat': args.repeat, 'seed': args.seed},
+        'casos': {},
+    }
+    for nombre in nombres:
+        resultado = correr_caso(nombre, args)
+        resultados['casos'][nombre] = resultado
+        if 'omitido' in resultado:
+            progreso(f"  {nombre:<34} omitido: {resultado['omitido']}")
+        else:
+            progreso(f"  {nombre:<34} {resultado['mediana_ms']:10.1f} ms "
+                     f"({resultado['por_operacion_us']:9.1f} µs/op, p95 {resultado['p95_ms']:.1f} ms)")
+    return resultados
+
+
+def comparar(resultados: Dict, base: Dict, umbral: float, umbrales_caso: Dict[str, float]) -> List[Dict]:
+    """
+    Compara las medianas con la base
+
+    Returns:
+        List[Dict]: Un renglón por caso medido en ambos:
+                    {'caso', 'base_ms', 'actual_ms', 'cambio', 'umbral', 'regresion'}
+    """
+    filas = []
+    for nombre, actual in resultados['casos'].items():
+        anterior = base.get('casos', {}).get(nombre)
+        if not anterior or 'omitido' in actual or 'omitido' in anterior:
+            continue
+        limite = umbrales_caso.get(nombre, umbral)
+        cambio = actual['mediana_ms'] / anterior['mediana_ms'] - 1
+        filas.append({
+            'caso': nombre,
+            'base_ms': anterior['mediana_ms'],
+            'actual_ms': actual['mediana_ms'],
+            'cambio': cambio,
+            'umbral': limite,
+            'regresion': cambio > limite,
+        })
+    return filas
+
+
+def _umbral_caso(texto: str):
+    nombre, _, valor = texto.partition('=')
+    if nombre not in CASOS or not valor:
+        raise argparse.ArgumentTypeError(f"se esperaba caso=fracción con un caso de la suite: {texto}")
+    return nombre, float(valor)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--casos', nargs='+', choices=list(CASOS), default=list(CASOS))
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--usuarios', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--salida', help='Archivo JSON de resultados')
+    parser.add_argument('--comparar', metavar='BASE', help='Archivo JSON de la base a comparar')
+    parser.add_argument('--umbral', type=float, default=0.25,
+                        help='Aumento máximo permitido de la mediana (0.25 = 25%%)')
+    parser.add_argument('--umbral-caso', type=_umbral_caso, action='append', default=[],
+                        metavar='CASO=FRACCION', help='Umbral propio de un caso')
+    parser.add_argument('--guardar-base', nargs='?', const=BASE_PREDETERMINADA, metavar='ARCHIVO',
+                        help=f'Guardar los resultados como base (por omisión {BASE_PREDETERMINADA})')
+    args = parser.parse_args(argv)
+
+    print(f"Suite de rendimiento: {args.usuarios} usuarios, {args.repeat} repeticiones\n")
+    resultados = correr_suite(args, args.casos)
+
+    for ruta in filter(None, (args.salida, args.guardar_base)):
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+        print(f"\nResultados guardados en {ruta}")
+
+    if not args.comparar:
+        return 0
+
+    with open(args.comparar, encoding='utf-8') as f:
+        base = json.load(f)
+    if base.get('parametros') != resultados['parametros']:
+        print(f"\nAviso: la base se midió con otros parámetros ({base.get('parametros')})")
+
+    filas = comparar(resultados, base, args.umbral, dict(args.umbral_caso))
+    print(f"\nComparación con {args.comparar} ({base.get('fecha', '?')})\n")
+    print(f"  {'caso':<34} {'base ms':>10} {'actual ms':>10} {'cambio':>8} {'umbral':>7}")
+    for fila in filas:
+        marca = '  REGRESIÓN' if fila['regresion'] else ''
+        print(f"  {fila['caso']:<34} {fila['base_ms']:>10.1f} {fila['actual_ms']:>10.1f} "
+              f"{fila['cambio']:>+8.0%} {fila['umbral']:>7.0%}{marca}")
+
+    regresiones = [fila['caso'] for fila in filas if fila['regresion']]
+    if regresiones:
+        print(f"\n{len(regresiones)} regresiones: {', '.join(regresiones)}")
+        return 1
+    print("\nSin regresiones")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
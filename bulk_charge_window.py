@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ventana de cargo masivo: registra un concepto de cobro a muchos usuarios a la vez
+"""
+
+import tkinter as tk
+from tkinter import ttk, messagebox
+from datetime import datetime
+
+from database import get_db_manager
+
+
+class BulkChargeWindow:
+    def __init__(self, parent=None):
+        # Crear ventana principal o usar la proporcionada
+        if parent:
+            self.root = tk.Toplevel(parent)
+        else:
+            self.root = tk.Tk()
+
+        self.root.title("Cargo Masivo")
+        self.root.geometry("520x480")
+        self.root.resizable(False, False)
+
+        # Variables
+        self.concepts = {}
+        self.concept_var = tk.StringVar()
+        self.estado_var = tk.StringVar(value='Activos')
+        self.nombre_var = tk.StringVar()
+        self.desde_var = tk.StringVar()
+        self.hasta_var = tk.StringVar()
+        self.anio_var = tk.StringVar(value=str(datetime.now().year))
+        self.observaciones_var = tk.StringVar()
+
+        # Configurar la interfaz
+        self.setup_ui()
+        self.load_concepts()
+
+    def setup_ui(self):
+        """Configura la interfaz de usuario"""
+        main_frame = tk.Frame(self.root)
+        main_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=15)
+
+        # Título
+        title_label = tk.Label(
+            main_frame,
+            text="Cargo Masivo",
+            font=('Arial', 16, 'bold'),
+            fg='#2c3e50'
+        )
+        title_label.pack(pady=(0, 10))
+
+        # Concepto a cobrar
+        charge_frame = tk.LabelFrame(main_frame, text="Cargo", font=('Arial', 11, 'bold'))
+        charge_frame.pack(fill=tk.X, pady=5)
+
+        tk.Label(charge_frame, text="Concepto:", font=('Arial', 10)).grid(row=0, column=0, sticky='w', padx=10, pady=5)
+        self.concept_combo = ttk.Combobox(charge_frame, textvariable=self.concept_var,
+                                          state='readonly', width=32)
+        self.concept_combo.grid(row=0, column=1, sticky='w', padx=5, pady=5)
+
+        tk.Label(charge_frame, text="Año:", font=('Arial', 10)).grid(row=1, column=0, sticky='w', padx=10, pady=5)
+        tk.Entry(charge_frame, textvariable=self.anio_var, width=8).grid(row=1, column=1, sticky='w', padx=5, pady=5)
+
+        tk.Label(charge_frame, text="Observaciones:", font=('Arial', 10)).grid(row=2, column=0, sticky='w', padx=10, pady=5)
+        tk.Entry(charge_frame, textvariable=self.observaciones_var, width=35).grid(row=2, column=1, sticky='w', padx=5, pady=5)
+
+        # Usuarios a los que se aplica
+        filter_frame = tk.LabelFrame(main_frame, text="Usuarios", font=('Arial', 11, 'bold'))
+        filter_frame.pack(fill=tk.X, pady=5)
+
+        tk.Label(filter_frame, text="Estado:", font=('Arial', 10)).grid(row=0, column=0, sticky='w', padx=10, pady=5)
+        ttk.Combobox(filter_frame, textvariable=self.estado_var, state='readonly', width=12,
+                     values=['Activos', 'Cancelados', 'Todos']).grid(row=0, column=1, sticky='w', padx=5, pady=5)
+
+        tk.Label(filter_frame, text="Nombre contiene:", font=('Arial', 10)).grid(row=1, column=0, sticky='w', padx=10, pady=5)
+        tk.Entry(filter_frame, textvariable=self.nombre_var, width=25).grid(row=1, column=1, sticky='w', padx=5, pady=5)
+
+        range_frame = tk.Frame(filter_frame)
+        range_frame.grid(row=2, column=1, sticky='w', padx=5, pady=5)
+        tk.Label(filter_frame, text="Número:", font=('Arial', 10)).grid(row=2, column=0, sticky='w', padx=10, pady=5)
+        tk.Label(range_frame, text="desde").pack(side=tk.LEFT)
+        tk.Entry(range_frame, textvariable=self.desde_var, width=7).pack(side=tk.LEFT, padx=5)
+        tk.Label(range_frame, text="hasta").pack(side=tk.LEFT)
+        tk.Entry(range_frame, textvariable=self.hasta_var, width=7).pack(side=tk.LEFT, padx=5)
+
+        # Vista previa
+        self.preview_label = tk.Label(main_frame, text="", font=('Arial', 11, 'bold'), fg='#2980b9')
+        self.preview_label.pack(pady=(10, 0))
+
+        # Botones
+        buttons_frame = tk.Frame(main_frame)
+        buttons_frame.pack(fill=tk.X, pady=(10, 0))
+
+        tk.Button(
+            buttons_frame,
+            text="Vista Previa",
+            command=self.preview,
+            bg='#3498db',
+            fg='white',
+            font=('Arial', 11, 'bold'),
+            padx=15
+        ).pack(side=tk.LEFT)
+
+        tk.Button(
+            buttons_frame,
+            text="Aplicar Cargo",
+            command=self.apply_charge,
+            bg='#27ae60',
+            fg='white',
+            font=('Arial', 11, 'bold'),
+            padx=15
+        ).pack(side=tk.LEFT, padx=10)
+
+        tk.Button(
+            buttons_frame,
+            text="Cerrar",
+            command=self.root.destroy,
+            bg='#95a5a6',
+            fg='white',
+            font=('Arial', 11, 'bold'),
+            padx=15
+        ).pack(side=tk.RIGHT)
+
+    def load_concepts(self):
+        """Carga los conceptos de cobro activos"""
+        self.concepts = {
+            f"{c['nombre']} - ${c['precio']:.2f}": c['id']
+            for c in get_db_manager().obtener_conceptos_cobro(solo_activos=True)
+        }
+        self.concept_combo['values'] = list(self.concepts)
+        if self.concepts:
+            self.concept_combo.current(0)
+
+    def get_parameters(self):
+        """
+        Lee y valida los datos del formulario
+
+        Returns:
+            tuple: (concepto_id, filtro, anio) o None si hay un dato inválido
+        """
+        concepto_id = self.concepts.get(self.concept_var.get())
+        if concepto_id is None:
+            messagebox.showwarning("Advertencia", "Seleccione un concepto de cobro", parent=self.root)
+            return None
+
+        filtro = {}
+        estado = self.estado_var.get()
+        if estado == 'Activos':
+            filtro['estado'] = 'Activo'
+        elif estado == 'Cancelados':
+            filtro['estado'] = 'Cancelado'
+
+        if self.nombre_var.get().strip():
+            filtro['nombre'] = self.nombre_var.get().strip()
+
+        try:
+            if self.desde_var.get().strip():
+                filtro['numero_desde'] = int(self.desde_var.get())
+            if self.hasta_var.get().strip():
+                filtro['numero_hasta'] = int(self.hasta_var.get())
+            anio = int(self.anio_var.get())
+        except ValueError:
+            messagebox.showerror("Error", "El año y el rango de números deben ser números enteros",
+                                 parent=self.root)
+            return None
+
+        return concepto_id, filtro, anio
+
+    def preview(self):
+        """Muestra cuántos usuarios se cobrarían y el total, sin registrar nada"""
+        parameters = self.get_parameters()
+        if parameters is None:
+            return None
+
+        concepto_id, filtro, anio = parameters
+        resultado = get_db_manager().registrar_cargo_masivo(
+            concepto_id, filtro, anio, solo_vista_previa=True
+        )
+        if not resultado:
+            messagebox.showerror("Error", "No se pudo calcular la vista previa", parent=self.root)
+            return None
+
+        self.preview_label.config(
+            text=f"{resultado['usuarios']} usuarios × ${resultado['precio']:.2f} = ${resultado['total']:,.2f}"
+        )
+        return resultado
+
+    def apply_charge(self):
+        """Registra el cargo a todos los usuarios del filtro después de confirmar"""
+        resultado = self.preview()
+        if not resultado:
+            return
+
+        if resultado['usuarios'] == 0:
+            messagebox.showinfo("Sin usuarios", "Ningún usuario cumple el filtro", parent=self.root)
+            return
+
+        if not messagebox.askyesno(
+            "Confirmar Cargo",
+            f"Se registrará '{resultado['concepto']}' a {resultado['usuarios']} usuarios.\n\n"
+            f"Total: ${resultado['total']:,.2f}\n\n¿Desea continuar?",
+            parent=self.root
+        ):
+            return
+
+        concepto_id, filtro, anio = self.get_parameters()
+        resultado = get_db_manager().registrar_cargo_masivo(
+            concepto_id, filtro, anio, observaciones=self.observaciones_var.get().strip()
+        )
+
+        if resultado.get('registrado'):
+            self.preview_label.config(text="")
+            messagebox.showinfo(
+                "Éxito",
+                f"Cargo registrado a {resultado['usuarios']} usuarios\n"
+                f"Total: ${resultado['total']:,.2f}",
+                parent=self.root
+            )
+        else:
+            messagebox.showerror("Error", "No se registró el cargo", parent=self.root)
@@ -27,6 +27,31 @@ VENTAJAS:
 DATABASE_NAME = "agua_potable.db"
 DATABASE_BACKUP_DIR = "backups"
 
+# Respaldos incrementales automáticos (ver backup_manager.py)
+BACKUP_INTERVAL_MINUTES = 60
+
+# Cuántos respaldos conservar: el último de cada hora, día y mes
+BACKUP_RETENTION = {
+    'hourly': 24,      # Últimas 24 horas
+    'daily': 30,       # Últimos 30 días
+    'monthly': 12      # Últimos 12 meses
+}
+
+# Servicio HTTP local para varias terminales (ver api_server.py)
+API_SERVER_HOST = "127.0.0.1"
+API_SERVER_PORT = 8765
+
+# URL del servicio que usan las ventanas de esta terminal, por ejemplo
+# "http://192.168.1.10:8765". Con None abren la base de datos directamente.
+API_SERVER_URL = None
+
+# Medición de consultas SQL (ver query_stats.py). También se activa con la
+# variable de entorno AGUA_QUERY_STATS=1; desactivada no agrega costo
+QUERY_STATS_ENABLED = False
+SLOW_QUERY_MS = 100
+SLOW_QUERY_LOG = "consultas_lentas.log"
+QUERY_STATS_FILE = "estadisticas_consultas.txt"
+
 
 # =============================================================================
 # CONFIGURACIÓN DE LA INTERFAZ
@@ -56,6 +81,16 @@ WINDOW_SIZES = {
     'config': '1000x700'
 }
 
+# Miniaturas de logo.jpg y demás imágenes ya redimensionadas (ver image_cache.py)
+IMAGE_CACHE_DIR = "cache/imagenes"
+
+# Monitor de congelamientos de la interfaz (ver ui_monitor.py). También se
+# activa con la variable de entorno AGUA_UI_MONITOR=1
+UI_MONITOR_ENABLED = False
+UI_HANDLER_THRESHOLD_MS = 100    # Manejadores y bloqueos más largos se anotan
+UI_LAG_INTERVAL_MS = 50          # Cada cuánto late el monitor del bucle de eventos
+UI_MONITOR_LOG = "interfaz_lenta.log"
+
 # Fuentes
 FONTS = {
     'title': ('Arial', 16, 'bold'),
@@ -108,6 +143,23 @@ CSV_COLUMN_MAPPING = {
     'email': ['email', 'correo', 'mail', 'e-mail']
 }
 
+# Columnas del archivo de pagos en formato largo (una fila por mes o concepto)
+CSV_PAYMENT_COLUMN_MAPPING = {
+    'numero': ['numero', 'num', 'usuario', 'id'],
+    'anio': ['anio', 'año', 'ano', 'year'],
+    'mes': ['mes', 'month'],
+    'concepto': ['concepto', 'concept'],
+    'monto': ['monto', 'importe', 'precio', 'amount'],
+    'fecha': ['fecha', 'fecha_pago', 'date'],
+    'folio': ['folio', 'recibo', 'pago'],
+}
+
+# Archivos a partir de este tamaño se leen en paralelo (ver csv_parallel.py)
+CSV_PARALLEL_MIN_BYTES = 8 * 1024 * 1024
+
+# Tamaño aproximado del rango del archivo que lee cada proceso
+CSV_CHUNK_BYTES = 2 * 1024 * 1024
+
 
 # =============================================================================
 # CONFIGURACIÓN DE PAGOS
@@ -6,8 +6,10 @@ Módulo de configuración del sistema de agua potable
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-from database import get_db_manager
+from database import get_db_manager, usa_servicio
+from datetime import date, datetime
 from typing import Dict, List
+from tarifas import Tarifas
 
 class ConfigurationWindow:
     def __init__(self, parent=None):
@@ -24,13 +26,27 @@ class ConfigurationWindow:
         
         # Variables
         self.concepts_data = []
+        self.on_close = None  # Lo asigna WindowManager para reutilizar la ventana
+        self.built_tabs = set()  # Pestañas ya construidas (se crean al mostrarse)
         
-        # Configurar la interfaz
+        # Configurar la interfaz; los datos de cada pestaña se cargan al construirla
         self.setup_ui()
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+    
+    def close(self):
+        """Cierra la ventana (si la administra WindowManager, solo se oculta)"""
+        if self.on_close:
+            self.on_close()
+        else:
+            self.root.destroy()
+    
+    def refresh_data(self, tablas):
+        """Recarga solo lo que depende de las tablas que cambiaron"""
+        if tablas & {'configuracion', 'tarifas'}:
+            self.load_configuration()
         
-        # Cargar datos iniciales
-        self.load_configuration()
-        self.refresh_concepts_list()
+        if 'conceptos_cobro' in tablas:
+            self.refresh_concepts_list()
     
     def setup_ui(self):
         """Configura la interfaz de usuario"""
@@ -51,24 +67,58 @@ class ConfigurationWindow:
         self.notebook = ttk.Notebook(main_frame)
         self.notebook.pack(fill=tk.BOTH, expand=True)
         
-        # Pestaña de configuración general
-        self.create_general_config_tab()
-        
-        # Pestaña de conceptos de cobro
-        self.create_concepts_tab()
-        
-        # Pestaña de seguridad
-        self.create_security_tab()
+        # Las pestañas se agregan vacías; su contenido se construye y se llena
+        # la primera vez que se seleccionan (<<NotebookTabChanged>> también se
+        # genera al seleccionarse la primera pestaña)
+        self.tab_builders = {}
+        for name, text, builder in (
+            ('general', "Configuración General", self.build_general_tab),
+            ('concepts', "Conceptos de Cobro", self.build_concepts_tab),
+            ('security', "Seguridad", self.build_security_tab),
+        ):
+            frame = tk.Frame(self.notebook)
+            self.notebook.add(frame, text=text)
+            self.tab_builders[str(frame)] = (name, frame, builder)
+        
+        self.notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
+        # Por si el evento de la primera pestaña se generó antes del bind
+        self.root.after_idle(self.on_tab_changed)
         
         # Botones principales
         self.create_main_buttons(main_frame)
     
-    def create_general_config_tab(self):
-        """Crea la pestaña de configuración general"""
-        # Frame para la pestaña
-        general_frame = tk.Frame(self.notebook)
-        self.notebook.add(general_frame, text="Configuración General")
+    def on_tab_changed(self, event=None):
+        """Construye la pestaña seleccionada si es la primera vez que se muestra"""
+        if not self.notebook.winfo_exists():
+            return
         
+        selected = self.notebook.select()
+        if selected not in self.tab_builders:
+            return
+        
+        name, frame, builder = self.tab_builders[selected]
+        if name not in self.built_tabs:
+            builder(frame)
+    
+    def build_general_tab(self, frame):
+        """Construye la pestaña de configuración general y carga sus datos"""
+        self.create_general_config_tab(frame)
+        self.built_tabs.add('general')
+        self.load_configuration()
+    
+    def build_concepts_tab(self, frame):
+        """Construye la pestaña de conceptos de cobro y carga la lista"""
+        self.create_concepts_tab(frame)
+        self.built_tabs.add('concepts')
+        self.refresh_concepts_list()
+    
+    def build_security_tab(self, frame):
+        """Construye la pestaña de seguridad"""
+        self.create_security_tab(frame)
+        self.built_tabs.add('security')
+    
+    def create_general_config_tab(self, general_frame):
+        """Crea el contenido de la pestaña de configuración general"""
         # Frame principal con scroll
         canvas = tk.Canvas(general_frame)
         scrollbar = ttk.Scrollbar(general_frame, orient="vertical", command=canvas.yview)
@@ -133,6 +183,17 @@ class ConfigurationWindow:
         
         tk.Label(new_frame, text="$", font=('Arial', 11)).pack(side=tk.LEFT)
         
+        # Primer mes en que se cobra la nueva cuota
+        tk.Label(new_frame, text="Desde (AAAA-MM):", font=('Arial', 11)).pack(side=tk.LEFT, padx=(20, 0))
+        
+        self.fee_from_var = tk.StringVar(value=f"{date.today():%Y-%m}")
+        tk.Entry(
+            new_frame,
+            textvariable=self.fee_from_var,
+            font=('Arial', 11),
+            width=10
+        ).pack(side=tk.LEFT, padx=(10, 0))
+        
         # Botón actualizar cuota
         update_fee_btn = tk.Button(
             inner_frame,
@@ -147,7 +208,7 @@ class ConfigurationWindow:
         # Información adicional
         info_label = tk.Label(
             inner_frame,
-            text="La nueva cuota se aplicará a partir del próximo pago registrado.",
+            text="La nueva cuota se cobra desde el mes indicado; los meses anteriores conservan su cuota.",
             font=('Arial', 9),
             fg='#7f8c8d',
             wraplength=400
@@ -199,12 +260,8 @@ class ConfigurationWindow:
         )
         update_info_btn.pack(pady=(15, 5))
     
-    def create_concepts_tab(self):
-        """Crea la pestaña de conceptos de cobro"""
-        # Frame para la pestaña
-        concepts_frame = tk.Frame(self.notebook)
-        self.notebook.add(concepts_frame, text="Conceptos de Cobro")
-        
+    def create_concepts_tab(self, concepts_frame):
+        """Crea el contenido de la pestaña de conceptos de cobro"""
         # Frame superior para agregar nuevo concepto
         add_frame = tk.LabelFrame(concepts_frame, text="Agregar Nuevo Concepto", font=('Arial', 12, 'bold'))
         add_frame.pack(fill=tk.X, padx=10, pady=(10, 5))
@@ -313,12 +370,8 @@ class ConfigurationWindow:
         # Eventos del tree
         self.concepts_tree.bind('<Double-1>', lambda e: self.edit_selected_concept())
     
-    def create_security_tab(self):
-        """Crea la pestaña de configuración de seguridad"""
-        # Frame para la pestaña
-        security_frame = tk.Frame(self.notebook)
-        self.notebook.add(security_frame, text="Seguridad")
-        
+    def create_security_tab(self, security_frame):
+        """Crea el contenido de la pestaña de configuración de seguridad"""
         # Frame para cambio de PIN
         pin_frame = tk.LabelFrame(security_frame, text="Cambio de PIN de Acceso", font=('Arial', 12, 'bold'))
         pin_frame.pack(fill=tk.X, padx=10, pady=10)
@@ -426,10 +479,28 @@ class ConfigurationWindow:
         )
         restore_btn.pack(side=tk.LEFT)
         
+        snapshot_btn = tk.Button(
+            backup_inner,
+            text="Respaldo Incremental",
+            command=self.create_incremental_backup,
+            bg='#3498db',
+            fg='white',
+            font=('Arial', 11, 'bold')
+        )
+        snapshot_btn.pack(side=tk.LEFT, padx=(10, 0))
+        
+        # Con el servicio HTTP la base está en otro equipo: se respalda allá
+        if usa_servicio():
+            for button in (backup_btn, restore_btn, snapshot_btn):
+                button.config(state='disabled')
+            backup_text = "Esta terminal usa el servicio de red; los respaldos se hacen en el equipo del servicio."
+        else:
+            backup_text = "Se recomienda crear respaldos regulares de la base de datos."
+        
         # Información sobre respaldos
         backup_info = tk.Label(
             backup_inner,
-            text="Se recomienda crear respaldos regulares de la base de datos.",
+            text=backup_text,
             font=('Arial', 9),
             fg='#7f8c8d'
         )
@@ -444,7 +515,7 @@ class ConfigurationWindow:
         close_btn = tk.Button(
             buttons_frame,
             text="Cerrar",
-            command=self.root.destroy,
+            command=self.close,
             bg='#95a5a6',
             fg='white',
             font=('Arial', 12),
@@ -456,13 +527,14 @@ class ConfigurationWindow:
     
     def load_configuration(self):
         """Carga la configuración actual"""
+        if 'general' not in self.built_tabs:
+            return  # Se cargará al construir la pestaña
+        
         try:
             db = get_db_manager()
             
-            # Cargar cuota mensual
-            monthly_fee = db.obtener_configuracion('cuota_mensual')
-            if monthly_fee:
-                self.current_fee_label.config(text=f"${float(monthly_fee):.2f}")
+            # Cargar cuota mensual del mes en curso
+            self.current_fee_label.config(text=f"${Tarifas(db.obtener_tarifas()).cuota_actual():.2f}")
             
             # Cargar información del comité
             committee_fields = [
@@ -492,12 +564,18 @@ class ConfigurationWindow:
                 messagebox.showwarning("Valor inválido", "La cuota debe ser mayor a cero")
                 return
             
+            try:
+                desde = datetime.strptime(self.fee_from_var.get().strip(), '%Y-%m')
+            except ValueError:
+                messagebox.showwarning("Valor inválido", "Indique el primer mes de la cuota como AAAA-MM")
+                return
+            
             # Confirmar cambio
             if messagebox.askyesno("Confirmar Cambio",
-                                 f"¿Confirma cambiar la cuota mensual a ${new_fee:.2f}?"):
+                                 f"¿Confirma cobrar ${new_fee:.2f} por mes a partir de {desde:%m/%Y}?"):
                 db = get_db_manager()
-                if db.actualizar_configuracion('cuota_mensual', str(new_fee)):
-                    self.current_fee_label.config(text=f"${new_fee:.2f}")
+                if db.agregar_tarifa(new_fee, desde.year, desde.month):
+                    self.load_configuration()
                     self.new_fee_var.set("")
                     messagebox.showinfo("Éxito", "Cuota mensual actualizada correctamente")
                 else:
@@ -525,6 +603,9 @@ class ConfigurationWindow:
     
     def refresh_concepts_list(self):
         """Actualiza la lista de conceptos de cobro"""
+        if 'concepts' not in self.built_tabs:
+            return  # Se cargará al construir la pestaña
+        
         try:
             db = get_db_manager()
             self.concepts_data = db.obtener_conceptos_cobro(solo_activos=False)
@@ -685,8 +766,8 @@ class ConfigurationWindow:
         """Crea un respaldo de la base de datos"""
         try:
             from tkinter import filedialog
-            import shutil
             from datetime import datetime
+            from backup_manager import copy_database
             
             # Seleccionar ubicación para el respaldo
             default_name = f"agua_potable_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
@@ -698,18 +779,35 @@ class ConfigurationWindow:
             )
             
             if backup_path:
-                # Copiar la base de datos
-                shutil.copy2("agua_potable.db", backup_path)
+                # Copiar la base de datos (copia consistente aunque haya escrituras)
+                copy_database(get_db_manager().db_path, backup_path)
                 messagebox.showinfo("Éxito", f"Respaldo creado correctamente en:\n{backup_path}")
                 
         except Exception as e:
             messagebox.showerror("Error", f"Error al crear respaldo: {str(e)}")
     
+    def create_incremental_backup(self):
+        """Crea un respaldo incremental en el directorio de respaldos"""
+        try:
+            from backup_manager import get_backup_manager
+            
+            manager = get_backup_manager()
+            nombre = manager.run_scheduled_backup()
+            
+            if nombre:
+                messagebox.showinfo("Éxito", f"Respaldo incremental creado: {nombre}\n\n" +
+                                   f"Ubicación: {manager.backup_dir}")
+            else:
+                messagebox.showerror("Error", "No se pudo crear el respaldo incremental")
+                
+        except Exception as e:
+            messagebox.showerror("Error", f"Error al crear respaldo: {str(e)}")
+    
     def restore_backup(self):
         """Restaura un respaldo de la base de datos"""
         try:
             from tkinter import filedialog
-            import shutil
+            from backup_manager import get_backup_manager
             
             # Advertencia
             warning_msg = ("ADVERTENCIA: Esta operación reemplazará toda la información actual " +
@@ -729,12 +827,20 @@ class ConfigurationWindow:
                 # Confirmar una vez más
                 if messagebox.askyesno("Última Confirmación",
                                      "¿Confirma restaurar el respaldo?\n\n" +
-                                     "Esta acción NO se puede deshacer."):
-                    # Restaurar la base de datos
-                    shutil.copy2(backup_path, "agua_potable.db")
-                    messagebox.showinfo("Éxito", 
-                                      "Respaldo restaurado correctamente.\n\n" +
-                                      "Se recomienda reiniciar la aplicación.")
+                                     "Antes de restaurar se guardará un respaldo incremental " +
+                                     "de los datos actuales."):
+                    # Validar y reemplazar la base de datos de forma atómica
+                    ok, errores = get_backup_manager().restore_database(backup_path)
+                    
+                    if ok:
+                        # Recargar los datos mostrados con la base restaurada
+                        self.load_configuration()
+                        self.refresh_concepts_list()
+                        messagebox.showinfo("Éxito", "Respaldo restaurado correctamente.")
+                    else:
+                        messagebox.showerror("Respaldo no válido",
+                                           "No se restauró el respaldo:\n\n" +
+                                           "\n".join(errores[:10]))
                     
         except Exception as e:
             messagebox.showerror("Error", f"Error al restaurar respaldo: {str(e)}")
@@ -4,23 +4,239 @@
 Utilidad para importar datos desde CSV al sistema de agua potable
 """
 
-import csv
 import os
-from database import get_db_manager
-from tkinter import messagebox
-import tkinter as tk
-from tkinter import filedialog
+import re
+from datetime import datetime
+from typing import Optional
+
+from config.settings import CSV_COLUMN_MAPPING, CSV_PAYMENT_COLUMN_MAPPING, MONTH_NAMES
+from csv_parallel import CampoMultilinea, leer_encabezado, leer_filas
+from database import DatabaseManager, get_db_manager, MesesYaPagadosError
+
+# Tkinter se carga al abrir ImporterGUI: la importación desde la línea de
+# comandos (python -m agua importar) funciona en equipos sin pantalla
+tk = messagebox = filedialog = None
+
+COLUMNAS_USUARIOS_FALTANTES = "El archivo CSV debe contener al menos las columnas 'numero' y 'nombre'"
+
+# Valores de una columna de mes que indican que no se pagó
+VALORES_NO_PAGADO = ('', '0', 'no', 'false', 'n')
+
+
+def _campo(campos: list, indice) -> str:
+    return campos[indice].strip() if indice is not None and indice < len(campos) else ''
+
+
+def _validar_usuario(campos: list, columnas: tuple) -> tuple:
+    """Fila de usuarios -> (numero, nombre, direccion, telefono, email)"""
+    numero_str, nombre, direccion, telefono, email = (_campo(campos, i) for i in columnas)
+    
+    if not numero_str or not nombre:
+        raise ValueError("Número y nombre son obligatorios")
+    try:
+        numero = int(numero_str)
+    except ValueError:
+        raise ValueError(f"Número '{numero_str}' no es válido") from None
+    
+    return numero, nombre, direccion, telefono, email
+
+
+def _numero_usuario(campos: list, indice: int) -> int:
+    numero_str = _campo(campos, indice)
+    if not numero_str:
+        raise ValueError("Número de usuario vacío")
+    try:
+        return int(numero_str)
+    except ValueError:
+        raise ValueError(f"Número '{numero_str}' no es válido") from None
+
+
+# Meses por nombre o abreviatura ('marzo', 'mar'), por número ('3', '03',
+# 'mes_3', 'month 3') y encabezados año-mes ('2019-03', '2019_3')
+_MESES_POR_NOMBRE = {nombre.lower(): mes for mes, nombre in enumerate(MONTH_NAMES) if nombre}
+_MESES_POR_NOMBRE.update({nombre[:3]: mes for nombre, mes in list(_MESES_POR_NOMBRE.items())})
+_MES_NUMERO = re.compile(r'(?:mes|month)?[\s_-]*(\d{1,2})')
+_ANIO_MES = re.compile(r'(\d{4})[\s_/-](\d{1,2})')
+
+
+def _mes(texto: str) -> Optional[int]:
+    """Número de mes (1-12) de un encabezado o valor, None si no lo es"""
+    texto = texto.lower().strip()
+    coincidencia = _MES_NUMERO.fullmatch(texto)
+    mes = int(coincidencia.group(1)) if coincidencia else _MESES_POR_NOMBRE.get(texto)
+    return mes if mes and 1 <= mes <= 12 else None
+
+
+def _fecha(texto: str) -> str:
+    """'2019-03-15', '2019-03-15 10:30' o '15/03/2019' -> 'AAAA-MM-DD HH:MM:SS'"""
+    for formato in ('%d/%m/%Y', '%d/%m/%Y %H:%M'):
+        try:
+            return datetime.strptime(texto, formato).strftime('%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            pass
+    try:
+        return datetime.fromisoformat(texto).strftime('%Y-%m-%d %H:%M:%S')
+    except ValueError:
+        raise ValueError(f"Fecha '{texto}' no es válida") from None
+
+
+def _validar_pago(campos: list, columnas: tuple):
+    """
+    Fila con una columna por mes -> (numero, None, detalles), o None si no
+    tiene meses pagados
+
+    columnas: (índice del número, ((anio, mes, índice), ...))
+    """
+    numero_col, month_cols = columnas
+    numero = _numero_usuario(campos, numero_col)
+    detalles = tuple((anio, mes, None, None) for anio, mes, i in month_cols
+                     if _campo(campos, i).lower() not in VALORES_NO_PAGADO)
+    return (numero, None, detalles) if detalles else None
+
+
+def _validar_pago_largo(campos: list, columnas: tuple) -> tuple:
+    """
+    Fila del formato largo -> ((numero, folio, fecha), (anio, mes, concepto, monto))
+
+    concepto es None para una mensualidad; los demás conceptos no llevan mes.
+    columnas: índices de CSV_PAYMENT_COLUMN_MAPPING en ese orden
+    """
+    numero_col, anio_col, mes_col, concepto_col, monto_col, fecha_col, folio_col = columnas
+    numero = _numero_usuario(campos, numero_col)
+    
+    anio_str = _campo(campos, anio_col)
+    try:
+        anio = int(anio_str)
+    except ValueError:
+        raise ValueError(f"Año '{anio_str}' no es válido") from None
+    
+    mes_str = _campo(campos, mes_col)
+    mes = _mes(mes_str) if mes_str else None
+    if mes_str and mes is None:
+        raise ValueError(f"Mes '{mes_str}' no es válido")
+    
+    concepto = _campo(campos, concepto_col)
+    if not concepto or concepto.lower() == 'mensualidad':
+        if mes is None:
+            raise ValueError("Falta el mes de la mensualidad")
+        concepto = None
+    else:
+        mes = None
+    
+    monto = None
+    monto_str = _campo(campos, monto_col)
+    if monto_str:
+        try:
+            monto = float(monto_str)
+        except ValueError:
+            raise ValueError(f"Monto '{monto_str}' no es válido") from None
+        if monto < 0:
+            raise ValueError(f"Monto '{monto_str}' no puede ser negativo")
+    
+    fecha_str = _campo(campos, fecha_col)
+    fecha = _fecha(fecha_str) if fecha_str else None
+    return (numero, _campo(campos, folio_col), fecha), (anio, mes, concepto, monto)
+
+
+def _agrupar_pagos(filas):
+    """
+    Une las filas seguidas del formato largo con el mismo (numero, folio, fecha)
+    en un solo pago: (numero_fila de la primera, (numero, fecha, detalles))
+    """
+    primera = clave = None
+    detalles = []
+    for numero_fila, (clave_fila, detalle) in filas:
+        if clave_fila != clave:
+            if detalles:
+                yield primera, (clave[0], clave[2], tuple(detalles))
+            primera, clave, detalles = numero_fila, clave_fila, []
+        detalles.append(detalle)
+    if detalles:
+        yield primera, (clave[0], clave[2], tuple(detalles))
+
 
 class CSVImporter:
     def __init__(self):
         self.db = get_db_manager()
+    
+    def _importar(self, csv_path: str, validar, columnas: tuple, delimitador: str, inicio: int,
+                  procesos, guardar, solo_validar: bool = False) -> tuple:
+        """
+        Lee y valida el archivo (en paralelo si es grande) y guarda las filas
+        válidas con `guardar` conforme llegan, en el orden del archivo
         
-    def import_users_from_csv(self, csv_path: str) -> tuple:
+        Returns:
+            tuple: (importados, errores) con los errores ordenados por fila
+        """
+        if not isinstance(self.db, DatabaseManager):
+            if solo_validar:
+                return 0, ["La validación sin guardar necesita la base de datos local "
+                           "(no está disponible con el servicio HTTP)"]
+            # El servicio confirma cada fila al guardarla: si la lectura en
+            # paralelo encontrara un campo multilínea a la mitad, no se podría
+            # volver a empezar sin duplicar lo ya guardado
+            procesos = 1
+        
+        errores_lectura = []
+        try:
+            resultado = guardar(leer_filas(csv_path, validar, columnas, delimitador, inicio,
+                                           procesos, errores_lectura))
+        except CampoMultilinea:
+            # Solo la lectura en un proceso entiende campos con saltos de línea;
+            # lo que se alcanzó a guardar se descartó con la transacción (solo
+            # se llega aquí con la base local)
+            errores_lectura = []
+            resultado = guardar(leer_filas(csv_path, validar, columnas, delimitador, inicio,
+                                           1, errores_lectura))
+        
+        if resultado is None:
+            return 0, ["Error al guardar en la base de datos; no se importó ninguna fila"]
+        
+        importados, errores = resultado
+        return importados, [f"Fila {fila}: {mensaje}" for fila, mensaje in sorted(errores_lectura + errores)]
+    
+    def _columnas_usuarios(self, csv_path: str) -> Optional[tuple]:
+        """
+        Lee el encabezado de un archivo de usuarios
+        
+        Returns:
+            tuple: (índices de numero, nombre, direccion, telefono, email;
+                    delimitador; inicio de los datos), None si faltan número o nombre
+        """
+        encabezado, delimitador, inicio = leer_encabezado(csv_path)
+        
+        # Obtener los índices reales de las columnas
+        columns = [col.lower().strip() for col in encabezado]
+        mapped_fields = {}
+        
+        for field, possible_names in CSV_COLUMN_MAPPING.items():
+            for possible in possible_names:
+                if possible in columns:
+                    mapped_fields[field] = columns.index(possible)
+                    break
+        
+        # Verificar que al menos tengamos número y nombre
+        if 'numero' not in mapped_fields or 'nombre' not in mapped_fields:
+            return None
+        
+        columnas = tuple(mapped_fields.get(field) for field in
+                         ('numero', 'nombre', 'direccion', 'telefono', 'email'))
+        return columnas, delimitador, inicio
+    
+    def import_users_from_csv(self, csv_path: str, procesos: Optional[int] = None,
+                              validar: bool = False) -> tuple:
         """
         Importa usuarios desde un archivo CSV
         
+        Los usuarios se guardan en una sola transacción; los archivos grandes
+        se leen en varios procesos (ver csv_parallel.py).
+        
         Args:
             csv_path: Ruta al archivo CSV
+            procesos: Procesos de lectura (por omisión, según el tamaño del archivo)
+            validar: Solo revisar todo el archivo (tipos, repetidos, números
+                     existentes o desconocidos) sin guardar nada; se
+                     devuelve lo que se importaría y todos los errores
             
         Returns:
             tuple: (usuarios_importados, errores)
@@ -28,83 +244,120 @@ class CSVImporter:
         if not os.path.exists(csv_path):
             return 0, ["Archivo no encontrado"]
         
-        usuarios_importados = 0
-        errores = []
-        
         try:
-            with open(csv_path, 'r', encoding='utf-8', newline='') as file:
-                # Intentar detectar el delimitador
-                sample = file.read(1024)
-                file.seek(0)
-                sniffer = csv.Sniffer()
-                delimiter = sniffer.sniff(sample).delimiter
-                
-                reader = csv.DictReader(file, delimiter=delimiter)
-                
-                # Mapear nombres de columnas comunes
-                field_mapping = {
-                    'numero': ['numero', 'num', 'number', 'id'],
-                    'nombre': ['nombre', 'name', 'usuario', 'user'],
-                    'direccion': ['direccion', 'address', 'domicilio', 'dir'],
-                    'telefono': ['telefono', 'phone', 'tel', 'celular'],
-                    'email': ['email', 'correo', 'mail', 'e-mail']
-                }
-                
-                # Obtener los nombres reales de las columnas
-                columns = [col.lower().strip() for col in reader.fieldnames]
-                mapped_fields = {}
-                
-                for field, possible_names in field_mapping.items():
-                    for possible in possible_names:
-                        if possible in columns:
-                            mapped_fields[field] = reader.fieldnames[columns.index(possible)]
-                            break
-                
-                # Verificar que al menos tengamos número y nombre
-                if 'numero' not in mapped_fields or 'nombre' not in mapped_fields:
-                    return 0, ["El archivo CSV debe contener al menos las columnas 'numero' y 'nombre'"]
-                
-                for row_num, row in enumerate(reader, start=2):  # Empezar en 2 por el header
-                    try:
-                        # Extraer datos
-                        numero_str = str(row.get(mapped_fields['numero'], '')).strip()
-                        nombre = str(row.get(mapped_fields['nombre'], '')).strip()
-                        direccion = str(row.get(mapped_fields.get('direccion', ''), '')).strip()
-                        telefono = str(row.get(mapped_fields.get('telefono', ''), '')).strip()
-                        email = str(row.get(mapped_fields.get('email', ''), '')).strip()
-                        
-                        # Validar datos obligatorios
-                        if not numero_str or not nombre:
-                            errores.append(f"Fila {row_num}: Número y nombre son obligatorios")
-                            continue
-                        
-                        try:
-                            numero = int(numero_str)
-                        except ValueError:
-                            errores.append(f"Fila {row_num}: Número '{numero_str}' no es válido")
-                            continue
-                        
-                        # Intentar crear el usuario
-                        if self.db.crear_usuario(numero, nombre, direccion, telefono, email):
-                            usuarios_importados += 1
-                        else:
-                            errores.append(f"Fila {row_num}: Ya existe un usuario con el número {numero}")
-                            
-                    except Exception as e:
-                        errores.append(f"Fila {row_num}: Error al procesar - {str(e)}")
-                        
+            encabezado = self._columnas_usuarios(csv_path)
+            if encabezado is None:
+                return 0, [COLUMNAS_USUARIOS_FALTANTES]
+            
+            columnas, delimitador, inicio = encabezado
+            return self._importar(csv_path, _validar_usuario, columnas, delimitador, inicio, procesos,
+                                  lambda filas: self._guardar_usuarios(filas, validar), validar)
+            
         except Exception as e:
-            errores.append(f"Error al leer el archivo CSV: {str(e)}")
+            return 0, [f"Error al leer el archivo CSV: {str(e)}"]
+    
+    def _guardar_usuarios(self, filas, validar: bool = False) -> Optional[tuple]:
+        if hasattr(self.db, 'crear_usuarios_lote'):
+            return self.db.crear_usuarios_lote(filas, solo_validar=validar)
+        
+        # Cliente del servicio HTTP: uno por uno
+        creados, errores = 0, []
+        for fila, usuario in filas:
+            if self.db.crear_usuario(*usuario):
+                creados += 1
+            else:
+                errores.append((fila, f"Ya existe un usuario con el número {usuario[0]}"))
+        return creados, errores
+    
+    def upsert_users_from_csv(self, csv_path: str, procesos: Optional[int] = None,
+                              validar: bool = False) -> tuple:
+        """
+        Actualiza el padrón desde un archivo CSV: crea los usuarios nuevos y
+        actualiza los datos de los existentes (ver actualizar_usuarios_lote)
+        
+        Solo se escriben las columnas que trae el archivo, y una celda vacía
+        no borra el dato que ya existe.
+        
+        Args:
+            csv_path: Ruta al archivo CSV
+            procesos: Procesos de lectura (por omisión, según el tamaño del archivo)
+            validar: Solo revisar todo el archivo (tipos, repetidos, números
+                     existentes o desconocidos) sin guardar nada; se
+                     devuelve lo que se importaría y todos los errores
+            
+        Returns:
+            tuple: ({'insertados', 'actualizados', 'sin_cambios'}, errores)
+        """
+        vacio = {'insertados': 0, 'actualizados': 0, 'sin_cambios': 0}
+        if not os.path.exists(csv_path):
+            return vacio, ["Archivo no encontrado"]
         
-        return usuarios_importados, errores
+        try:
+            encabezado = self._columnas_usuarios(csv_path)
+            if encabezado is None:
+                return vacio, [COLUMNAS_USUARIOS_FALTANTES]
+            
+            columnas, delimitador, inicio = encabezado
+            presentes = [campo for campo, indice in zip(('direccion', 'telefono', 'email'), columnas[2:])
+                         if indice is not None]
+            resumen, errores = self._importar(csv_path, _validar_usuario, columnas, delimitador, inicio, procesos,
+                                              lambda filas: self._actualizar_usuarios(filas, presentes, validar),
+                                              validar)
+            return resumen or vacio, errores
+            
+        except Exception as e:
+            return vacio, [f"Error al leer el archivo CSV: {str(e)}"]
     
-    def import_payments_from_csv(self, csv_path: str, year: int) -> tuple:
+    def _actualizar_usuarios(self, filas, columnas: list, validar: bool = False) -> Optional[tuple]:
+        if hasattr(self.db, 'actualizar_usuarios_lote'):
+            return self.db.actualizar_usuarios_lote(filas, columnas, solo_validar=validar)
+        
+        # Cliente del servicio HTTP: uno por uno
+        resumen, errores = {'insertados': 0, 'actualizados': 0, 'sin_cambios': 0}, []
+        for fila, (numero, nombre, *opcionales) in filas:
+            usuario = self.db.buscar_usuario_por_numero(numero)
+            if not usuario:
+                if self.db.crear_usuario(numero, nombre, *opcionales):
+                    resumen['insertados'] += 1
+                else:
+                    errores.append((fila, f"No se pudo crear el usuario {numero}"))
+                continue
+            
+            datos = {'nombre': nombre}
+            datos.update((campo, valor) for campo, valor in zip(('direccion', 'telefono', 'email'), opcionales)
+                         if campo in columnas and valor)
+            cambios = {campo: valor for campo, valor in datos.items() if usuario[campo] != valor}
+            if not cambios:
+                resumen['sin_cambios'] += 1
+            elif self.db.actualizar_usuario(usuario['id'], **cambios):
+                resumen['actualizados'] += 1
+            else:
+                errores.append((fila, f"No se pudo actualizar el usuario {numero}"))
+        return resumen, errores
+    
+    def import_payments_from_csv(self, csv_path: str, year: Optional[int] = None,
+                                 procesos: Optional[int] = None, validar: bool = False) -> tuple:
         """
         Importa pagos desde un archivo CSV
         
+        Formatos aceptados, todos leídos en una sola pasada:
+            - Una columna por mes ('1', 'mes_1', 'enero'...) de un año: `year`
+            - Una columna por año y mes ('2019-01', '2019-02'...): un pago
+              por fila, aunque cubra varios años
+            - Formato largo, una fila por mes o concepto (numero, anio, mes,
+              concepto, monto y opcionalmente fecha y folio): las filas
+              seguidas del mismo usuario, folio y fecha son un solo pago
+        
+        Los pagos se guardan en una sola transacción; los archivos grandes se
+        leen en varios procesos (ver csv_parallel.py).
+        
         Args:
             csv_path: Ruta al archivo CSV
-            year: Año de los pagos
+            year: Año de los pagos (solo para columnas por mes sin año)
+            procesos: Procesos de lectura (por omisión, según el tamaño del archivo)
+            validar: Solo revisar todo el archivo (tipos, repetidos, números
+                     existentes o desconocidos) sin guardar nada; se
+                     devuelve lo que se importaría y todos los errores
             
         Returns:
             tuple: (pagos_importados, errores)
@@ -112,87 +365,110 @@ class CSVImporter:
         if not os.path.exists(csv_path):
             return 0, ["Archivo no encontrado"]
         
-        pagos_importados = 0
-        errores = []
-        
         try:
-            with open(csv_path, 'r', encoding='utf-8', newline='') as file:
-                reader = csv.DictReader(file)
-                columns = [col.lower().strip() for col in reader.fieldnames]
-                
-                # Buscar columna de número de usuario
-                numero_col = None
-                for col in reader.fieldnames:
-                    if col.lower().strip() in ['numero', 'num', 'usuario', 'id']:
-                        numero_col = col
-                        break
-                
-                if not numero_col:
-                    return 0, ["No se encontró columna de número de usuario"]
-                
-                # Buscar columnas de meses (1-12)
-                month_cols = {}
-                for i in range(1, 13):
-                    for col in reader.fieldnames:
-                        col_lower = col.lower().strip()
-                        if (str(i) in col_lower and any(word in col_lower for word in ['mes', 'month', str(i)])) or \
-                           col_lower == str(i):
-                            month_cols[i] = col
-                            break
-                
-                for row_num, row in enumerate(reader, start=2):
-                    try:
-                        # Obtener número de usuario
-                        numero_str = str(row.get(numero_col, '')).strip()
-                        if not numero_str:
-                            errores.append(f"Fila {row_num}: Número de usuario vacío")
-                            continue
-                        
-                        try:
-                            numero = int(numero_str)
-                        except ValueError:
-                            errores.append(f"Fila {row_num}: Número '{numero_str}' no es válido")
-                            continue
-                        
-                        # Buscar el usuario
-                        usuario = self.db.buscar_usuario_por_numero(numero)
-                        if not usuario:
-                            errores.append(f"Fila {row_num}: No existe usuario con número {numero}")
-                            continue
-                        
-                        # Identificar meses pagados
-                        meses_pagados = []
-                        for mes, col in month_cols.items():
-                            valor = str(row.get(col, '')).strip().lower()
-                            # Considerar como pagado si hay un valor que indique pago
-                            if valor and valor not in ['0', 'no', 'false', '', 'n']:
-                                meses_pagados.append(mes)
-                        
-                        if meses_pagados:
-                            # Registrar el pago
-                            pago_id = self.db.registrar_pago(
-                                usuario_id=usuario['id'],
-                                meses_pagados=meses_pagados,
-                                anio=year,
-                                observaciones=f"Importado desde CSV: {os.path.basename(csv_path)}"
-                            )
-                            
-                            if pago_id > 0:
-                                pagos_importados += 1
-                            else:
-                                errores.append(f"Fila {row_num}: Error al registrar pago para usuario {numero}")
-                        
-                    except Exception as e:
-                        errores.append(f"Fila {row_num}: Error al procesar - {str(e)}")
-                        
+            encabezado, delimitador, inicio = leer_encabezado(csv_path, ',')
+            columns = [col.lower().strip() for col in encabezado]
+            
+            indices = {}
+            for campo, nombres in CSV_PAYMENT_COLUMN_MAPPING.items():
+                indices[campo] = next((i for i, col in enumerate(columns) if col in nombres), None)
+            
+            numero_col = indices['numero']
+            if numero_col is None:
+                return 0, ["No se encontró columna de número de usuario"]
+            
+            observaciones = f"Importado desde CSV: {os.path.basename(csv_path)}"
+            
+            if indices['anio'] is not None:
+                if indices['mes'] is None and indices['concepto'] is None:
+                    return 0, ["El formato largo necesita la columna mes o concepto"]
+                return self._importar(csv_path, _validar_pago_largo, tuple(indices.values()),
+                                      delimitador, inicio, procesos,
+                                      lambda filas: self._guardar_pagos(_agrupar_pagos(filas), observaciones,
+                                                                        validar), validar)
+            
+            # Columnas año-mes; si no hay, columnas de mes del año indicado.
+            # Si dos columnas son del mismo mes cuenta la primera
+            month_cols = {}
+            for i, col_lower in enumerate(columns):
+                coincidencia = _ANIO_MES.fullmatch(col_lower)
+                if coincidencia and 1 <= int(coincidencia.group(2)) <= 12:
+                    month_cols.setdefault((int(coincidencia.group(1)), int(coincidencia.group(2))), i)
+            
+            if not month_cols:
+                if year is None:
+                    return 0, ["Indique el año: el archivo no tiene columnas de año y mes (2019-01) "
+                               "ni columna anio"]
+                for i, col_lower in enumerate(columns):
+                    mes = _mes(col_lower) if i != numero_col else None
+                    if mes:
+                        month_cols.setdefault((year, mes), i)
+            
+            if not month_cols:
+                return 0, ["No se encontraron columnas de meses"]
+            
+            return self._importar(csv_path, _validar_pago,
+                                  (numero_col, tuple((anio, mes, i) for (anio, mes), i in month_cols.items())),
+                                  delimitador, inicio, procesos,
+                                  lambda pagos: self._guardar_pagos(pagos, observaciones, validar), validar)
+            
         except Exception as e:
-            errores.append(f"Error al leer el archivo CSV: {str(e)}")
-        
-        return pagos_importados, errores
+            return 0, [f"Error al leer el archivo CSV: {str(e)}"]
+    
+    def _guardar_pagos(self, pagos, observaciones: str, validar: bool = False) -> Optional[tuple]:
+        if hasattr(self.db, 'registrar_pagos_lote'):
+            return self.db.registrar_pagos_lote(pagos, observaciones, solo_validar=validar)
+        
+        # Cliente del servicio HTTP: uno por uno, un pago por año (la fecha
+        # del archivo no se puede indicar y queda la del registro)
+        registrados, errores = 0, []
+        conceptos_cobro = None
+        for fila, (numero, fecha, detalles) in pagos:
+            usuario = self.db.buscar_usuario_por_numero(numero)
+            if not usuario:
+                errores.append((fila, f"No existe usuario con número {numero}"))
+                continue
+            
+            por_anio, desconocidos = {}, []
+            for anio, mes, concepto, monto in detalles:
+                meses, conceptos = por_anio.setdefault(anio, ([], []))
+                if concepto is None:
+                    meses.append(mes)
+                    continue
+                if monto is None:
+                    if conceptos_cobro is None:
+                        conceptos_cobro = {c['nombre'].lower(): (c['nombre'], c['precio'])
+                                           for c in self.db.obtener_conceptos_cobro(solo_activos=False)}
+                    if concepto.lower() not in conceptos_cobro:
+                        desconocidos.append(concepto)
+                        continue
+                    concepto, monto = conceptos_cobro[concepto.lower()]
+                conceptos.append((concepto, monto))
+            
+            if desconocidos:
+                errores.append((fila, f"Concepto sin monto ni precio registrado: {', '.join(desconocidos)}"))
+                continue
+            
+            try:
+                for anio, (meses, conceptos) in sorted(por_anio.items()):
+                    if self.db.registrar_pago(usuario_id=usuario['id'], meses_pagados=meses, anio=anio,
+                                              conceptos_adicionales=conceptos,
+                                              observaciones=observaciones) <= 0:
+                        errores.append((fila, f"Error al registrar pago para usuario {numero}"))
+                        break
+                else:
+                    registrados += 1
+            except MesesYaPagadosError as e:
+                errores.append((fila, f"Usuario {numero}: {e}"))
+        return registrados, errores
 
 
 class ImporterGUI:
     def __init__(self):
+        global tk, messagebox, filedialog
+        import tkinter as tk
+        from tkinter import messagebox, filedialog
+        
         self.root = tk.Tk()
         self.root.title("Importador de Datos CSV")
         self.root.geometry("600x500")
@@ -226,6 +502,15 @@ class ImporterGUI:
         # Sección importar pagos
         self.create_payments_import_section(main_frame)
         
+        # Solo validar: revisar el archivo completo sin guardar nada
+        self.validate_only_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            main_frame,
+            text="Solo validar el archivo (no se guarda nada)",
+            variable=self.validate_only_var,
+            font=('Arial', 10)
+        ).pack(anchor='w', pady=(0, 10))
+        
         # Área de resultados
         self.create_results_area(main_frame)
         
@@ -267,6 +552,14 @@ class ImporterGUI:
             font=('Arial', 11, 'bold')
         )
         select_users_btn.pack(side=tk.LEFT)
+        
+        self.update_users_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            button_frame,
+            text="Actualizar los usuarios existentes",
+            variable=self.update_users_var,
+            font=('Arial', 10)
+        ).pack(side=tk.LEFT, padx=(15, 0))
     
     def create_payments_import_section(self, parent):
         """Crea la sección de importación de pagos"""
@@ -275,8 +568,9 @@ class ImporterGUI:
         
         info_label = tk.Label(
             payments_frame,
-            text="Seleccione un archivo CSV con pagos realizados.\n" +
-                 "Debe contener columnas: numero (usuario) y columnas para cada mes (1-12)",
+            text="Seleccione un archivo CSV con pagos realizados. Columnas: numero (usuario) y\n" +
+                 "una por mes (1-12, del año indicado), una por año y mes (2019-01, ...) o\n" +
+                 "una fila por mes o concepto: anio, mes, concepto, monto (fecha y folio opcionales)",
             font=('Arial', 10),
             fg='#7f8c8d',
             justify=tk.LEFT
@@ -287,7 +581,7 @@ class ImporterGUI:
         controls_frame.pack(fill=tk.X, padx=10, pady=10)
         
         # Selección de año
-        tk.Label(controls_frame, text="Año de los pagos:", font=('Arial', 10)).pack(side=tk.LEFT)
+        tk.Label(controls_frame, text="Año (columnas 1-12):", font=('Arial', 10)).pack(side=tk.LEFT)
         
         self.year_var = tk.StringVar(value="2024")
         year_entry = tk.Entry(controls_frame, textvariable=self.year_var, width=8, font=('Arial', 10))
@@ -336,17 +630,21 @@ class ImporterGUI:
         
         self.add_result(f"Importando usuarios desde: {os.path.basename(file_path)}")
         
+        validar = self.validate_only_var.get()
         try:
-            usuarios_importados, errores = self.importer.import_users_from_csv(file_path)
+            if self.update_users_var.get():
+                resumen, errores = self.importer.upsert_users_from_csv(file_path, validar=validar)
+                self.add_result(f"{'Validación: ' if validar else '✓ '}Usuarios nuevos: {resumen['insertados']}, "
+                                f"actualizados: {resumen['actualizados']}, "
+                                f"sin cambios: {resumen['sin_cambios']}")
+            else:
+                usuarios_importados, errores = self.importer.import_users_from_csv(file_path, validar=validar)
+                if validar:
+                    self.add_result(f"Validación: se importarían {usuarios_importados} usuarios")
+                else:
+                    self.add_result(f"✓ Usuarios importados exitosamente: {usuarios_importados}")
             
-            self.add_result(f"✓ Usuarios importados exitosamente: {usuarios_importados}")
-            
-            if errores:
-                self.add_result(f"⚠ Errores encontrados ({len(errores)}):")
-                for error in errores[:10]:  # Mostrar máximo 10 errores
-                    self.add_result(f"  • {error}")
-                if len(errores) > 10:
-                    self.add_result(f"  ... y {len(errores) - 10} errores más")
+            self.add_errors(errores, validar)
             
             self.add_result("-" * 50)
             
@@ -355,13 +653,10 @@ class ImporterGUI:
     
     def import_payments(self):
         """Importa pagos desde CSV"""
+        # El año solo hace falta en archivos con columnas de mes sin año
         year_str = self.year_var.get().strip()
-        if not year_str:
-            messagebox.showwarning("Año requerido", "Ingrese el año de los pagos")
-            return
-        
         try:
-            year = int(year_str)
+            year = int(year_str) if year_str else None
         except ValueError:
             messagebox.showwarning("Año inválido", "Ingrese un año válido")
             return
@@ -374,25 +669,38 @@ class ImporterGUI:
         if not file_path:
             return
         
-        self.add_result(f"Importando pagos desde: {os.path.basename(file_path)} (Año: {year})")
+        self.add_result(f"Importando pagos desde: {os.path.basename(file_path)}"
+                        + (f" (Año: {year})" if year else ""))
         
+        validar = self.validate_only_var.get()
         try:
-            pagos_importados, errores = self.importer.import_payments_from_csv(file_path, year)
+            pagos_importados, errores = self.importer.import_payments_from_csv(file_path, year, validar=validar)
             
-            self.add_result(f"✓ Pagos importados exitosamente: {pagos_importados}")
+            if validar:
+                self.add_result(f"Validación: se importarían {pagos_importados} pagos")
+            else:
+                self.add_result(f"✓ Pagos importados exitosamente: {pagos_importados}")
             
-            if errores:
-                self.add_result(f"⚠ Errores encontrados ({len(errores)}):")
-                for error in errores[:10]:  # Mostrar máximo 10 errores
-                    self.add_result(f"  • {error}")
-                if len(errores) > 10:
-                    self.add_result(f"  ... y {len(errores) - 10} errores más")
+            self.add_errors(errores, validar)
             
             self.add_result("-" * 50)
             
         except Exception as e:
             self.add_result(f"✗ Error al importar pagos: {str(e)}")
     
+    def add_errors(self, errores, todos: bool = False):
+        """Agrega los errores al área de resultados (máximo 10 salvo con `todos`)"""
+        if not errores:
+            if todos:
+                self.add_result("✓ Sin errores")
+            return
+        
+        mostrados = errores if todos else errores[:10]
+        self.add_result(f"⚠ Errores encontrados ({len(errores)}):")
+        self.add_result('\n'.join(f"  • {error}" for error in mostrados))
+        if len(errores) > len(mostrados):
+            self.add_result(f"  ... y {len(errores) - len(mostrados)} errores más")
+    
     def add_result(self, text):
         """Agrega texto al área de resultados"""
         self.results_text.config(state=tk.NORMAL)
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lectura de archivos CSV grandes en varios procesos
+
+El archivo se divide en rangos de bytes que terminan en un salto de línea.
+Cada proceso lee su rango, separa los campos y valida cada fila con la
+función del importador, y devuelve tuplas compactas junto con los errores
+(con el número de línea dentro del rango). Los resultados se reciben en el
+orden del archivo: quien escribe en la base (uno solo) inserta en ese orden
+y los números de fila de los errores son las líneas reales del archivo.
+
+Como los rangos se cortan por líneas, un campo entre comillas con saltos de
+línea no se puede leer así: si una línea deja comillas sin cerrar se lanza
+CampoMultilinea y el importador vuelve a leer el archivo en un solo proceso,
+donde el módulo csv sí los entiende.
+
+Uso:
+    columnas, delimitador, inicio = leer_encabezado(ruta)
+    errores = []
+    for fila, datos in leer_filas(ruta, validar, indices, delimitador, inicio, None, errores):
+        ...
+"""
+
+import csv
+import io
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from config.settings import CSV_CHUNK_BYTES, CSV_PARALLEL_MIN_BYTES
+
+# validar(campos, columnas) -> tupla, o None si la fila no tiene nada que
+# importar; ValueError con el mensaje si la fila no es válida
+Validador = Callable[[List[str], tuple], Optional[tuple]]
+
+
+class CampoMultilinea(Exception):
+    """Una línea deja comillas sin cerrar: el campo sigue en la línea siguiente"""
+
+
+def leer_encabezado(ruta: str, delimitador: str = None) -> Tuple[List[str], str, int]:
+    """
+    Lee la primera línea del archivo
+
+    Args:
+        ruta: Archivo CSV (UTF-8, con o sin BOM)
+        delimitador: Separador de campos; si se omite se detecta con csv.Sniffer
+
+    Returns:
+        tuple: (columnas, delimitador, posición en bytes donde empiezan los datos)
+    """
+    with open(ruta, 'rb') as f:
+        primera = f.readline()
+        inicio = f.tell()
+        muestra = primera + f.read(1024)
+
+    if delimitador is None:
+        try:
+            delimitador = csv.Sniffer().sniff(muestra.decode('utf-8-sig', errors='ignore')).delimiter
+        except csv.Error:
+            delimitador = ','
+
+    columnas = next(csv.reader([primera.decode('utf-8-sig').rstrip('\r\n')], delimiter=delimitador), [])
+    return columnas, delimitador, inicio
+
+
+def dividir_en_rangos(ruta: str, inicio: int, tamano: int = CSV_CHUNK_BYTES) -> List[Tuple[int, int]]:
+    """Rangos [inicio, fin) de unos `tamano` bytes que terminan al final de una línea"""
+    fin_archivo = os.path.getsize(ruta)
+    rangos = []
+    with open(ruta, 'rb') as f:
+        while inicio < fin_archivo:
+            f.seek(min(inicio + tamano, fin_archivo))
+            f.readline()  # Completar la línea en curso
+            fin = min(f.tell(), fin_archivo)
+            rangos.append((inicio, fin))
+            inicio = fin
+    return rangos
+
+
+def _leer_rango(ruta: str, inicio: int, fin: int, delimitador: str, validar: Validador,
+                columnas: tuple) -> Tuple[int, list, list]:
+    """
+    Trabajo de cada proceso: lee y valida las líneas de un rango
+
+    Returns:
+        tuple: (saltos de línea del rango, [(linea, datos)], [(linea, mensaje)])
+               con `linea` contada desde el inicio del rango
+    """
+    with open(ruta, 'rb') as f:
+        f.seek(inicio)
+        datos = f.read(fin - inicio)
+    lineas = datos.decode('utf-8').split('\n')
+
+    if b'"' in datos:
+        for i, linea in enumerate(lineas):
+            if linea.count('"') % 2:
+                raise CampoMultilinea(f"línea {i + 1} del rango {inicio}-{fin}")
+
+    # Sin comillas abiertas, csv.reader devuelve exactamente una fila por línea
+    filas, errores = [], []
+    for i, campos in enumerate(csv.reader(lineas, delimiter=delimitador)):
+        if not campos:
+            continue  # Línea vacía
+        try:
+            fila = validar(campos, columnas)
+        except ValueError as e:
+            errores.append((i, str(e)))
+            continue
+        if fila is not None:
+            filas.append((i, fila))
+
+    return datos.count(b'\n'), filas, errores
+
+
+def _leer_secuencial(ruta: str, inicio: int, delimitador: str, validar: Validador, columnas: tuple,
+                     errores: list) -> Iterator[Tuple[int, tuple]]:
+    with open(ruta, 'rb') as binario:
+        binario.seek(inicio)
+        reader = csv.reader(io.TextIOWrapper(binario, encoding='utf-8', newline=''), delimiter=delimitador)
+        anterior = 0
+        for campos in reader:
+            # Línea donde empieza la fila (la 1 es el encabezado)
+            linea = anterior + 2
+            anterior = reader.line_num
+            if not campos:
+                continue
+            try:
+                fila = validar(campos, columnas)
+            except ValueError as e:
+                errores.append((linea, str(e)))
+                continue
+            if fila is not None:
+                yield linea, fila
+
+
+def leer_filas(ruta: str, validar: Validador, columnas: tuple, delimitador: str, inicio: int,
+               procesos: Optional[int], errores: list) -> Iterator[Tuple[int, tuple]]:
+    """
+    Genera las filas válidas del archivo en orden
+
+    Args:
+        ruta: Archivo CSV
+        validar: Función de validación (debe poder importarse desde otro proceso)
+        columnas: Argumento que recibe `validar` (índices de columna, etc.)
+        delimitador, inicio: Los que devuelve leer_encabezado
+        procesos: Procesos de lectura; None para usar todos los núcleos si el
+                  archivo pasa de CSV_PARALLEL_MIN_BYTES, 1 para no usar procesos
+        errores: Lista donde se agregan (numero_fila, mensaje) al avanzar
+
+    Yields:
+        tuple: (numero_fila, datos) con numero_fila = línea del archivo
+
+    Raises:
+        CampoMultilinea: Hay un campo con saltos de línea y procesos != 1
+    """
+    if procesos is None:
+        procesos = (os.cpu_count() or 1) if os.path.getsize(ruta) >= CSV_PARALLEL_MIN_BYTES else 1
+
+    rangos = dividir_en_rangos(ruta, inicio) if procesos > 1 else []
+    if len(rangos) < 2:
+        yield from _leer_secuencial(ruta, inicio, delimitador, validar, columnas, errores)
+        return
+
+    # spawn: el proceso principal puede tener Tkinter abierto
+    contexto = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(min(procesos, len(rangos)), mp_context=contexto) as pool:
+        pendientes = deque()
+        rangos = iter(rangos)
+
+        def enviar():
+            rango = next(rangos, None)
+            if rango is not None:
+                pendientes.append(pool.submit(_leer_rango, ruta, *rango, delimitador, validar, columnas))
+
+        # Como mucho dos rangos leídos por proceso esperando a quien escribe
+        for _ in range(procesos * 2):
+            enviar()
+
+        linea = 2
+        while pendientes:
+            saltos, filas, errores_rango = pendientes.popleft().result()
+            enviar()
+            errores.extend((linea + i, mensaje) for i, mensaje in errores_rango)
+            for i, fila in filas:
+                yield linea + i, fila
+            linea += saltos
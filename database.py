@@ -4,10 +4,86 @@
 Módulo de gestión de base de datos SQLite para el sistema de agua potable
 """
 
+import json
 import sqlite3
 import os
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+from typing import Callable, Iterable, List, Dict, Optional, Tuple
+from records import Usuario, Pago, DetallePago, Concepto, record_factory
+from migrations import ESQUEMA_VERSION, aplicar_migraciones
+import query_stats
+from tarifas import limpiar_cache as limpiar_tarifas, tarifas_vigentes
+from config.settings import API_SERVER_URL, MONTH_NAMES
+
+# Tablas y columnas mínimas que debe tener una base de datos válida
+TABLAS_REQUERIDAS = {
+    'usuarios': ('id', 'numero', 'nombre', 'direccion', 'telefono', 'email', 'estado'),
+    'configuracion': ('clave', 'valor'),
+    'conceptos_cobro': ('id', 'nombre', 'precio', 'activo'),
+    'pagos': ('id', 'usuario_id', 'fecha_pago', 'total', 'observaciones'),
+    'detalle_pagos': ('id', 'pago_id', 'concepto', 'mes', 'anio', 'precio', 'cantidad'),
+}
+
+# Filas por executemany en las importaciones en bloque
+LOTE_IMPORTACION = 5000
+
+class MesesYaPagadosError(Exception):
+    """Se intentó registrar una mensualidad que el usuario ya tiene pagada"""
+    
+    def __init__(self, anio: int, meses: List[int]):
+        self.anio = anio
+        self.meses = meses
+        nombres = ', '.join(MONTH_NAMES[mes] for mes in meses)
+        super().__init__(f"Meses ya pagados en {anio}: {nombres}")
+
+def condicion_usuarios(filtro: Dict) -> Tuple[str, list]:
+    """
+    Convierte un filtro de usuarios en una condición SQL sobre el alias u
+    
+    Args:
+        filtro: Claves opcionales:
+            estado: 'Activo' o 'Cancelado'
+            nombre: Búsqueda parcial por nombre
+            numero_desde, numero_hasta: Rango de números de usuario
+            ids: Lista de IDs de usuario
+            sin_pagos_desde: Fecha 'AAAA-MM-DD'; solo usuarios sin pagos
+                             desde esa fecha
+            
+    Returns:
+        Tuple[str, list]: (condición para WHERE, parámetros)
+    """
+    condiciones = []
+    parametros = []
+    
+    if filtro.get('estado'):
+        condiciones.append('u.estado = ?')
+        parametros.append(filtro['estado'])
+    
+    if filtro.get('nombre'):
+        condiciones.append('u.nombre LIKE ?')
+        parametros.append(f"%{filtro['nombre']}%")
+    
+    if filtro.get('numero_desde') is not None:
+        condiciones.append('u.numero >= ?')
+        parametros.append(filtro['numero_desde'])
+    
+    if filtro.get('numero_hasta') is not None:
+        condiciones.append('u.numero <= ?')
+        parametros.append(filtro['numero_hasta'])
+    
+    if filtro.get('ids') is not None:
+        # json_each evita armar una consulta con miles de parámetros
+        condiciones.append('u.id IN (SELECT value FROM json_each(?))')
+        parametros.append(json.dumps([int(i) for i in filtro['ids']]))
+    
+    if filtro.get('sin_pagos_desde'):
+        condiciones.append('''NOT EXISTS (
+            SELECT 1 FROM pagos p
+            WHERE p.usuario_id = u.id AND p.fecha_pago >= ?
+        )''')
+        parametros.append(filtro['sin_pagos_desde'])
+    
+    return (' AND '.join(condiciones) or '1'), parametros
 
 class DatabaseManager:
     def __init__(self, db_path: str = "agua_potable.db"):
@@ -22,110 +98,14 @@ class DatabaseManager:
     
     def get_connection(self) -> sqlite3.Connection:
         """Obtiene una conexión a la base de datos"""
-        conn = sqlite3.connect(self.db_path)
+        # query_stats cambia la fábrica solo si la medición de consultas está activa
+        conn = sqlite3.connect(self.db_path, factory=query_stats.FABRICA_CONEXION)
         conn.row_factory = sqlite3.Row  # Para obtener resultados como diccionarios
         return conn
     
     def init_database(self):
-        """Inicializa las tablas de la base de datos"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        try:
-            # Tabla de usuarios
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS usuarios (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    numero INTEGER UNIQUE NOT NULL,
-                    nombre TEXT NOT NULL,
-                    direccion TEXT,
-                    telefono TEXT,
-                    email TEXT,
-                    estado TEXT DEFAULT 'Activo' CHECK (estado IN ('Activo', 'Cancelado')),
-                    fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Tabla de configuración del sistema
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS configuracion (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    clave TEXT UNIQUE NOT NULL,
-                    valor TEXT NOT NULL,
-                    descripcion TEXT,
-                    fecha_modificacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Tabla de conceptos de cobro
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS conceptos_cobro (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nombre TEXT UNIQUE NOT NULL,
-                    precio REAL NOT NULL,
-                    activo BOOLEAN DEFAULT 1,
-                    fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Tabla de pagos
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS pagos (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    usuario_id INTEGER NOT NULL,
-                    fecha_pago TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    total REAL NOT NULL,
-                    observaciones TEXT,
-                    FOREIGN KEY (usuario_id) REFERENCES usuarios (id)
-                )
-            ''')
-            
-            # Tabla detalle de pagos (mensualidades y otros conceptos)
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS detalle_pagos (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    pago_id INTEGER NOT NULL,
-                    concepto TEXT NOT NULL,
-                    mes INTEGER NULL,  -- NULL para conceptos que no son mensualidades
-                    anio INTEGER NOT NULL,
-                    precio REAL NOT NULL,
-                    cantidad INTEGER DEFAULT 1,
-                    FOREIGN KEY (pago_id) REFERENCES pagos (id)
-                )
-            ''')
-            
-            # Insertar configuración inicial si no existe
-            cursor.execute('''
-                INSERT OR IGNORE INTO configuracion (clave, valor, descripcion)
-                VALUES ('cuota_mensual', '50.0', 'Cuota mensual del servicio de agua')
-            ''')
-            
-            cursor.execute('''
-                INSERT OR IGNORE INTO configuracion (clave, valor, descripcion)
-                VALUES ('pin_acceso', '1234', 'PIN de acceso al sistema')
-            ''')
-            
-            # Insertar algunos conceptos de cobro predeterminados
-            conceptos_default = [
-                ('Cooperación Anual', 100.0),
-                ('Toma Nueva', 500.0),
-                ('Multa por Inasistencia', 25.0),
-                ('Multa por Desperdicio', 75.0),
-            ]
-            
-            for concepto, precio in conceptos_default:
-                cursor.execute('''
-                    INSERT OR IGNORE INTO conceptos_cobro (nombre, precio)
-                    VALUES (?, ?)
-                ''', (concepto, precio))
-            
-            conn.commit()
-            
-        except sqlite3.Error as e:
-            print(f"Error al inicializar la base de datos: {e}")
-            conn.rollback()
-        finally:
-            conn.close()
+        """Crea o actualiza el esquema (ver migrations.py)"""
+        aplicar_migraciones(self.db_path)
     
     # === GESTIÓN DE USUARIOS ===
     
@@ -171,22 +151,23 @@ class DatabaseManager:
         finally:
             conn.close()
     
-    def buscar_usuario_por_numero(self, numero: int) -> Optional[Dict]:
+    def buscar_usuario_por_numero(self, numero: int) -> Optional[Usuario]:
         """Busca un usuario por su número"""
         conn = self.get_connection()
         cursor = conn.cursor()
+        cursor.row_factory = record_factory(Usuario)
         
         try:
             cursor.execute('SELECT * FROM usuarios WHERE numero = ?', (numero,))
-            row = cursor.fetchone()
-            return dict(row) if row else None
+            return cursor.fetchone()
         finally:
             conn.close()
     
-    def buscar_usuarios_por_nombre(self, nombre: str) -> List[Dict]:
+    def buscar_usuarios_por_nombre(self, nombre: str) -> List[Usuario]:
         """Busca usuarios por nombre (búsqueda parcial)"""
         conn = self.get_connection()
         cursor = conn.cursor()
+        cursor.row_factory = record_factory(Usuario)
         
         try:
             cursor.execute('''
@@ -194,8 +175,7 @@ class DatabaseManager:
                 WHERE nombre LIKE ? 
                 ORDER BY nombre
             ''', (f'%{nombre}%',))
-            rows = cursor.fetchall()
-            return [dict(row) for row in rows]
+            return cursor.fetchall()
         finally:
             conn.close()
     
@@ -232,10 +212,60 @@ class DatabaseManager:
             return False
         return self.actualizar_usuario(usuario_id, estado=estado)
     
-    def obtener_todos_usuarios(self, solo_activos: bool = False) -> List[Dict]:
+    def cambiar_estado_usuarios(self, estado: str, filtro: Dict = None, ids: List[int] = None,
+                                solo_vista_previa: bool = False) -> int:
+        """
+        Cambia el estado de varios usuarios con un solo UPDATE
+        
+        Args:
+            estado: Nuevo estado ('Activo' o 'Cancelado')
+            filtro: Filtro de usuarios (ver condicion_usuarios)
+            ids: IDs de usuario (se combinan con el filtro si se dan ambos)
+            solo_vista_previa: Solo contar cuántos usuarios cambiarían
+            
+        Returns:
+            int: Usuarios que cambiaron (o cambiarían) de estado, -1 si hay error
+        """
+        if estado not in ['Activo', 'Cancelado']:
+            return -1
+        
+        filtro = dict(filtro or {})
+        if ids is not None:
+            filtro['ids'] = ids
+        if not filtro:
+            return 0  # Sin filtro ni IDs no se cambia a todos por accidente
+        
+        condicion, parametros = condicion_usuarios(filtro)
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            if solo_vista_previa:
+                cursor.execute(f'''
+                    SELECT COUNT(*) FROM usuarios u
+                    WHERE u.estado != ? AND {condicion}
+                ''', [estado] + parametros)
+                return cursor.fetchone()[0]
+            
+            cursor.execute(f'''
+                UPDATE usuarios SET estado = ?
+                WHERE estado != ? AND id IN (SELECT u.id FROM usuarios u WHERE {condicion})
+            ''', [estado, estado] + parametros)
+            
+            conn.commit()
+            return cursor.rowcount
+        except sqlite3.Error as e:
+            print(f"Error al cambiar estado de usuarios: {e}")
+            conn.rollback()
+            return -1
+        finally:
+            conn.close()
+    
+    def obtener_todos_usuarios(self, solo_activos: bool = False) -> List[Usuario]:
         """Obtiene todos los usuarios"""
         conn = self.get_connection()
         cursor = conn.cursor()
+        cursor.row_factory = record_factory(Usuario)
         
         try:
             if solo_activos:
@@ -247,8 +277,7 @@ class DatabaseManager:
             else:
                 cursor.execute('SELECT * FROM usuarios ORDER BY numero')
             
-            rows = cursor.fetchall()
-            return [dict(row) for row in rows]
+            return cursor.fetchall()
         finally:
             conn.close()
     
@@ -265,11 +294,11 @@ class DatabaseManager:
         cursor = conn.cursor()
         
         try:
+            # Se resuelve con el índice único idx_detalle_pagos_mes_unico
             cursor.execute('''
-                SELECT DISTINCT mes 
-                FROM detalle_pagos dp
-                JOIN pagos p ON dp.pago_id = p.id
-                WHERE p.usuario_id = ? AND dp.anio = ? AND dp.mes IS NOT NULL
+                SELECT mes 
+                FROM detalle_pagos
+                WHERE usuario_id = ? AND anio = ? AND mes IS NOT NULL
                 ORDER BY mes
             ''', (usuario_id, anio))
             
@@ -284,6 +313,8 @@ class DatabaseManager:
         """
         Registra un pago completo
         
+        Cada mensualidad se cobra con la tarifa vigente en ese mes (ver tarifas.py).
+        
         Args:
             usuario_id: ID del usuario
             meses_pagados: Lista de meses pagados (1-12)
@@ -293,17 +324,22 @@ class DatabaseManager:
             
         Returns:
             int: ID del pago registrado, 0 si hay error
+            
+        Raises:
+            MesesYaPagadosError: Si alguno de los meses ya estaba pagado (no se
+                                 registra nada); indica todos los meses repetidos
         """
+        meses_pagados = sorted(set(meses_pagados))
         conn = self.get_connection()
         cursor = conn.cursor()
         
         try:
-            # Obtener la cuota mensual actual
-            cuota_mensual = self.obtener_configuracion('cuota_mensual')
-            cuota_mensual = float(cuota_mensual) if cuota_mensual else 50.0
+            # Cuota de cada mes según la tarifa vigente
+            tarifas = tarifas_vigentes(conn, self.db_path)
+            cuotas = {mes: tarifas.cuota(anio, mes) for mes in meses_pagados}
             
             # Calcular total
-            total = len(meses_pagados) * cuota_mensual
+            total = sum(cuotas.values())
             if conceptos_adicionales:
                 total += sum(precio for _, precio in conceptos_adicionales)
             
@@ -315,20 +351,31 @@ class DatabaseManager:
             
             pago_id = cursor.lastrowid
             
-            # Insertar detalles de mensualidades
+            # Insertar detalles de mensualidades; el índice único rechaza los
+            # meses ya pagados y se revisan todos para reportarlos juntos
+            meses_repetidos = []
             for mes in meses_pagados:
-                cursor.execute('''
-                    INSERT INTO detalle_pagos (pago_id, concepto, mes, anio, precio)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (pago_id, 'Mensualidad', mes, anio, cuota_mensual))
+                try:
+                    cursor.execute('''
+                        INSERT INTO detalle_pagos (pago_id, usuario_id, concepto, mes, anio, precio)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                    ''', (pago_id, usuario_id, 'Mensualidad', mes, anio, cuotas[mes]))
+                except sqlite3.IntegrityError as e:
+                    if 'UNIQUE' not in str(e):
+                        raise
+                    meses_repetidos.append(mes)
+            
+            if meses_repetidos:
+                conn.rollback()
+                raise MesesYaPagadosError(anio, meses_repetidos)
             
             # Insertar conceptos adicionales
             if conceptos_adicionales:
                 for concepto, precio in conceptos_adicionales:
                     cursor.execute('''
-                        INSERT INTO detalle_pagos (pago_id, concepto, mes, anio, precio)
-                        VALUES (?, ?, NULL, ?, ?)
-                    ''', (pago_id, concepto, anio, precio))
+                        INSERT INTO detalle_pagos (pago_id, usuario_id, concepto, mes, anio, precio)
+                        VALUES (?, ?, ?, NULL, ?, ?)
+                    ''', (pago_id, usuario_id, concepto, anio, precio))
             
             conn.commit()
             return pago_id
@@ -340,10 +387,11 @@ class DatabaseManager:
         finally:
             conn.close()
     
-    def obtener_historial_pagos_usuario(self, usuario_id: int) -> List[Dict]:
+    def obtener_historial_pagos_usuario(self, usuario_id: int) -> List[Pago]:
         """Obtiene el historial de pagos de un usuario"""
         conn = self.get_connection()
         cursor = conn.cursor()
+        cursor.row_factory = record_factory(Pago)
         
         try:
             cursor.execute('''
@@ -354,28 +402,37 @@ class DatabaseManager:
                 ORDER BY p.fecha_pago DESC
             ''', (usuario_id,))
             
-            rows = cursor.fetchall()
-            pagos = [dict(row) for row in rows]
-            
-            # Obtener detalles de cada pago
+            pagos = cursor.fetchall()
+            por_pago = {}
             for pago in pagos:
-                cursor.execute('''
-                    SELECT * FROM detalle_pagos 
-                    WHERE pago_id = ?
-                    ORDER BY mes
-                ''', (pago['id'],))
-                
-                detalles = cursor.fetchall()
-                pago['detalles'] = [dict(detalle) for detalle in detalles]
+                pago.detalles = []
+                por_pago[pago.id] = pago.detalles
+            
+            # Obtener los detalles de todos los pagos en una sola consulta
+            cursor = conn.cursor()
+            cursor.row_factory = record_factory(DetallePago)
+            cursor.execute('''
+                SELECT dp.* FROM detalle_pagos dp
+                JOIN pagos p ON dp.pago_id = p.id
+                WHERE p.usuario_id = ?
+                ORDER BY dp.pago_id, dp.mes
+            ''', (usuario_id,))
+            
+            for detalle in cursor:
+                # Un pago registrado entre las dos consultas no está en la lista
+                detalles = por_pago.get(detalle.pago_id)
+                if detalles is not None:
+                    detalles.append(detalle)
             
             return pagos
         finally:
             conn.close()
     
-    def obtener_detalle_pago(self, pago_id: int) -> Dict:
+    def obtener_detalle_pago(self, pago_id: int) -> Pago:
         """Obtiene el detalle completo de un pago para generar recibo"""
         conn = self.get_connection()
         cursor = conn.cursor()
+        cursor.row_factory = record_factory(Pago)
         
         try:
             # Obtener información del pago y usuario
@@ -386,26 +443,433 @@ class DatabaseManager:
                 WHERE p.id = ?
             ''', (pago_id,))
             
-            pago_row = cursor.fetchone()
-            if not pago_row:
+            pago = cursor.fetchone()
+            if not pago:
                 return {}
             
-            pago = dict(pago_row)
-            
             # Obtener detalles del pago
+            cursor = conn.cursor()
+            cursor.row_factory = record_factory(DetallePago)
             cursor.execute('''
                 SELECT * FROM detalle_pagos 
                 WHERE pago_id = ?
                 ORDER BY mes, concepto
             ''', (pago_id,))
             
-            detalles = cursor.fetchall()
-            pago['detalles'] = [dict(detalle) for detalle in detalles]
+            pago.detalles = cursor.fetchall()
             
             return pago
         finally:
             conn.close()
     
+    # === OPERACIONES MASIVAS ===
+    
+    def registrar_cargo_masivo(self, concepto_id: int, filtro: Dict = None, anio: int = None,
+                               observaciones: str = "", solo_vista_previa: bool = False) -> Dict:
+        """
+        Registra un concepto de cobro a todos los usuarios que cumplan el filtro
+        
+        Se crea un pago con un solo detalle por usuario, con dos INSERT ... SELECT
+        dentro de una misma transacción: o se registran todos o ninguno.
+        
+        Args:
+            concepto_id: ID del concepto en conceptos_cobro
+            filtro: Filtro de usuarios (ver condicion_usuarios); por omisión
+                    todos los usuarios activos
+            anio: Año del cargo (por omisión el actual)
+            observaciones: Observaciones de cada pago
+            solo_vista_previa: Solo contar usuarios y total, sin registrar nada
+            
+        Returns:
+            Dict: {'concepto', 'precio', 'usuarios', 'total', 'registrado'},
+                  vacío si hay error
+        """
+        if filtro is None:
+            filtro = {'estado': 'Activo'}
+        if anio is None:
+            anio = datetime.now().year
+        
+        condicion, parametros = condicion_usuarios(filtro)
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            # Se bloquea la escritura desde el conteo para que la vista previa
+            # y lo registrado coincidan
+            cursor.execute('BEGIN IMMEDIATE')
+            
+            cursor.execute('SELECT nombre, precio FROM conceptos_cobro WHERE id = ?', (concepto_id,))
+            concepto = cursor.fetchone()
+            if not concepto:
+                conn.rollback()
+                return {}
+            
+            cursor.execute(f'SELECT COUNT(*) FROM usuarios u WHERE {condicion}', parametros)
+            usuarios = cursor.fetchone()[0]
+            
+            resultado = {
+                'concepto': concepto['nombre'],
+                'precio': concepto['precio'],
+                'usuarios': usuarios,
+                'total': usuarios * concepto['precio'],
+                'registrado': False
+            }
+            
+            if solo_vista_previa or usuarios == 0:
+                conn.rollback()
+                return resultado
+            
+            # Con el bloqueo tomado, los pagos con id mayor al actual son los de este cargo
+            cursor.execute('SELECT COALESCE(MAX(id), 0) FROM pagos')
+            ultimo_pago = cursor.fetchone()[0]
+            
+            cursor.execute(f'''
+                INSERT INTO pagos (usuario_id, total, observaciones)
+                SELECT u.id, ?, ? FROM usuarios u
+                WHERE {condicion}
+                ORDER BY u.numero
+            ''', [concepto['precio'], observaciones] + parametros)
+            
+            cursor.execute('''
+                INSERT INTO detalle_pagos (pago_id, usuario_id, concepto, mes, anio, precio)
+                SELECT id, usuario_id, ?, NULL, ?, ? FROM pagos
+                WHERE id > ?
+            ''', (concepto['nombre'], anio, concepto['precio'], ultimo_pago))
+            
+            conn.commit()
+            resultado['registrado'] = True
+            return resultado
+            
+        except sqlite3.Error as e:
+            print(f"Error al registrar cargo masivo: {e}")
+            conn.rollback()
+            return {}
+        finally:
+            conn.close()
+    
+    # === IMPORTACIÓN EN BLOQUE ===
+    
+    def crear_usuarios_lote(self, filas: Iterable[Tuple[int, tuple]],
+                            solo_validar: bool = False) -> Optional[Tuple[int, List[Tuple[int, str]]]]:
+        """
+        Crea usuarios en bloque, en una sola transacción
+        
+        Los números que ya existen (en la base o antes en las mismas filas) se
+        rechazan buscándolos en un conjunto cargado una sola vez; el resto se
+        inserta con executemany por lotes.
+        
+        Args:
+            filas: (numero_fila, (numero, nombre, direccion, telefono, email)),
+                   en el orden del archivo
+            solo_validar: Solo revisar las filas contra los datos actuales, sin
+                          escribir nada; los datos se cargan al principio y el
+                          archivo se revisa sin bloquear a otras terminales
+        
+        Returns:
+            tuple: (creados, errores) con errores = [(numero_fila, mensaje)];
+                   None si hay error de base de datos (no se crea ninguno)
+        """
+        conn = self.get_connection()
+        conn.row_factory = None
+        # 64 MB de caché: los índices que actualizan los triggers de cada fila
+        # ya no caben en la caché predeterminada de 2 MB
+        conn.execute('PRAGMA cache_size = -65536')
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('BEGIN' if solo_validar else 'BEGIN IMMEDIATE')
+            existentes = {numero for numero, in cursor.execute('SELECT numero FROM usuarios')}
+            
+            if solo_validar:
+                # Con los datos actuales cargados se termina la lectura: revisar el
+                # archivo no impide que otras terminales escriban
+                conn.commit()
+            
+            creados, errores, lote = 0, [], []
+            
+            def guardar_lote():
+                if not solo_validar:
+                    cursor.executemany('''
+                        INSERT INTO usuarios (numero, nombre, direccion, telefono, email, uid)
+                        VALUES (?, ?, ?, ?, ?, lower(hex(randomblob(16))))
+                    ''', lote)
+                lote.clear()
+            
+            # El uid se asigna en el INSERT: así el trigger trg_usuarios_uid no
+            # hace un UPDATE por fila
+            for numero_fila, usuario in filas:
+                if usuario[0] in existentes:
+                    errores.append((numero_fila, f"Ya existe un usuario con el número {usuario[0]}"))
+                    continue
+                existentes.add(usuario[0])
+                lote.append(usuario)
+                creados += 1
+                if len(lote) >= LOTE_IMPORTACION:
+                    guardar_lote()
+            
+            guardar_lote()
+            if solo_validar:
+                conn.rollback()
+            else:
+                conn.commit()
+            return creados, errores
+        
+        except sqlite3.Error as e:
+            print(f"Error al importar usuarios: {e}")
+            conn.rollback()
+            return None
+        except Exception:
+            # Error al leer las filas: no dejar la transacción abierta
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    
+    def actualizar_usuarios_lote(self, filas: Iterable[Tuple[int, tuple]],
+                                 columnas: Iterable[str] = ('direccion', 'telefono', 'email'),
+                                 solo_validar: bool = False) -> Optional[Tuple[Dict[str, int], List[Tuple[int, str]]]]:
+        """
+        Crea o actualiza usuarios en bloque (actualización del padrón), en una
+        sola transacción
+        
+        Cada fila se compara con los datos actuales, cargados una sola vez en un
+        diccionario: las que no cambian no se escriben, y las demás se guardan
+        con INSERT ... ON CONFLICT(numero) DO UPDATE por lotes, agrupadas según
+        las columnas que cambiaron para que el UPDATE escriba solo esas. Una
+        celda vacía no borra el dato existente.
+        
+        Args:
+            filas: (numero_fila, (numero, nombre, direccion, telefono, email)),
+                   en el orden del archivo
+            columnas: Columnas opcionales que trae el archivo; las demás no se tocan
+            solo_validar: Solo revisar las filas contra los datos actuales, sin
+                          escribir nada; los datos se cargan al principio y el
+                          archivo se revisa sin bloquear a otras terminales
+        
+        Returns:
+            tuple: ({'insertados', 'actualizados', 'sin_cambios'}, errores) con
+                   errores = [(numero_fila, mensaje)]; None si hay error de base
+                   de datos (no se guarda ninguno)
+        """
+        campos = ('nombre', 'direccion', 'telefono', 'email')
+        presentes = [i for i, campo in enumerate(campos) if campo == 'nombre' or campo in columnas]
+        
+        conn = self.get_connection()
+        conn.row_factory = None
+        conn.execute('PRAGMA cache_size = -65536')
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('BEGIN' if solo_validar else 'BEGIN IMMEDIATE')
+            actuales = {fila[0]: fila[1:] for fila in cursor.execute(
+                'SELECT numero, nombre, direccion, telefono, email FROM usuarios')}
+            
+            if solo_validar:
+                # Con los datos actuales cargados se termina la lectura: revisar el
+                # archivo no impide que otras terminales escriban
+                conn.commit()
+            
+            resumen = {'insertados': 0, 'actualizados': 0, 'sin_cambios': 0}
+            errores = []
+            vistos = {}
+            # Columnas que cambian -> filas con esos cambios
+            lotes: Dict[tuple, list] = {}
+            
+            def guardar_lote(cambiados):
+                lote = lotes.pop(cambiados)
+                if not solo_validar:
+                    cursor.executemany(f'''
+                        INSERT INTO usuarios (numero, nombre, direccion, telefono, email, uid)
+                        VALUES (?, ?, ?, ?, ?, lower(hex(randomblob(16))))
+                        ON CONFLICT(numero) DO UPDATE SET
+                        {', '.join(f'{campos[i]} = excluded.{campos[i]}' for i in cambiados)}
+                    ''', lote)
+            
+            for numero_fila, (numero, *valores) in filas:
+                if numero in vistos:
+                    errores.append((numero_fila, f"El número {numero} ya aparece en la fila {vistos[numero]}"))
+                    continue
+                vistos[numero] = numero_fila
+                
+                actual = actuales.get(numero)
+                if actual is None:
+                    cambiados = tuple(presentes)
+                    resumen['insertados'] += 1
+                else:
+                    valores = [nuevo if i in presentes and nuevo else viejo
+                               for i, (nuevo, viejo) in enumerate(zip(valores, actual))]
+                    cambiados = tuple(i for i in presentes if valores[i] != actual[i])
+                    if not cambiados:
+                        resumen['sin_cambios'] += 1
+                        continue
+                    resumen['actualizados'] += 1
+                
+                lote = lotes.setdefault(cambiados, [])
+                lote.append((numero, *valores))
+                if len(lote) >= LOTE_IMPORTACION:
+                    guardar_lote(cambiados)
+            
+            for cambiados in list(lotes):
+                guardar_lote(cambiados)
+            if solo_validar:
+                conn.rollback()
+            else:
+                conn.commit()
+            return resumen, errores
+        
+        except sqlite3.Error as e:
+            print(f"Error al actualizar usuarios: {e}")
+            conn.rollback()
+            return None
+        except Exception:
+            # Error al leer las filas: no dejar la transacción abierta
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    
+    def registrar_pagos_lote(self, pagos: Iterable[Tuple[int, tuple]],
+                             observaciones: str = "",
+                             solo_validar: bool = False) -> Optional[Tuple[int, List[Tuple[int, str]]]]:
+        """
+        Registra pagos en bloque, en una sola transacción
+        
+        Cada pago trae sus detalles (anio, mes, concepto, monto) y puede cubrir
+        varios años. concepto None es una mensualidad; sin monto se cobra la
+        tarifa vigente en ese mes o el precio del concepto en conceptos_cobro.
+        
+        Los usuarios y los conceptos se buscan en diccionarios y los meses ya
+        pagados en un conjunto por año, cargados una sola vez; los ids de los
+        pagos se asignan como AUTOINCREMENT (sin reutilizar los de pagos
+        borrados) para insertar pagos y detalles con executemany. Un pago con algún mes ya pagado (en la base
+        o antes en las mismas filas) se rechaza completo, como en registrar_pago.
+        
+        Args:
+            pagos: (numero_fila, (numero_usuario, fecha, detalles)), en el orden
+                   del archivo; fecha 'AAAA-MM-DD HH:MM:SS' o None para la actual
+            observaciones: Observaciones de cada pago
+            solo_validar: Solo revisar las filas contra los datos actuales, sin
+                          escribir nada; los datos se cargan al principio y el
+                          archivo se revisa sin bloquear a otras terminales
+        
+        Returns:
+            tuple: (registrados, errores) con errores = [(numero_fila, mensaje)];
+                   None si hay error de base de datos (no se registra ninguno)
+        """
+        conn = self.get_connection()
+        conn.row_factory = None
+        # 64 MB de caché: los índices que actualizan los triggers de cada fila
+        # ya no caben en la caché predeterminada de 2 MB
+        conn.execute('PRAGMA cache_size = -65536')
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('BEGIN' if solo_validar else 'BEGIN IMMEDIATE')
+            
+            tarifas = tarifas_vigentes(conn, self.db_path)
+            usuarios = dict(cursor.execute('SELECT numero, id FROM usuarios'))
+            # nombre en minúsculas -> (nombre, precio)
+            conceptos = {nombre.lower(): (nombre, precio) for nombre, precio in
+                         cursor.execute('SELECT nombre, precio FROM conceptos_cobro')}
+            # Igual que AUTOINCREMENT: después del mayor id usado alguna vez,
+            # aunque esos pagos ya se hayan borrado
+            cursor.execute('''
+                SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'pagos'), 0),
+                           COALESCE(MAX(id), 0))
+                FROM pagos
+            ''')
+            pago_id = cursor.fetchone()[0]
+            
+            if solo_validar:
+                # Con los datos actuales cargados se termina la lectura: revisar el
+                # archivo no impide que otras terminales escriban (los meses
+                # pagados de cada año se leen después, cada uno en una consulta)
+                conn.commit()
+            
+            # anio -> {usuario_id * 16 + mes} de las mensualidades ya pagadas; las
+            # repetidas de antes de la migración 5 tienen usuario_id NULL y no cuentan
+            pagados = {}
+            
+            def meses_pagados(anio):
+                if anio not in pagados:
+                    pagados[anio] = {usuario_id * 16 + mes for usuario_id, mes in cursor.execute('''
+                        SELECT usuario_id, mes FROM detalle_pagos
+                        WHERE anio = ? AND mes IS NOT NULL AND usuario_id IS NOT NULL
+                    ''', (anio,))}
+                return pagados[anio]
+            
+            registrados, errores, lote_pagos, lote_detalles = 0, [], [], []
+            
+            def guardar_lote():
+                if not solo_validar:
+                    cursor.executemany('''
+                        INSERT INTO pagos (id, usuario_id, fecha_pago, total, observaciones, uid)
+                        VALUES (?, ?, COALESCE(?, CURRENT_TIMESTAMP), ?, ?, lower(hex(randomblob(16))))
+                    ''', lote_pagos)
+                    cursor.executemany('''
+                        INSERT INTO detalle_pagos (pago_id, usuario_id, concepto, mes, anio, precio, uid)
+                        VALUES (?, ?, ?, ?, ?, ?, lower(hex(randomblob(16))))
+                    ''', lote_detalles)
+                lote_pagos.clear()
+                lote_detalles.clear()
+            
+            for numero_fila, (numero, fecha, detalles) in pagos:
+                usuario_id = usuarios.get(numero)
+                if usuario_id is None:
+                    errores.append((numero_fila, f"No existe usuario con número {numero}"))
+                    continue
+                
+                # (concepto, mes, anio, precio) y mensualidades nuevas (anio, clave)
+                filas, nuevos, repetidos, desconocidos = [], set(), {}, []
+                for anio, mes, concepto, monto in detalles:
+                    if concepto is None:
+                        clave = usuario_id * 16 + mes
+                        if clave in meses_pagados(anio) or (anio, clave) in nuevos:
+                            repetidos.setdefault(anio, []).append(mes)
+                            continue
+                        nuevos.add((anio, clave))
+                        filas.append(('Mensualidad', mes, anio, tarifas.cuota(anio, mes) if monto is None else monto))
+                    else:
+                        nombre, precio = conceptos.get(concepto.lower(), (concepto, None))
+                        if monto is None and precio is None:
+                            desconocidos.append(concepto)
+                            continue
+                        filas.append((nombre, None, anio, precio if monto is None else monto))
+                
+                if repetidos or desconocidos:
+                    problemas = [str(MesesYaPagadosError(anio, meses)) for anio, meses in sorted(repetidos.items())]
+                    if desconocidos:
+                        problemas.append(f"concepto sin monto ni precio registrado: {', '.join(desconocidos)}")
+                    errores.append((numero_fila, f"Usuario {numero}: {'; '.join(problemas)}"))
+                    continue
+                
+                pago_id += 1
+                lote_pagos.append((pago_id, usuario_id, fecha, sum(fila[3] for fila in filas), observaciones))
+                lote_detalles.extend((pago_id, usuario_id, *fila) for fila in filas)
+                for anio, clave in nuevos:
+                    pagados[anio].add(clave)
+                registrados += 1
+                if len(lote_detalles) >= LOTE_IMPORTACION:
+                    guardar_lote()
+
+            guardar_lote()
+            if solo_validar:
+                conn.rollback()
+            else:
+                conn.commit()
+            return registrados, errores
+        
+        except sqlite3.Error as e:
+            print(f"Error al importar pagos: {e}")
+            conn.rollback()
+            return None
+        except Exception:
+            # Error al leer las filas: no dejar la transacción abierta
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    
     # === GESTIÓN DE CONFIGURACIÓN ===
     
     def obtener_configuracion(self, clave: str) -> Optional[str]:
@@ -437,6 +901,83 @@ class DatabaseManager:
         finally:
             conn.close()
     
+    def obtener_versiones_tablas(self) -> Dict[str, int]:
+        """
+        Obtiene el contador de cambios de cada tabla
+        
+        Returns:
+            Dict[str, int]: tabla -> versión (aumenta con cada fila modificada)
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('SELECT tabla, version FROM versiones_tablas')
+            return {row[0]: row[1] for row in cursor.fetchall()}
+        except sqlite3.Error as e:
+            print(f"Error al obtener versiones de tablas: {e}")
+            return {}
+        finally:
+            conn.close()
+    
+    def obtener_tarifas(self) -> List[Tuple[int, int, float]]:
+        """
+        Historial de cuotas mensuales
+        
+        Returns:
+            List[Tuple[int, int, float]]: (anio, mes desde el que rige, cuota),
+                                          de la más antigua a la más reciente
+        """
+        conn = self.get_connection()
+        
+        try:
+            return tarifas_vigentes(conn, self.db_path).filas()
+        except sqlite3.Error as e:
+            print(f"Error al obtener tarifas: {e}")
+            return []
+        finally:
+            conn.close()
+    
+    def agregar_tarifa(self, cuota: float, anio: int, mes: int) -> bool:
+        """
+        Fija la cuota mensual a partir de un mes
+        
+        Los meses anteriores conservan su cuota; si ya había una tarifa desde
+        ese mes, se reemplaza. cuota_mensual de configuracion queda con la
+        cuota del mes en curso.
+        
+        Args:
+            cuota: Nueva cuota mensual
+            anio, mes: Primer mes en que se cobra
+        
+        Returns:
+            bool: True si se guardó
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('''
+                INSERT INTO tarifas (anio, mes, cuota) VALUES (?, ?, ?)
+                ON CONFLICT (anio, mes) DO UPDATE
+                SET cuota = excluded.cuota, fecha_registro = CURRENT_TIMESTAMP
+            ''', (anio, mes, cuota))
+            
+            cursor.execute('''
+                UPDATE configuracion
+                SET valor = ?, fecha_modificacion = CURRENT_TIMESTAMP
+                WHERE clave = 'cuota_mensual'
+            ''', (str(tarifas_vigentes(conn, self.db_path).cuota_actual()),))
+            
+            conn.commit()
+            return True
+        except sqlite3.Error as e:
+            print(f"Error al guardar la tarifa: {e}")
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+    
     def verificar_pin(self, pin: str) -> bool:
         """Verifica si el PIN ingresado es correcto"""
         pin_actual = self.obtener_configuracion('pin_acceso')
@@ -444,10 +985,11 @@ class DatabaseManager:
     
     # === GESTIÓN DE CONCEPTOS DE COBRO ===
     
-    def obtener_conceptos_cobro(self, solo_activos: bool = True) -> List[Dict]:
+    def obtener_conceptos_cobro(self, solo_activos: bool = True) -> List[Concepto]:
         """Obtiene todos los conceptos de cobro"""
         conn = self.get_connection()
         cursor = conn.cursor()
+        cursor.row_factory = record_factory(Concepto)
         
         try:
             if solo_activos:
@@ -459,8 +1001,7 @@ class DatabaseManager:
             else:
                 cursor.execute('SELECT * FROM conceptos_cobro ORDER BY nombre')
             
-            rows = cursor.fetchall()
-            return [dict(row) for row in rows]
+            return cursor.fetchall()
         finally:
             conn.close()
     
@@ -524,10 +1065,58 @@ class DatabaseManager:
 
 # Función de utilidad para obtener una instancia global del gestor
 _db_manager = None
+_al_reiniciar: List[Callable[[], None]] = []
 
 def get_db_manager() -> DatabaseManager:
-    """Obtiene una instancia global del gestor de base de datos"""
+    """
+    Obtiene una instancia global del gestor de base de datos
+    
+    Si API_SERVER_URL está definido, devuelve un cliente del servicio HTTP
+    local (api_client.py) con los mismos métodos.
+    """
     global _db_manager
     if _db_manager is None:
-        _db_manager = DatabaseManager()
-    return _db_manager
\ No newline at end of file
+        if API_SERVER_URL:
+            from api_client import ClienteAPI
+            _db_manager = ClienteAPI(API_SERVER_URL)
+        else:
+            _db_manager = DatabaseManager()
+    return _db_manager
+
+def usa_servicio() -> bool:
+    """
+    Indica si los datos se leen del servicio HTTP (API_SERVER_URL) en lugar
+    de un archivo local; en ese caso no hay base que exportar ni respaldar
+    en este equipo
+    """
+    return bool(API_SERVER_URL)
+
+def registrar_al_reiniciar(callback: Callable[[], None]):
+    """Registra una función que invalida cachés cuando se reemplaza la base de datos"""
+    if callback not in _al_reiniciar:
+        _al_reiniciar.append(callback)
+
+registrar_al_reiniciar(limpiar_tarifas)
+
+def reiniciar_db_manager(db_path: Optional[str] = None) -> DatabaseManager:
+    """
+    Vuelve a crear la instancia global del gestor (por ejemplo, después de
+    restaurar un respaldo) e invalida las cachés registradas
+    
+    Args:
+        db_path: Base de datos a usar desde ahora; por omisión, la misma de antes
+    """
+    global _db_manager
+    if db_path is None:
+        db_path = getattr(_db_manager, 'db_path', None) or "agua_potable.db"
+    _db_manager = DatabaseManager(db_path)
+    invalidar_caches()
+    return _db_manager
+
+def invalidar_caches():
+    """Ejecuta las funciones de registrar_al_reiniciar sin cambiar de gestor"""
+    for callback in list(_al_reiniciar):
+        try:
+            callback()
+        except Exception as e:
+            print(f"Error al invalidar caché: {e}")
\ No newline at end of file
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ventana de exportación de usuarios, pagos y reportes a Excel/CSV
+"""
+
+import os
+import threading
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+from datetime import datetime
+
+from exporter import REPORTES, export_report
+
+
+class ExportWindow:
+    def __init__(self, parent=None):
+        # Crear ventana principal o usar la proporcionada
+        if parent:
+            self.root = tk.Toplevel(parent)
+        else:
+            self.root = tk.Tk()
+
+        self.root.title("Exportar Datos")
+        self.root.geometry("480x420")
+        self.root.resizable(False, False)
+
+        # Variables
+        self.report_var = tk.StringVar(value='usuarios')
+        self.format_var = tk.StringVar(value='xlsx')
+        self.worker = None
+        self.result = None
+
+        # Configurar la interfaz
+        self.setup_ui()
+
+    def setup_ui(self):
+        """Configura la interfaz de usuario"""
+        main_frame = tk.Frame(self.root)
+        main_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=15)
+
+        # Título
+        title_label = tk.Label(
+            main_frame,
+            text="Exportar Datos",
+            font=('Arial', 16, 'bold'),
+            fg='#2c3e50'
+        )
+        title_label.pack(pady=(0, 10))
+
+        # Selección de reporte
+        reports_frame = tk.LabelFrame(main_frame, text="Información a exportar", font=('Arial', 11, 'bold'))
+        reports_frame.pack(fill=tk.X, pady=5)
+
+        for key, (title, _query) in REPORTES.items():
+            tk.Radiobutton(
+                reports_frame,
+                text=title,
+                variable=self.report_var,
+                value=key,
+                font=('Arial', 10)
+            ).pack(anchor='w', padx=10)
+
+        # Selección de formato
+        format_frame = tk.LabelFrame(main_frame, text="Formato", font=('Arial', 11, 'bold'))
+        format_frame.pack(fill=tk.X, pady=5)
+
+        tk.Radiobutton(format_frame, text="Excel (.xlsx)", variable=self.format_var,
+                       value='xlsx', font=('Arial', 10)).pack(side=tk.LEFT, padx=10)
+        tk.Radiobutton(format_frame, text="CSV (.csv)", variable=self.format_var,
+                       value='csv', font=('Arial', 10)).pack(side=tk.LEFT, padx=10)
+
+        # Estado de la exportación
+        self.status_label = tk.Label(main_frame, text="", font=('Arial', 10), fg='#7f8c8d')
+        self.status_label.pack(pady=(10, 0))
+
+        self.progress = ttk.Progressbar(main_frame, mode='indeterminate')
+        self.progress.pack(fill=tk.X, pady=5)
+
+        # Botones
+        buttons_frame = tk.Frame(main_frame)
+        buttons_frame.pack(fill=tk.X, pady=(10, 0))
+
+        self.export_btn = tk.Button(
+            buttons_frame,
+            text="Exportar",
+            command=self.export_data,
+            bg='#27ae60',
+            fg='white',
+            font=('Arial', 11, 'bold'),
+            padx=20
+        )
+        self.export_btn.pack(side=tk.LEFT)
+
+        tk.Button(
+            buttons_frame,
+            text="Cerrar",
+            command=self.root.destroy,
+            bg='#95a5a6',
+            fg='white',
+            font=('Arial', 11, 'bold'),
+            padx=20
+        ).pack(side=tk.RIGHT)
+
+    def export_data(self):
+        """Pide el archivo destino y exporta en segundo plano"""
+        report = self.report_var.get()
+        file_format = self.format_var.get()
+
+        if file_format == 'xlsx':
+            filetypes = [("Libro de Excel", "*.xlsx"), ("Todos los archivos", "*.*")]
+        else:
+            filetypes = [("Archivo CSV", "*.csv"), ("Todos los archivos", "*.*")]
+
+        path = filedialog.asksaveasfilename(
+            parent=self.root,
+            title="Guardar exportación como...",
+            defaultextension=f".{file_format}",
+            filetypes=filetypes,
+            initialfile=f"{report}_{datetime.now().strftime('%Y%m%d')}.{file_format}"
+        )
+        if not path:
+            return
+
+        self.export_btn.config(state='disabled')
+        self.status_label.config(text=f"Exportando a {os.path.basename(path)}...")
+        self.progress.start(10)
+
+        # La consulta se recorre en otro hilo para no congelar la ventana
+        self.result = None
+        self.worker = threading.Thread(
+            target=self._run_export, args=(report, path, file_format), daemon=True
+        )
+        self.worker.start()
+        self.root.after(100, self._check_export, path)
+
+    def _run_export(self, report, path, file_format):
+        try:
+            self.result = (True, export_report(report, path, file_format))
+        except Exception as e:
+            self.result = (False, str(e))
+
+    def _check_export(self, path):
+        if not self.root.winfo_exists():
+            return
+        if self.worker.is_alive():
+            self.root.after(100, self._check_export, path)
+            return
+
+        self.progress.stop()
+        self.export_btn.config(state='normal')
+
+        success, value = self.result
+        if success:
+            self.status_label.config(text=f"{value:,} registros exportados")
+            messagebox.showinfo("Éxito", f"Se exportaron {value:,} registros a:\n{path}", parent=self.root)
+        else:
+            self.status_label.config(text="")
+            messagebox.showerror("Error", f"Error al exportar: {value}", parent=self.root)
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Exportación de usuarios, pagos y reportes a CSV y Excel (XLSX)
+
+Las filas se leen del cursor de SQLite por lotes y se escriben directamente
+al archivo, sin cargar la consulta completa en memoria. El archivo XLSX se
+genera con zipfile + XML (celdas con cadenas en línea), así que el uso de
+memoria es el mismo para 100 que para 1,000,000 de filas. Si las filas no
+caben en una hoja de Excel (1,048,576) se continúa en hojas nuevas.
+"""
+
+import csv
+import os
+import re
+import sqlite3
+import zipfile
+from datetime import date
+from itertools import groupby
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+from database import get_db_manager, usa_servicio
+from tarifas import indice_mes, tarifas_vigentes
+
+# Filas leídas del cursor en cada lote
+TAMANO_LOTE = 1000
+
+
+def _adeudos(conn: sqlite3.Connection, db_path: str) -> Tuple[List[str], Iterator[Sequence]]:
+    """
+    Mensualidades sin pagar de cada usuario activo, desde el mes en que se
+    registró hasta el mes en curso, cada una con la tarifa de su mes
+
+    Los meses pagados se leen en una sola consulta ordenada por usuario (el
+    orden del índice idx_detalle_pagos_mes_unico) y se recorren junto con los
+    usuarios, sin una consulta por usuario ni por mes.
+    """
+    tarifas = tarifas_vigentes(conn, db_path)
+    hoy = date.today()
+    ultimo = indice_mes(hoy.year, hoy.month)
+
+    usuarios = conn.execute('''
+        SELECT id, numero, nombre, fecha_registro FROM usuarios
+        WHERE estado = 'Activo'
+        ORDER BY id
+    ''').fetchall()
+    pagados = groupby(conn.execute('''
+        SELECT usuario_id, anio * 12 + mes - 1 FROM detalle_pagos
+        WHERE mes IS NOT NULL AND usuario_id IS NOT NULL
+        ORDER BY usuario_id
+    '''), key=lambda fila: fila[0])
+
+    def filas():
+        grupo = next(pagados, None)
+        for usuario_id, numero, nombre, fecha_registro in usuarios:
+            while grupo is not None and grupo[0] < usuario_id:
+                grupo = next(pagados, None)
+            meses = {indice for _, indice in grupo[1]} if grupo and grupo[0] == usuario_id else set()
+
+            try:
+                inicio = indice_mes(int(fecha_registro[:4]), int(fecha_registro[5:7]))
+            except (TypeError, ValueError):
+                continue  # Sin fecha de registro no se sabe desde cuándo debe
+            adeudados = [indice for indice in range(inicio, ultimo + 1) if indice not in meses]
+            if adeudados:
+                yield (numero, nombre, len(adeudados),
+                       f"{adeudados[0] // 12}-{adeudados[0] % 12 + 1:02d}",
+                       f"{adeudados[-1] // 12}-{adeudados[-1] % 12 + 1:02d}",
+                       sum(tarifas.cuota_indice(indice) for indice in adeudados))
+
+    return ['numero', 'nombre', 'meses_adeudados', 'desde', 'hasta', 'adeudo'], filas()
+
+
+# Reportes disponibles: clave -> (título, consulta); en lugar de la consulta
+# puede ir una función (conn, db_path) -> (encabezados, filas)
+REPORTES = {
+    'usuarios': (
+        'Usuarios',
+        '''
+        SELECT numero, nombre, direccion, telefono, email, estado, fecha_registro
+        FROM usuarios
+        ORDER BY numero
+        '''
+    ),
+    'pagos': (
+        'Pagos',
+        '''
+        SELECT p.id AS pago, p.fecha_pago, u.numero, u.nombre, p.total, p.observaciones
+        FROM pagos p
+        JOIN usuarios u ON p.usuario_id = u.id
+        ORDER BY p.id
+        '''
+    ),
+    'detalle_pagos': (
+        'Detalle de pagos',
+        '''
+        SELECT dp.pago_id AS pago, p.fecha_pago, u.numero, u.nombre, dp.concepto,
+               dp.mes, dp.anio, dp.precio, dp.cantidad, dp.precio * dp.cantidad AS subtotal
+        FROM detalle_pagos dp
+        JOIN pagos p ON dp.pago_id = p.id
+        JOIN usuarios u ON p.usuario_id = u.id
+        ORDER BY dp.id
+        '''
+    ),
+    'ingresos_mensuales': (
+        'Ingresos por mes',
+        '''
+        SELECT CAST(strftime('%Y', fecha_pago) AS INTEGER) AS anio,
+               CAST(strftime('%m', fecha_pago) AS INTEGER) AS mes,
+               COUNT(*) AS pagos, SUM(total) AS total
+        FROM pagos
+        GROUP BY anio, mes
+        ORDER BY anio, mes
+        '''
+    ),
+    'ingresos_por_concepto': (
+        'Ingresos por concepto',
+        '''
+        SELECT anio, concepto, COUNT(*) AS registros, SUM(precio * cantidad) AS total
+        FROM detalle_pagos
+        GROUP BY anio, concepto
+        ORDER BY anio, concepto
+        '''
+    ),
+    'adeudos': ('Adeudos', _adeudos),
+}
+
+
+def iter_rows(cursor: sqlite3.Cursor, size: int = TAMANO_LOTE) -> Iterator[Sequence]:
+    """Recorre las filas de un cursor por lotes de `size`"""
+    while True:
+        rows = cursor.fetchmany(size)
+        if not rows:
+            return
+        yield from rows
+
+
+def write_csv(headers: Sequence[str], rows: Iterable[Sequence], path: str) -> int:
+    """
+    Escribe filas en un archivo CSV
+
+    Se usa UTF-8 con BOM para que Excel muestre bien los acentos.
+
+    Returns:
+        int: Número de filas exportadas
+    """
+    total = 0
+
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(headers)
+        for row in rows:
+            writer.writerow(row)
+            total += 1
+
+    return total
+
+
+def write_xlsx(headers: Sequence[str], rows: Iterable[Sequence], path: str, sheet_name: str = 'Datos') -> int:
+    """
+    Escribe filas en un archivo XLSX
+
+    Returns:
+        int: Número de filas exportadas
+    """
+    total = 0
+
+    with StreamingXLSXWriter(path, sheet_name) as writer:
+        writer.write_row(headers)
+        for row in rows:
+            writer.write_row(row)
+            total += 1
+
+    return total
+
+
+def export_csv(cursor: sqlite3.Cursor, path: str) -> int:
+    """Escribe el resultado de un cursor en un archivo CSV"""
+    return write_csv([d[0] for d in cursor.description], iter_rows(cursor), path)
+
+
+def export_xlsx(cursor: sqlite3.Cursor, path: str, sheet_name: str = 'Datos') -> int:
+    """Escribe el resultado de un cursor en un archivo XLSX"""
+    return write_xlsx([d[0] for d in cursor.description], iter_rows(cursor), path, sheet_name)
+
+
+def export_report(report: str, path: str, file_format: Optional[str] = None) -> int:
+    """
+    Exporta uno de los REPORTES a CSV o XLSX
+
+    Args:
+        report: Clave del reporte (ver REPORTES)
+        path: Archivo de salida
+        file_format: 'csv' o 'xlsx'; si se omite se deduce de la extensión
+
+    Returns:
+        int: Número de filas exportadas
+
+    Raises:
+        RuntimeError: Si los datos vienen del servicio HTTP (API_SERVER_URL):
+                      los reportes leen la base directamente
+    """
+    if usa_servicio():
+        raise RuntimeError("La exportación lee la base de datos directamente; "
+                           "ejecútela en el equipo donde corre el servicio")
+    if report not in REPORTES:
+        raise ValueError(f"Reporte desconocido: {report}")
+
+    file_format = (file_format or os.path.splitext(path)[1].lstrip('.')).lower()
+    if file_format not in ('csv', 'xlsx'):
+        raise ValueError(f"Formato no soportado: {file_format}")
+
+    title, query = REPORTES[report]
+    db = get_db_manager()
+    conn = db.get_connection()
+    conn.row_factory = None  # Tuplas simples: no se accede por nombre de columna
+
+    try:
+        if callable(query):
+            headers, rows = query(conn, db.db_path)
+        else:
+            cursor = conn.execute(query)
+            headers, rows = [d[0] for d in cursor.description], iter_rows(cursor)
+        if file_format == 'csv':
+            return write_csv(headers, rows, path)
+        return write_xlsx(headers, rows, path, title)
+    finally:
+        conn.close()
+
+
+# Caracteres que XML 1.0 no permite (controles salvo tab, salto de línea y retorno)
+_XML_INVALIDOS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+
+
+def _column_letter(index: int) -> str:
+    """Convierte un índice de columna (0 = A) a letras de Excel"""
+    letters = ''
+    index += 1
+    while index:
+        index, rest = divmod(index - 1, 26)
+        letters = chr(65 + rest) + letters
+    return letters
+
+
+class StreamingXLSXWriter:
+    """
+    Escritor mínimo de XLSX que escribe las filas directamente al zip
+
+    Cuando una hoja llega al límite de filas de Excel, las siguientes se
+    escriben en otra hoja ("Usuarios (2)", ...) que repite la primera fila
+    (los encabezados).
+
+    Uso:
+        with StreamingXLSXWriter('salida.xlsx', 'Usuarios') as writer:
+            writer.write_row(['numero', 'nombre'])
+            writer.write_row([1, 'Juan Pérez'])
+    """
+
+    # Filas acumuladas antes de escribir al zip
+    FILAS_POR_ESCRITURA = 200
+
+    # Filas por hoja que admite Excel
+    MAX_FILAS = 1048576
+
+    def __init__(self, path: str, sheet_name: str = 'Datos'):
+        self.path = path
+        # Excel limita el nombre de la hoja a 31 caracteres sin []:*?/\
+        self.sheet_name = re.sub(r'[\[\]:*?/\\]', ' ', sheet_name)[:31] or 'Datos'
+        self.sheet_names: List[str] = []
+        self._zip = zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED)
+        self._sheet = None
+        self._columns: List[str] = []
+        self._buffer: List[str] = []
+        self._row_number = 0
+        self._first_row = None
+
+        self._open_sheet()
+
+    def _open_sheet(self):
+        """Empieza la hoja siguiente"""
+        numero = len(self.sheet_names) + 1
+        if numero == 1:
+            self.sheet_names.append(self.sheet_name)
+        else:
+            sufijo = f" ({numero})"
+            self.sheet_names.append(self.sheet_name[:31 - len(sufijo)] + sufijo)
+
+        self._sheet = self._zip.open(f'xl/worksheets/sheet{numero}.xml', 'w', force_zip64=True)
+        self._sheet.write(
+            b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+            b'<sheetData>'
+        )
+        self._row_number = 0
+
+    def _close_sheet(self):
+        self._flush()
+        self._sheet.write(b'</sheetData></worksheet>')
+        self._sheet.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        if exc_type is not None and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def write_row(self, values: Iterable):
+        """Agrega una fila a la hoja (o a una nueva si la actual está llena)"""
+        if self._row_number >= self.MAX_FILAS:
+            self._close_sheet()
+            self._open_sheet()
+            self._buffer.append(self._first_row)
+            self._row_number = 1
+
+        self._row_number += 1
+        row = self._row_number
+        cells = []
+
+        for index, value in enumerate(values):
+            if index >= len(self._columns):
+                self._columns.append(_column_letter(index))
+            if value is None:
+                continue
+            ref = f"{self._columns[index]}{row}"
+
+            if isinstance(value, bool):
+                cells.append(f'<c r="{ref}" t="b"><v>{int(value)}</v></c>')
+            elif isinstance(value, (int, float)) and value == value and value not in (float('inf'), float('-inf')):
+                cells.append(f'<c r="{ref}"><v>{value!r}</v></c>')
+            else:
+                if isinstance(value, bytes):
+                    value = value.hex()
+                text = escape(_XML_INVALIDOS.sub('', str(value)))
+                cells.append(f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>')
+
+        xml = f'<row r="{row}">{"".join(cells)}</row>'
+        if self._first_row is None:
+            self._first_row = xml
+        self._buffer.append(xml)
+        if len(self._buffer) >= self.FILAS_POR_ESCRITURA:
+            self._flush()
+
+    def _flush(self):
+        if self._buffer:
+            self._sheet.write(''.join(self._buffer).encode('utf-8'))
+            self._buffer = []
+
+    def close(self):
+        """Termina la última hoja y escribe las partes fijas del libro"""
+        if self._zip is None:
+            return
+
+        self._close_sheet()
+        numeros = range(1, len(self.sheet_names) + 1)
+
+        self._zip.writestr('[Content_Types].xml', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            + ''.join(f'<Override PartName="/xl/worksheets/sheet{n}.xml" '
+                      'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                      for n in numeros) +
+            '</Types>'
+        ))
+        self._zip.writestr('_rels/.rels', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+            'Target="xl/workbook.xml"/>'
+            '</Relationships>'
+        ))
+        self._zip.writestr('xl/workbook.xml', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            '<sheets>'
+            + ''.join(f'<sheet name="{escape(nombre)}" sheetId="{n}" r:id="rId{n}"/>'
+                      for n, nombre in zip(numeros, self.sheet_names)) +
+            '</sheets>'
+            '</workbook>'
+        ))
+        self._zip.writestr('xl/_rels/workbook.xml.rels', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            + ''.join(f'<Relationship Id="rId{n}" '
+                      'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+                      f'Target="worksheets/sheet{n}.xml"/>'
+                      for n in numeros) +
+            '</Relationships>'
+        ))
+
+        self._zip.close()
+        self._zip = None
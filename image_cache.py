@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Caché de imágenes redimensionadas para las ventanas
+
+Las miniaturas se guardan en disco como PNG, con un nombre que depende de
+la ruta del archivo original, su fecha de modificación, su tamaño y el
+tamaño pedido; si el original cambia se genera una nueva. Tk lee PNG por sí
+mismo, así que cuando la miniatura ya existe no se importa PIL ni se
+decodifica el JPG.
+
+Además, los PhotoImage ya creados se conservan en memoria, de modo que
+reconstruir una ventana no vuelve a leer el disco.
+
+Uso:
+    from image_cache import get_image_cache
+    self.logo_image = get_image_cache().get_photo("logo.jpg", (100, 100), self.root)
+"""
+
+import hashlib
+import os
+import tkinter as tk
+from typing import Dict, Tuple
+
+from config.settings import IMAGE_CACHE_DIR
+
+
+class ImageCache:
+    def __init__(self, cache_dir: str = IMAGE_CACHE_DIR):
+        """
+        Args:
+            cache_dir: Carpeta donde se guardan las miniaturas
+        """
+        self.cache_dir = cache_dir
+        # (ruta, mtime, tamaño del archivo, ancho, alto) -> (intérprete Tk, PhotoImage)
+        self._photos: Dict[tuple, Tuple[object, tk.PhotoImage]] = {}
+
+    def _source_key(self, source: str) -> Tuple[str, int, int]:
+        """Ruta absoluta, mtime y tamaño del archivo original"""
+        path = os.path.abspath(source)
+        stat = os.stat(path)
+        return path, stat.st_mtime_ns, stat.st_size
+
+    def thumbnail_path(self, source: str, size: Tuple[int, int]) -> str:
+        """Ruta de la miniatura en disco (exista o no)"""
+        path, mtime, file_size = self._source_key(source)
+        width, height = size
+        ruta_hash = hashlib.sha1(path.encode('utf-8')).hexdigest()[:16]
+        version = hashlib.sha1(f"{mtime}:{file_size}".encode('ascii')).hexdigest()[:12]
+        return os.path.join(self.cache_dir, f"{ruta_hash}_{width}x{height}_{version}.png")
+
+    def get_thumbnail(self, source: str, size: Tuple[int, int]) -> str:
+        """
+        Obtiene la miniatura de `source` con el tamaño indicado, creándola si no existe
+
+        Returns:
+            str: Ruta del PNG redimensionado
+        """
+        thumbnail = self.thumbnail_path(source, size)
+        if os.path.exists(thumbnail):
+            return thumbnail
+
+        # Solo aquí se necesita PIL: para decodificar el original y redimensionarlo
+        from PIL import Image
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with Image.open(source) as img:
+            resized = img.convert('RGBA').resize(size, Image.Resampling.LANCZOS)
+
+        temporal = thumbnail + '.tmp'
+        resized.save(temporal, format='PNG')
+        os.replace(temporal, thumbnail)
+
+        self._remove_stale(thumbnail)
+        return thumbnail
+
+    def _remove_stale(self, thumbnail: str):
+        """Borra las miniaturas anteriores del mismo archivo y tamaño"""
+        prefix = os.path.basename(thumbnail).rsplit('_', 1)[0] + '_'
+        for name in os.listdir(self.cache_dir):
+            if name.startswith(prefix) and name != os.path.basename(thumbnail):
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+
+    def get_photo(self, source: str, size: Tuple[int, int], master=None) -> tk.PhotoImage:
+        """
+        Obtiene un PhotoImage redimensionado, reutilizando el que ya esté en memoria
+
+        Args:
+            source: Ruta de la imagen original (JPG, PNG, ...)
+            size: Tamaño final (ancho, alto)
+            master: Widget de la ventana que mostrará la imagen
+
+        Returns:
+            tk.PhotoImage: Imagen lista para usar en un Label
+        """
+        interp = (master or tk._default_root).tk
+        key = self._source_key(source) + tuple(size)
+
+        cached = self._photos.get(key)
+        # Un PhotoImage solo sirve en el intérprete Tk que lo creó (la ventana
+        # de login y la principal usan intérpretes distintos)
+        if cached is not None and cached[0] is interp:
+            return cached[1]
+
+        photo = tk.PhotoImage(file=self.get_thumbnail(source, size), master=master)
+        self._photos[key] = (interp, photo)
+        return photo
+
+    def clear_memory(self):
+        """Libera los PhotoImage guardados en memoria"""
+        self._photos.clear()
+
+
+# Función de utilidad para obtener una instancia global de la caché
+_image_cache = None
+
+def get_image_cache() -> ImageCache:
+    """Obtiene una instancia global de la caché de imágenes"""
+    global _image_cache
+    if _image_cache is None:
+        _image_cache = ImageCache()
+    return _image_cache
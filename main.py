@@ -7,11 +7,13 @@ Aplicación principal del sistema de gestión de agua potable
 import tkinter as tk
 from tkinter import messagebox, ttk
 import os
-from PIL import Image, ImageTk
 from auth import authenticate
-from user_management import UserManagementWindow
-from payment_registration import PaymentRegistrationWindow
-from configuration import ConfigurationWindow
+from window_manager import WindowManager
+from database import usa_servicio
+
+# Los módulos de cada ventana se importan al abrirlas, no al iniciar: así la
+# pantalla de PIN aparece sin esperar a cargar todo el sistema. PIL solo se
+# usa (en image_cache) cuando falta una miniatura en la caché
 
 class MainApplication:
     def __init__(self):
@@ -42,9 +44,20 @@ class MainApplication:
         self.logo_image = None
         self.example_image = None
         
+        # Una sola instancia por módulo: al cerrarlas se ocultan y se reutilizan
+        self.window_manager = WindowManager(self.root)
+        
         # Configurar la interfaz mejorada
         self.setup_improved_ui()
         
+        # Respaldos incrementales periódicos en segundo plano (con el
+        # servicio HTTP los respalda el equipo que tiene la base)
+        self.backup_scheduler = None
+        if not usa_servicio():
+            from backup_manager import BackupScheduler
+            self.backup_scheduler = BackupScheduler()
+            self.backup_scheduler.start()
+        
         # Configurar eventos
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
     
@@ -68,6 +81,7 @@ class MainApplication:
         system_menu.add_command(label="🏠 Menú Principal", command=self.show_main_window)
         system_menu.add_separator()
         system_menu.add_command(label="📊 Importar CSV", command=self.open_csv_importer)
+        system_menu.add_command(label="📤 Exportar Datos", command=self.open_export_window)
         system_menu.add_separator()
         system_menu.add_command(label="🚪 Salir", command=self.on_closing)
         
@@ -81,6 +95,7 @@ class MainApplication:
         modules_menu.add_command(label="👥 Gestión de Usuarios", command=self.open_user_management)
         modules_menu.add_command(label="💰 Registro de Pagos", command=self.open_payment_registration)
         modules_menu.add_command(label="⚙️ Configuración del Sistema", command=self.open_configuration)
+        modules_menu.add_command(label="🧾 Cargo Masivo", command=self.open_bulk_charge)
         
         # Menú Ayuda
         help_menu = tk.Menu(menubar, tearoff=0,
@@ -96,11 +111,10 @@ class MainApplication:
         """Configura el icono de la ventana si existe"""
         try:
             if os.path.exists("logo.jpg"):
-                # Convertir JPG a ICO si es necesario
-                img = Image.open("logo.jpg")
-                img = img.resize((32, 32), Image.Resampling.LANCZOS)
-                # En Windows, podemos usar el archivo directamente
-                # self.root.iconbitmap("logo.ico")  # Si tuviéramos un ICO
+                from image_cache import get_image_cache
+                # Miniatura de 32x32 ya guardada en la caché (no hace falta un ICO)
+                self.icon_image = get_image_cache().get_photo("logo.jpg", (32, 32), self.root)
+                self.root.iconphoto(True, self.icon_image)
         except Exception as e:
             print(f"No se pudo configurar el icono: {e}")
     
@@ -156,10 +170,9 @@ class MainApplication:
         # Cargar y mostrar logo con mejor presentación
         if os.path.exists("logo.jpg"):
             try:
-                logo_img = Image.open("logo.jpg")
-                # Logo más grande y visible
-                logo_img = logo_img.resize((100, 100), Image.Resampling.LANCZOS)
-                self.logo_image = ImageTk.PhotoImage(logo_img)
+                from image_cache import get_image_cache
+                # Logo más grande y visible (redimensionado una sola vez y guardado en caché)
+                self.logo_image = get_image_cache().get_photo("logo.jpg", (100, 100), self.root)
                 
                 # Frame para el logo con borde elegante
                 logo_container = tk.Frame(left_panel, bg=self.colors['white'], relief='solid', bd=2)
@@ -467,24 +480,35 @@ class MainApplication:
     def open_user_management(self):
         """Abre el módulo de gestión de usuarios"""
         try:
-            UserManagementWindow(self.root)
+            from user_management import UserManagementWindow
+            self.window_manager.show('usuarios', UserManagementWindow)
         except Exception as e:
             messagebox.showerror("Error", f"Error al abrir gestión de usuarios: {str(e)}")
     
     def open_payment_registration(self):
         """Abre el módulo de registro de pagos"""
         try:
-            PaymentRegistrationWindow(self.root)
+            from payment_registration import PaymentRegistrationWindow
+            self.window_manager.show('pagos', PaymentRegistrationWindow)
         except Exception as e:
             messagebox.showerror("Error", f"Error al abrir registro de pagos: {str(e)}")
     
     def open_configuration(self):
         """Abre el módulo de configuración"""
         try:
-            ConfigurationWindow(self.root)
+            from configuration import ConfigurationWindow
+            self.window_manager.show('configuracion', ConfigurationWindow)
         except Exception as e:
             messagebox.showerror("Error", f"Error al abrir configuración: {str(e)}")
     
+    def open_bulk_charge(self):
+        """Abre la ventana de cargo masivo"""
+        try:
+            from bulk_charge_window import BulkChargeWindow
+            BulkChargeWindow(self.root)
+        except Exception as e:
+            messagebox.showerror("Error", f"Error al abrir cargo masivo: {str(e)}")
+    
     def show_reports_placeholder(self):
         """Muestra un placeholder para el módulo de reportes"""
         messagebox.showinfo(
@@ -495,7 +519,8 @@ class MainApplication:
             "• Estadísticas de ingresos\n" +
             "• Listados de usuarios morosos\n" +
             "• Gráficos de tendencias\n" +
-            "• Exportación a Excel/PDF"
+            "• Exportación a PDF\n\n" +
+            "La exportación a Excel/CSV ya está disponible en Sistema → Exportar Datos."
         )
     
     def show_main_window(self):
@@ -513,6 +538,20 @@ class MainApplication:
         except Exception as e:
             messagebox.showerror("Error", f"Error al abrir importador CSV: {str(e)}")
     
+    def open_export_window(self):
+        """Abre la ventana de exportación a Excel/CSV"""
+        if usa_servicio():
+            messagebox.showinfo(
+                "Exportar Datos",
+                "Esta terminal usa el servicio de red. Exporte los datos desde el equipo donde corre el servicio."
+            )
+            return
+        try:
+            from export_window import ExportWindow
+            ExportWindow(self.root)
+        except Exception as e:
+            messagebox.showerror("Error", f"Error al abrir exportación: {str(e)}")
+    
     def show_instructions(self):
         """Muestra las instrucciones del sistema"""
         instructions_window = tk.Toplevel(self.root)
@@ -618,6 +657,8 @@ INSTRUCCIONES DE USO - SISTEMA DE AGUA POTABLE
     def on_closing(self):
         """Maneja el cierre de la aplicación"""
         if messagebox.askokcancel("Salir", "¿Está seguro de que desea salir del sistema?"):
+            if self.backup_scheduler:
+                self.backup_scheduler.stop()
             self.root.destroy()
     
     def run(self):
@@ -628,6 +669,13 @@ INSTRUCCIONES DE USO - SISTEMA DE AGUA POTABLE
 def main():
     """Función principal de la aplicación"""
     try:
+        # Medición de consultas y monitor de la interfaz, solo si están
+        # configurados (ver query_stats.py y ui_monitor.py)
+        import query_stats
+        import ui_monitor
+        query_stats.activar_si_configurado()
+        ui_monitor.activar_si_configurado()
+        
         # Autenticar usuario
         if not authenticate():
             print("Autenticación fallida. Cerrando aplicación.")
@@ -635,6 +683,7 @@ def main():
         
         # Crear y ejecutar la aplicación principal
         app = MainApplication()
+        ui_monitor.iniciar_latido(app.root)
         app.run()
         
     except Exception as e:
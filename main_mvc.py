@@ -39,8 +39,7 @@ from tkinter import messagebox
 # Importar la vista de autenticación
 from views.auth_view import AuthView
 
-# Importar la vista principal
-from views.main_view import MainView
+# La vista principal (y todo lo que carga) se importa hasta después del login
 
 
 def main():
@@ -85,6 +84,8 @@ def main():
         # ===================================================================
         print("🏠 Cargando menú principal...")
         
+        from views.main_view import MainView
+        
         # Crear instancia de la vista principal
         # Esta vista mostrará el menú con todos los módulos del sistema
         main_view = MainView()
@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Migraciones del esquema de la base de datos
+
+La versión del esquema se guarda en PRAGMA user_version. Al abrir la base
+se lee esa versión una sola vez; si ya está al día no se ejecuta nada más.
+Si no, se aplican en orden las migraciones pendientes, cada una en su
+propia transacción junto con el nuevo número de versión.
+
+Para cambiar el esquema (tablas, columnas, índices) se agrega una función
+al final de MIGRACIONES con el siguiente número; nunca se modifican las
+que ya existen. Cada paso debe poder repetirse sin error (IF NOT EXISTS,
+INSERT OR IGNORE), porque las bases creadas antes de este módulo tienen
+user_version = 0 aunque ya tengan las tablas.
+"""
+
+import sqlite3
+from typing import Callable, List, Tuple
+
+from config.settings import DEFAULT_CONCEPTS, DEFAULT_MONTHLY_FEE, DEFAULT_PIN
+
+
+def _esquema_inicial(conn: sqlite3.Connection):
+    """Tablas del sistema y configuración inicial"""
+    # Tabla de usuarios
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS usuarios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            numero INTEGER UNIQUE NOT NULL,
+            nombre TEXT NOT NULL,
+            direccion TEXT,
+            telefono TEXT,
+            email TEXT,
+            estado TEXT DEFAULT 'Activo' CHECK (estado IN ('Activo', 'Cancelado')),
+            fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Tabla de configuración del sistema
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS configuracion (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            clave TEXT UNIQUE NOT NULL,
+            valor TEXT NOT NULL,
+            descripcion TEXT,
+            fecha_modificacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Tabla de conceptos de cobro
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS conceptos_cobro (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT UNIQUE NOT NULL,
+            precio REAL NOT NULL,
+            activo BOOLEAN DEFAULT 1,
+            fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Tabla de pagos
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS pagos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            usuario_id INTEGER NOT NULL,
+            fecha_pago TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            total REAL NOT NULL,
+            observaciones TEXT,
+            FOREIGN KEY (usuario_id) REFERENCES usuarios (id)
+        )
+    ''')
+
+    # Tabla detalle de pagos (mensualidades y otros conceptos)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS detalle_pagos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            pago_id INTEGER NOT NULL,
+            concepto TEXT NOT NULL,
+            mes INTEGER NULL,  -- NULL para conceptos que no son mensualidades
+            anio INTEGER NOT NULL,
+            precio REAL NOT NULL,
+            cantidad INTEGER DEFAULT 1,
+            FOREIGN KEY (pago_id) REFERENCES pagos (id)
+        )
+    ''')
+
+    # Configuración inicial (solo si no existe)
+    conn.execute('''
+        INSERT OR IGNORE INTO configuracion (clave, valor, descripcion)
+        VALUES ('cuota_mensual', ?, 'Cuota mensual del servicio de agua')
+    ''', (str(DEFAULT_MONTHLY_FEE),))
+
+    conn.execute('''
+        INSERT OR IGNORE INTO configuracion (clave, valor, descripcion)
+        VALUES ('pin_acceso', ?, 'PIN de acceso al sistema')
+    ''', (DEFAULT_PIN,))
+
+
+def _conceptos_predeterminados(conn: sqlite3.Connection):
+    """
+    Conceptos de cobro predeterminados de config.settings
+
+    database.py y models/database.py sembraban listas distintas (la primera
+    sin 'Reconexión'); esta migración deja ambas bases con la misma lista.
+    """
+    conn.executemany('''
+        INSERT OR IGNORE INTO conceptos_cobro (nombre, precio)
+        VALUES (?, ?)
+    ''', DEFAULT_CONCEPTS)
+
+
+def _indices_pagos(conn: sqlite3.Connection):
+    """Índices para el historial de pagos y el detalle de cada pago"""
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_pagos_usuario ON pagos (usuario_id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_detalle_pagos_pago ON detalle_pagos (pago_id)')
+
+
+def _versiones_tablas(conn: sqlite3.Connection):
+    """
+    Contador de cambios por tabla, mantenido por triggers
+
+    Permite saber con una sola consulta qué tablas cambiaron (desde esta u
+    otra aplicación) para refrescar solo los datos afectados.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS versiones_tablas (
+            tabla TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+
+    for tabla in ('usuarios', 'configuracion', 'conceptos_cobro', 'pagos', 'detalle_pagos'):
+        conn.execute('INSERT OR IGNORE INTO versiones_tablas (tabla) VALUES (?)', (tabla,))
+        for evento in ('INSERT', 'UPDATE', 'DELETE'):
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{tabla}_version_{evento.lower()}
+                AFTER {evento} ON {tabla}
+                BEGIN
+                    UPDATE versiones_tablas SET version = version + 1 WHERE tabla = '{tabla}';
+                END
+            ''')
+
+
+def _detalle_pagos_usuario(conn: sqlite3.Connection):
+    """
+    usuario_id en detalle_pagos y un mes pagado una sola vez por usuario
+
+    El índice único parcial sobre las mensualidades impide registrar dos
+    veces el mismo mes, sin importar desde dónde se registre el pago. El
+    trigger llena usuario_id cuando el INSERT no lo trae (código anterior),
+    y en ese caso el índice también se verifica.
+
+    Si la base ya tenía meses pagados dos veces, se conservan todos los
+    registros, pero los repetidos quedan con usuario_id NULL (fuera del
+    índice) y solo el primero cuenta como pagado.
+    """
+    columnas = [row[1] for row in conn.execute('PRAGMA table_info(detalle_pagos)')]
+    if 'usuario_id' not in columnas:
+        conn.execute('ALTER TABLE detalle_pagos ADD COLUMN usuario_id INTEGER REFERENCES usuarios (id)')
+
+    conn.execute('''
+        UPDATE detalle_pagos
+        SET usuario_id = (SELECT p.usuario_id FROM pagos p WHERE p.id = detalle_pagos.pago_id)
+        WHERE usuario_id IS NULL
+    ''')
+
+    conn.execute('''
+        UPDATE detalle_pagos SET usuario_id = NULL
+        WHERE mes IS NOT NULL AND id NOT IN (
+            SELECT MIN(id) FROM detalle_pagos
+            WHERE mes IS NOT NULL AND usuario_id IS NOT NULL
+            GROUP BY usuario_id, anio, mes
+        )
+    ''')
+
+    conn.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_detalle_pagos_mes_unico
+        ON detalle_pagos (usuario_id, anio, mes)
+        WHERE mes IS NOT NULL
+    ''')
+
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_detalle_pagos_usuario
+        AFTER INSERT ON detalle_pagos
+        WHEN NEW.usuario_id IS NULL
+        BEGIN
+            UPDATE detalle_pagos
+            SET usuario_id = (SELECT usuario_id FROM pagos WHERE id = NEW.pago_id)
+            WHERE id = NEW.id;
+        END
+    ''')
+
+
+# Columnas que guarda el registro de cambios de cada tabla sincronizable; las
+# referencias a otras tablas van por uid, que es igual en todas las sedes
+_DATOS_CAMBIO = {
+    'usuarios': """json_object(
+        'numero', {r}.numero, 'nombre', {r}.nombre, 'direccion', {r}.direccion,
+        'telefono', {r}.telefono, 'email', {r}.email, 'estado', {r}.estado,
+        'fecha_registro', {r}.fecha_registro)""",
+    'pagos': """json_object(
+        'usuario_uid', (SELECT uid FROM usuarios WHERE id = {r}.usuario_id),
+        'fecha_pago', {r}.fecha_pago, 'total', {r}.total,
+        'observaciones', {r}.observaciones)""",
+    'detalle_pagos': """json_object(
+        'pago_uid', (SELECT uid FROM pagos WHERE id = {r}.pago_id),
+        'concepto', {r}.concepto, 'mes', {r}.mes, 'anio', {r}.anio,
+        'precio', {r}.precio, 'cantidad', {r}.cantidad)""",
+}
+
+# uid de las filas que ya existían: se arma con el id y datos de la fila, así
+# dos copias hechas del mismo archivo reconocen como iguales las filas comunes
+_UID_EXISTENTES = {
+    'usuarios': "'usuario:' || id || ':' || numero || ':' || COALESCE(fecha_registro, '')",
+    'pagos': "'pago:' || id || ':' || usuario_id || ':' || COALESCE(fecha_pago, '')",
+    'detalle_pagos': "'detalle:' || id || ':' || pago_id || ':' || concepto",
+}
+
+# Origen y marca de tiempo de un cambio: los de la sede local, salvo mientras
+# sync_engine aplica cambios recibidos (entonces se conservan los originales).
+# La marca son milisegundos UTC y nunca es menor que la del último cambio de
+# la misma fila, aunque ese cambio venga de una sede con el reloj adelantado
+_ORIGEN_CAMBIO = """COALESCE((SELECT valor FROM sync_estado WHERE clave = 'origen'),
+                  (SELECT valor FROM configuracion WHERE clave = 'nodo_id'))"""
+_MARCA_CAMBIO = """COALESCE((SELECT valor FROM sync_estado WHERE clave = 'marca'),
+                  max(CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER),
+                      COALESCE((SELECT marca + 1 FROM cambios
+                                WHERE tabla = '{tabla}' AND uid = {r}.uid
+                                ORDER BY seq DESC LIMIT 1), 0)))"""
+
+
+def _registro_cambios(conn: sqlite3.Connection):
+    """
+    Registro de cambios (outbox) de usuarios, pagos y detalle_pagos
+
+    Cada fila recibe un uid global y cada alta, modificación o baja queda en
+    la tabla cambios con la sede de origen y una marca de tiempo. Así
+    sync_engine.py puede enviar a otra sede solo lo nuevo desde la última
+    sincronización (ver sync_pares).
+    """
+    conn.execute('''
+        INSERT OR IGNORE INTO configuracion (clave, valor, descripcion)
+        VALUES ('nodo_id', lower(hex(randomblob(8))), 'Identificador de esta sede para sincronizar')
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS cambios (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            tabla TEXT NOT NULL,
+            uid TEXT NOT NULL,
+            operacion TEXT NOT NULL CHECK (operacion IN ('upsert', 'delete')),
+            origen TEXT NOT NULL,
+            marca INTEGER NOT NULL,
+            datos TEXT
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_cambios_uid ON cambios (tabla, uid, seq)')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS sync_pares (
+            nodo TEXT PRIMARY KEY,
+            recibido INTEGER NOT NULL DEFAULT 0,
+            enviado INTEGER NOT NULL DEFAULT 0,
+            fecha TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS sync_estado (
+            clave TEXT PRIMARY KEY,
+            valor TEXT
+        )
+    ''')
+
+    for tabla, datos in _DATOS_CAMBIO.items():
+        columnas = [row[1] for row in conn.execute(f'PRAGMA table_info({tabla})')]
+        if 'uid' not in columnas:
+            conn.execute(f'ALTER TABLE {tabla} ADD COLUMN uid TEXT')
+
+        # Filas existentes: uid y un primer cambio con su estado actual
+        conn.execute(f'UPDATE {tabla} SET uid = {_UID_EXISTENTES[tabla]} WHERE uid IS NULL')
+        conn.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS idx_{tabla}_uid ON {tabla} (uid)')
+        conn.execute(f'''
+            INSERT INTO cambios (tabla, uid, operacion, origen, marca, datos)
+            SELECT '{tabla}', t.uid, 'upsert', {_ORIGEN_CAMBIO},
+                   {_MARCA_CAMBIO.format(tabla=tabla, r='t')}, {datos.format(r='t')}
+            FROM {tabla} t
+            WHERE NOT EXISTS (SELECT 1 FROM cambios c WHERE c.tabla = '{tabla}' AND c.uid = t.uid)
+            ORDER BY t.id
+        ''')
+
+        # Filas nuevas sin uid: se les asigna uno aleatorio (el UPDATE registra el cambio)
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{tabla}_uid
+            AFTER INSERT ON {tabla}
+            WHEN NEW.uid IS NULL
+            BEGIN
+                UPDATE {tabla} SET uid = lower(hex(randomblob(16))) WHERE id = NEW.id;
+            END
+        ''')
+
+        for evento in ('INSERT', 'UPDATE'):
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{tabla}_cambio_{evento.lower()}
+                AFTER {evento} ON {tabla}
+                WHEN NEW.uid IS NOT NULL
+                BEGIN
+                    INSERT INTO cambios (tabla, uid, operacion, origen, marca, datos)
+                    VALUES ('{tabla}', NEW.uid, 'upsert', {_ORIGEN_CAMBIO},
+                            {_MARCA_CAMBIO.format(tabla=tabla, r='NEW')},
+                            {datos.format(r='NEW')});
+                END
+            ''')
+
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{tabla}_cambio_delete
+            AFTER DELETE ON {tabla}
+            WHEN OLD.uid IS NOT NULL
+            BEGIN
+                INSERT INTO cambios (tabla, uid, operacion, origen, marca, datos)
+                VALUES ('{tabla}', OLD.uid, 'delete', {_ORIGEN_CAMBIO},
+                        {_MARCA_CAMBIO.format(tabla=tabla, r='OLD')}, NULL);
+            END
+        ''')
+
+
+def _tarifas(conn: sqlite3.Connection):
+    """
+    Historial de cuotas mensuales con el primer mes en que rige cada una
+
+    La cuota de configuracion pasa a ser la primera tarifa, vigente desde
+    siempre, para que los pagos y adeudos anteriores se calculen igual que
+    antes. Ver tarifas.py.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS tarifas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            anio INTEGER NOT NULL,
+            mes INTEGER NOT NULL CHECK (mes BETWEEN 1 AND 12),
+            cuota REAL NOT NULL CHECK (cuota >= 0),
+            fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (anio, mes)
+        )
+    ''')
+
+    fila = conn.execute("SELECT valor FROM configuracion WHERE clave = 'cuota_mensual'").fetchone()
+    try:
+        cuota = float(fila[0]) if fila and fila[0] else DEFAULT_MONTHLY_FEE
+    except ValueError:
+        cuota = DEFAULT_MONTHLY_FEE
+    conn.execute('INSERT OR IGNORE INTO tarifas (anio, mes, cuota) VALUES (1900, 1, ?)', (cuota,))
+
+    # Versión de la tabla, para que cada terminal recargue sus tarifas en memoria
+    conn.execute("INSERT OR IGNORE INTO versiones_tablas (tabla) VALUES ('tarifas')")
+    for evento in ('INSERT', 'UPDATE', 'DELETE'):
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_tarifas_version_{evento.lower()}
+            AFTER {evento} ON tarifas
+            BEGIN
+                UPDATE versiones_tablas SET version = version + 1 WHERE tabla = 'tarifas';
+            END
+        ''')
+
+
+# Migraciones en orden: (versión, descripción, función)
+MIGRACIONES: List[Tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, 'Esquema inicial', _esquema_inicial),
+    (2, 'Conceptos de cobro predeterminados', _conceptos_predeterminados),
+    (3, 'Índices de pagos', _indices_pagos),
+    (4, 'Versiones de tablas', _versiones_tablas),
+    (5, 'usuario_id en detalle_pagos y meses únicos', _detalle_pagos_usuario),
+    (6, 'Registro de cambios para sincronizar sedes', _registro_cambios),
+    (7, 'Tarifas con fecha de vigencia', _tarifas),
+]
+
+# Versión del esquema que entiende esta aplicación
+ESQUEMA_VERSION = MIGRACIONES[-1][0]
+
+
+def obtener_version(conn: sqlite3.Connection) -> int:
+    """Lee PRAGMA user_version"""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def aplicar_migraciones(db_path: str, hasta: int = ESQUEMA_VERSION) -> int:
+    """
+    Lleva la base de datos a ESQUEMA_VERSION
+
+    Cuando la base ya está al día solo se lee PRAGMA user_version.
+
+    Args:
+        db_path: Ruta al archivo de la base de datos SQLite
+        hasta: Detenerse en esta versión (para cargas masivas que se hacen
+               antes de crear los triggers por fila)
+
+    Returns:
+        int: Versión del esquema después de migrar
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+
+    try:
+        version = obtener_version(conn)
+        if version >= hasta:
+            return version
+
+        for numero, descripcion, migracion in MIGRACIONES:
+            if numero <= version:
+                continue
+            if numero > hasta:
+                break
+
+            try:
+                # BEGIN IMMEDIATE: si otro proceso está migrando, se espera a que
+                # termine y se vuelve a leer la versión dentro de la transacción
+                conn.execute('BEGIN IMMEDIATE')
+                version = obtener_version(conn)
+                if numero <= version:
+                    conn.execute('COMMIT')
+                    continue
+
+                migracion(conn)
+                conn.execute(f'PRAGMA user_version = {numero}')
+                conn.execute('COMMIT')
+                version = numero
+            except sqlite3.Error as e:
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+                print(f"Error en la migración {numero} ({descripcion}): {e}")
+                break
+
+        return version
+    finally:
+        conn.close()
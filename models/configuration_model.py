@@ -6,7 +6,7 @@ CONFIGURATION MODEL - MODELO DE CONFIGURACIÓN
 =============================================================================
 
 Este módulo maneja toda la configuración del sistema:
-- Cuota mensual
+- Cuota mensual (tarifas con fecha de vigencia)
 - PIN de acceso
 - Conceptos de cobro
 - Información del comité
@@ -14,8 +14,10 @@ Este módulo maneja toda la configuración del sistema:
 =============================================================================
 """
 
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from .database import get_db_manager
+from records import Concepto, record_factory
+from tarifas import tarifas_vigentes
 
 
 class ConfigurationModel:
@@ -23,9 +25,9 @@ class ConfigurationModel:
     Modelo para la gestión de configuración del sistema.
     """
     
-    def __init__(self):
-        """Inicializa el modelo de configuración."""
-        self.db = get_db_manager()
+    def __init__(self, db=None):
+        """Inicializa el modelo de configuración (con `db` o el gestor global)."""
+        self.db = db or get_db_manager()
     
     # =============================================================================
     # CONFIGURACIÓN GENERAL
@@ -82,6 +84,64 @@ class ConfigurationModel:
         finally:
             conn.close()
     
+    def obtener_tarifas(self) -> List[Tuple[int, int, float]]:
+        """
+        Obtiene el historial de cuotas mensuales.
+        
+        Returns:
+            Lista de (anio, mes desde el que rige, cuota), de la más antigua
+            a la más reciente
+        """
+        conn = self.db.get_connection()
+        
+        try:
+            return tarifas_vigentes(conn, self.db.db_path).filas()
+        
+        finally:
+            conn.close()
+    
+    def agregar_tarifa(self, cuota: float, anio: int, mes: int) -> bool:
+        """
+        Fija la cuota mensual a partir de un mes.
+        
+        Los meses anteriores conservan su cuota; si ya había una tarifa desde
+        ese mes, se reemplaza. cuota_mensual queda con la cuota del mes en curso.
+        
+        Args:
+            cuota: Nueva cuota mensual
+            anio: Año del primer mes en que se cobra
+            mes: Primer mes en que se cobra (1-12)
+        
+        Returns:
+            True si se guardó correctamente
+        """
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('''
+                INSERT INTO tarifas (anio, mes, cuota) VALUES (?, ?, ?)
+                ON CONFLICT (anio, mes) DO UPDATE
+                SET cuota = excluded.cuota, fecha_registro = CURRENT_TIMESTAMP
+            ''', (anio, mes, cuota))
+            
+            cursor.execute('''
+                UPDATE configuracion
+                SET valor = ?, fecha_modificacion = CURRENT_TIMESTAMP
+                WHERE clave = 'cuota_mensual'
+            ''', (str(tarifas_vigentes(conn, self.db.db_path).cuota_actual()),))
+            
+            conn.commit()
+            return True
+        
+        except Exception as e:
+            print(f"Error al guardar la tarifa: {e}")
+            conn.rollback()
+            return False
+        
+        finally:
+            conn.close()
+    
     def verificar_pin(self, pin: str) -> bool:
         """
         Verifica si el PIN ingresado es correcto.
@@ -99,7 +159,7 @@ class ConfigurationModel:
     # CONCEPTOS DE COBRO
     # =============================================================================
     
-    def obtener_conceptos_cobro(self, solo_activos: bool = True) -> List[Dict]:
+    def obtener_conceptos_cobro(self, solo_activos: bool = True) -> List[Concepto]:
         """
         Obtiene todos los conceptos de cobro.
         
@@ -113,6 +173,7 @@ class ConfigurationModel:
         cursor = conn.cursor()
         
         try:
+            cursor.row_factory = record_factory(Concepto)
             if solo_activos:
                 cursor.execute('''
                     SELECT * FROM conceptos_cobro 
@@ -124,8 +185,7 @@ class ConfigurationModel:
                     'SELECT * FROM conceptos_cobro ORDER BY nombre'
                 )
             
-            rows = cursor.fetchall()
-            return [dict(row) for row in rows]
+            return cursor.fetchall()
             
         finally:
             conn.close()
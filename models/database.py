@@ -28,6 +28,8 @@ import sqlite3
 import os
 from datetime import datetime
 from typing import List, Dict, Optional, Tuple
+from migrations import aplicar_migraciones
+import query_stats
 
 
 class DatabaseManager:
@@ -60,8 +62,8 @@ class DatabaseManager:
         Returns:
             sqlite3.Connection: Objeto de conexión a la base de datos
         """
-        # Crear la conexión
-        conn = sqlite3.connect(self.db_path)
+        # Crear la conexión (medida si query_stats está activo)
+        conn = sqlite3.connect(self.db_path, factory=query_stats.FABRICA_CONEXION)
         
         # Configurar row_factory para que los resultados sean diccionarios
         # Esto facilita el acceso a los datos por nombre de columna
@@ -71,127 +73,17 @@ class DatabaseManager:
     
     def init_database(self):
         """
-        Inicializa las tablas de la base de datos si no existen.
+        Crea las tablas de la base de datos o las actualiza a la versión actual.
         
         Este método se ejecuta automáticamente al crear una instancia de
-        DatabaseManager y crea todas las tablas necesarias para el sistema.
+        DatabaseManager. El esquema se define una sola vez en migrations.py
+        (compartido con database.py) y se versiona con PRAGMA user_version:
+        si la base ya está al día, solo se lee ese número.
         
-        SEGURIDAD: Utiliza CREATE TABLE IF NOT EXISTS para no sobrescribir
-        datos existentes.
+        SEGURIDAD: Las migraciones usan CREATE TABLE IF NOT EXISTS e
+        INSERT OR IGNORE para no sobrescribir datos existentes.
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        try:
-            # ====== TABLA DE USUARIOS ======
-            # Almacena la información de todos los usuarios del servicio
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS usuarios (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,  -- ID único del usuario
-                    numero INTEGER UNIQUE NOT NULL,         -- Número de usuario (debe ser único)
-                    nombre TEXT NOT NULL,                   -- Nombre completo del usuario
-                    direccion TEXT,                         -- Dirección física
-                    telefono TEXT,                          -- Número de teléfono
-                    email TEXT,                             -- Correo electrónico
-                    estado TEXT DEFAULT 'Activo' CHECK (estado IN ('Activo', 'Cancelado')),  -- Estado del usuario
-                    fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP  -- Fecha de registro automática
-                )
-            ''')
-            
-            # ====== TABLA DE CONFIGURACIÓN ======
-            # Almacena parámetros configurables del sistema
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS configuracion (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    clave TEXT UNIQUE NOT NULL,             -- Nombre de la configuración (ej: 'cuota_mensual')
-                    valor TEXT NOT NULL,                    -- Valor de la configuración
-                    descripcion TEXT,                       -- Descripción de qué hace esta configuración
-                    fecha_modificacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP  -- Última modificación
-                )
-            ''')
-            
-            # ====== TABLA DE CONCEPTOS DE COBRO ======
-            # Almacena los conceptos adicionales que se pueden cobrar
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS conceptos_cobro (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nombre TEXT UNIQUE NOT NULL,            -- Nombre del concepto (ej: 'Multa por desperdicio')
-                    precio REAL NOT NULL,                   -- Precio del concepto
-                    activo BOOLEAN DEFAULT 1,               -- Si el concepto está activo o no
-                    fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # ====== TABLA DE PAGOS ======
-            # Almacena el encabezado de cada pago realizado
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS pagos (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    usuario_id INTEGER NOT NULL,            -- ID del usuario que realizó el pago
-                    fecha_pago TIMESTAMP DEFAULT CURRENT_TIMESTAMP,  -- Fecha y hora del pago
-                    total REAL NOT NULL,                    -- Monto total del pago
-                    observaciones TEXT,                     -- Observaciones opcionales
-                    FOREIGN KEY (usuario_id) REFERENCES usuarios (id)  -- Relación con tabla usuarios
-                )
-            ''')
-            
-            # ====== TABLA DE DETALLE DE PAGOS ======
-            # Almacena el detalle de cada pago (qué meses o conceptos se pagaron)
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS detalle_pagos (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    pago_id INTEGER NOT NULL,               -- ID del pago principal
-                    concepto TEXT NOT NULL,                 -- Descripción del concepto
-                    mes INTEGER NULL,                       -- Mes pagado (NULL si no es mensualidad)
-                    anio INTEGER NOT NULL,                  -- Año del pago
-                    precio REAL NOT NULL,                   -- Precio unitario
-                    cantidad INTEGER DEFAULT 1,             -- Cantidad (normalmente 1)
-                    FOREIGN KEY (pago_id) REFERENCES pagos (id)  -- Relación con tabla pagos
-                )
-            ''')
-            
-            # ====== INSERTAR CONFIGURACIÓN INICIAL ======
-            # Estos valores solo se insertan si no existen (INSERT OR IGNORE)
-            
-            # Cuota mensual por defecto: $50.00
-            cursor.execute('''
-                INSERT OR IGNORE INTO configuracion (clave, valor, descripcion)
-                VALUES ('cuota_mensual', '50.0', 'Cuota mensual del servicio de agua')
-            ''')
-            
-            # PIN de acceso por defecto: 1234 (DEBES CAMBIARLO!)
-            cursor.execute('''
-                INSERT OR IGNORE INTO configuracion (clave, valor, descripcion)
-                VALUES ('pin_acceso', '1234', 'PIN de acceso al sistema')
-            ''')
-            
-            # ====== INSERTAR CONCEPTOS DE COBRO PREDETERMINADOS ======
-            # Lista de conceptos comunes en comités de agua
-            conceptos_default = [
-                ('Cooperación Anual', 100.0),
-                ('Toma Nueva', 500.0),
-                ('Multa por Inasistencia', 25.0),
-                ('Multa por Desperdicio', 75.0),
-                ('Reconexión', 150.0),
-            ]
-            
-            # Insertar cada concepto (solo si no existe)
-            for concepto, precio in conceptos_default:
-                cursor.execute('''
-                    INSERT OR IGNORE INTO conceptos_cobro (nombre, precio)
-                    VALUES (?, ?)
-                ''', (concepto, precio))
-            
-            # Confirmar todos los cambios
-            conn.commit()
-            
-        except sqlite3.Error as e:
-            # Si hay algún error, revertir todos los cambios
-            print(f"Error al inicializar la base de datos: {e}")
-            conn.rollback()
-        finally:
-            # Siempre cerrar la conexión
-            conn.close()
+        aplicar_migraciones(self.db_path)
     
     # =============================================================================
     # MÉTODOS DE UTILIDAD GENERAL
@@ -272,3 +164,21 @@ def get_db_manager() -> DatabaseManager:
     
     # Devolver la instancia (nueva o existente)
     return _db_manager
+
+
+def reiniciar_db_manager() -> DatabaseManager:
+    """
+    Vuelve a crear la instancia global del gestor.
+    
+    Se usa después de restaurar un respaldo para que los modelos trabajen
+    con el archivo nuevo sin reiniciar la aplicación.
+    
+    Returns:
+        DatabaseManager: La nueva instancia del gestor
+    """
+    global _db_manager
+    
+    db_path = _db_manager.db_path if _db_manager is not None else "agua_potable.db"
+    _db_manager = DatabaseManager(db_path)
+    
+    return _db_manager
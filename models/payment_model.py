@@ -14,8 +14,13 @@ Este módulo contiene la lógica de negocio relacionada con los pagos:
 =============================================================================
 """
 
+import sqlite3
 from typing import List, Dict, Tuple, Optional
 from .database import get_db_manager
+import database
+from database import MesesYaPagadosError
+from records import Pago, DetallePago, record_factory
+from tarifas import tarifas_vigentes
 
 
 class PaymentModel:
@@ -23,9 +28,9 @@ class PaymentModel:
     Modelo para la gestión de pagos del sistema.
     """
     
-    def __init__(self):
-        """Inicializa el modelo de pagos."""
-        self.db = get_db_manager()
+    def __init__(self, db=None):
+        """Inicializa el modelo de pagos (con `db` o el gestor global)."""
+        self.db = db or get_db_manager()
     
     def obtener_pagos_usuario_anio(self, usuario_id: int, anio: int) -> List[int]:
         """
@@ -48,11 +53,11 @@ class PaymentModel:
         
         try:
             # Buscar todos los meses pagados por el usuario en el año
+            # (usa el índice único idx_detalle_pagos_mes_unico)
             cursor.execute('''
-                SELECT DISTINCT mes 
-                FROM detalle_pagos dp
-                JOIN pagos p ON dp.pago_id = p.id
-                WHERE p.usuario_id = ? AND dp.anio = ? AND dp.mes IS NOT NULL
+                SELECT mes 
+                FROM detalle_pagos
+                WHERE usuario_id = ? AND anio = ? AND mes IS NOT NULL
                 ORDER BY mes
             ''', (usuario_id, anio))
             
@@ -84,6 +89,10 @@ class PaymentModel:
         Returns:
             ID del pago registrado, 0 si hubo error
             
+        Raises:
+            MesesYaPagadosError: Si alguno de los meses ya estaba pagado (no se
+                                 registra nada); indica todos los meses repetidos
+            
         Ejemplo:
             >>> payment_model = PaymentModel()
             >>> pago_id = payment_model.registrar_pago(
@@ -94,19 +103,17 @@ class PaymentModel:
             >>>     observaciones="Pago con retraso"
             >>> )
         """
+        meses_pagados = sorted(set(meses_pagados))
         conn = self.db.get_connection()
         cursor = conn.cursor()
         
         try:
-            # 1. Obtener la cuota mensual actual
-            cursor.execute(
-                "SELECT valor FROM configuracion WHERE clave = 'cuota_mensual'"
-            )
-            result = cursor.fetchone()
-            cuota_mensual = float(result[0]) if result else 50.0
+            # 1. Obtener la cuota de cada mes (tarifa vigente en ese mes)
+            tarifas = tarifas_vigentes(conn, self.db.db_path)
+            cuotas = {mes: tarifas.cuota(anio, mes) for mes in meses_pagados}
             
             # 2. Calcular el total del pago
-            total = len(meses_pagados) * cuota_mensual
+            total = sum(cuotas.values())
             if conceptos_adicionales:
                 total += sum(precio for _, precio in conceptos_adicionales)
             
@@ -119,26 +126,37 @@ class PaymentModel:
             # Obtener el ID del pago recién creado
             pago_id = cursor.lastrowid
             
-            # 4. Insertar los detalles de mensualidades
+            # 4. Insertar los detalles de mensualidades; el índice único rechaza
+            #    los meses ya pagados y se revisan todos para reportarlos juntos
+            meses_repetidos = []
             for mes in meses_pagados:
-                cursor.execute('''
-                    INSERT INTO detalle_pagos (pago_id, concepto, mes, anio, precio)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (pago_id, 'Mensualidad', mes, anio, cuota_mensual))
+                try:
+                    cursor.execute('''
+                        INSERT INTO detalle_pagos (pago_id, usuario_id, concepto, mes, anio, precio)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                    ''', (pago_id, usuario_id, 'Mensualidad', mes, anio, cuotas[mes]))
+                except sqlite3.IntegrityError as e:
+                    if 'UNIQUE' not in str(e):
+                        raise
+                    meses_repetidos.append(mes)
+            
+            if meses_repetidos:
+                conn.rollback()
+                raise MesesYaPagadosError(anio, meses_repetidos)
             
             # 5. Insertar los conceptos adicionales
             if conceptos_adicionales:
                 for concepto, precio in conceptos_adicionales:
                     cursor.execute('''
-                        INSERT INTO detalle_pagos (pago_id, concepto, mes, anio, precio)
-                        VALUES (?, ?, NULL, ?, ?)
-                    ''', (pago_id, concepto, anio, precio))
+                        INSERT INTO detalle_pagos (pago_id, usuario_id, concepto, mes, anio, precio)
+                        VALUES (?, ?, ?, NULL, ?, ?)
+                    ''', (pago_id, usuario_id, concepto, anio, precio))
             
             # 6. Confirmar toda la transacción
             conn.commit()
             return pago_id
             
-        except Exception as e:
+        except sqlite3.Error as e:
             print(f"Error al registrar pago: {e}")
             conn.rollback()
             return 0
@@ -146,7 +164,31 @@ class PaymentModel:
         finally:
             conn.close()
     
-    def obtener_historial_pagos_usuario(self, usuario_id: int) -> List[Dict]:
+    def registrar_cargo_masivo(self, concepto_id: int, filtro: Dict = None, anio: int = None,
+                               observaciones: str = "", solo_vista_previa: bool = False) -> Dict:
+        """
+        Registra un concepto de cobro a todos los usuarios que cumplan el filtro.
+        
+        Usa la misma implementación que database.DatabaseManager, con las
+        conexiones de este gestor (las del servicio HTTP).
+        
+        Args:
+            concepto_id: ID del concepto en conceptos_cobro
+            filtro: Filtro de usuarios (ver database.condicion_usuarios); por
+                    omisión todos los usuarios activos
+            anio: Año del cargo (por omisión el actual)
+            observaciones: Observaciones de cada pago
+            solo_vista_previa: Solo contar usuarios y total, sin registrar nada
+            
+        Returns:
+            Dict: {'concepto', 'precio', 'usuarios', 'total', 'registrado'},
+                  vacío si hay error
+        """
+        return database.DatabaseManager.registrar_cargo_masivo(
+            self.db, concepto_id, filtro, anio, observaciones, solo_vista_previa
+        )
+    
+    def obtener_historial_pagos_usuario(self, usuario_id: int) -> List[Pago]:
         """
         Obtiene el historial completo de pagos de un usuario.
         
@@ -161,6 +203,7 @@ class PaymentModel:
         
         try:
             # Obtener todos los pagos del usuario
+            cursor.row_factory = record_factory(Pago)
             cursor.execute('''
                 SELECT p.*, u.nombre, u.numero
                 FROM pagos p
@@ -169,26 +212,34 @@ class PaymentModel:
                 ORDER BY p.fecha_pago DESC
             ''', (usuario_id,))
             
-            rows = cursor.fetchall()
-            pagos = [dict(row) for row in rows]
-            
-            # Para cada pago, obtener sus detalles
+            pagos = cursor.fetchall()
+            por_pago = {}
             for pago in pagos:
-                cursor.execute('''
-                    SELECT * FROM detalle_pagos 
-                    WHERE pago_id = ?
-                    ORDER BY mes
-                ''', (pago['id'],))
-                
-                detalles = cursor.fetchall()
-                pago['detalles'] = [dict(detalle) for detalle in detalles]
+                pago.detalles = []
+                por_pago[pago.id] = pago.detalles
+            
+            # Obtener los detalles de todos los pagos en una sola consulta
+            cursor = conn.cursor()
+            cursor.row_factory = record_factory(DetallePago)
+            cursor.execute('''
+                SELECT dp.* FROM detalle_pagos dp
+                JOIN pagos p ON dp.pago_id = p.id
+                WHERE p.usuario_id = ?
+                ORDER BY dp.pago_id, dp.mes
+            ''', (usuario_id,))
+            
+            for detalle in cursor:
+                # Un pago registrado entre las dos consultas no está en la lista
+                detalles = por_pago.get(detalle.pago_id)
+                if detalles is not None:
+                    detalles.append(detalle)
             
             return pagos
             
         finally:
             conn.close()
     
-    def obtener_detalle_pago(self, pago_id: int) -> Dict:
+    def obtener_detalle_pago(self, pago_id: int) -> Pago:
         """
         Obtiene el detalle completo de un pago específico.
         
@@ -205,6 +256,7 @@ class PaymentModel:
         
         try:
             # Obtener información del pago y usuario
+            cursor.row_factory = record_factory(Pago)
             cursor.execute('''
                 SELECT p.*, u.nombre, u.numero, u.direccion
                 FROM pagos p
@@ -212,21 +264,20 @@ class PaymentModel:
                 WHERE p.id = ?
             ''', (pago_id,))
             
-            pago_row = cursor.fetchone()
-            if not pago_row:
+            pago = cursor.fetchone()
+            if not pago:
                 return {}
             
-            pago = dict(pago_row)
-            
             # Obtener detalles del pago
+            cursor = conn.cursor()
+            cursor.row_factory = record_factory(DetallePago)
             cursor.execute('''
                 SELECT * FROM detalle_pagos 
                 WHERE pago_id = ?
                 ORDER BY mes, concepto
             ''', (pago_id,))
             
-            detalles = cursor.fetchall()
-            pago['detalles'] = [dict(detalle) for detalle in detalles]
+            pago.detalles = cursor.fetchall()
             
             return pago
             
@@ -24,6 +24,8 @@ de acceso a datos relacionada con usuarios.
 
 from typing import List, Dict, Optional
 from .database import get_db_manager
+from database import condicion_usuarios
+from records import Usuario, record_factory
 
 
 class UserModel:
@@ -34,14 +36,17 @@ class UserModel:
     con usuarios sin exponer los detalles de implementación de la base de datos.
     """
     
-    def __init__(self):
+    def __init__(self, db=None):
         """
         Inicializa el modelo de usuarios.
         
         Obtiene una referencia al gestor de base de datos para realizar
         todas las operaciones necesarias.
+        
+        Args:
+            db: Gestor de base de datos a usar (por defecto el global)
         """
-        self.db = get_db_manager()
+        self.db = db or get_db_manager()
     
     # =============================================================================
     # MÉTODOS DE CREACIÓN
@@ -130,7 +135,7 @@ class UserModel:
     # MÉTODOS DE BÚSQUEDA
     # =============================================================================
     
-    def buscar_usuario_por_numero(self, numero: int) -> Optional[Dict]:
+    def buscar_usuario_por_numero(self, numero: int) -> Optional[Usuario]:
         """
         Busca un usuario específico por su número.
         
@@ -138,8 +143,8 @@ class UserModel:
             numero (int): Número del usuario a buscar
             
         Returns:
-            Optional[Dict]: Diccionario con los datos del usuario si se encuentra,
-                           None si no existe
+            Optional[Usuario]: Registro con los datos del usuario si se encuentra,
+                              None si no existe
                            
         Ejemplo:
             >>> user_model = UserModel()
@@ -151,16 +156,15 @@ class UserModel:
         cursor = conn.cursor()
         
         try:
+            # Cada fila se convierte en un registro Usuario (acceso como diccionario)
+            cursor.row_factory = record_factory(Usuario)
             cursor.execute('SELECT * FROM usuarios WHERE numero = ?', (numero,))
-            row = cursor.fetchone()
-            
-            # Si se encontró el usuario, convertir a diccionario
-            return dict(row) if row else None
+            return cursor.fetchone()
             
         finally:
             conn.close()
     
-    def buscar_usuarios_por_nombre(self, nombre: str) -> List[Dict]:
+    def buscar_usuarios_por_nombre(self, nombre: str) -> List[Usuario]:
         """
         Busca usuarios por nombre (búsqueda parcial).
         
@@ -171,7 +175,7 @@ class UserModel:
             nombre (str): Texto a buscar en los nombres
             
         Returns:
-            List[Dict]: Lista de usuarios que coinciden con la búsqueda
+            List[Usuario]: Lista de usuarios que coinciden con la búsqueda
             
         Ejemplo:
             >>> user_model = UserModel()
@@ -185,21 +189,19 @@ class UserModel:
         try:
             # El símbolo % permite búsqueda parcial
             # Ejemplo: "Juan" encontrará "Juan Pérez", "María Juan", etc.
+            cursor.row_factory = record_factory(Usuario)
             cursor.execute('''
                 SELECT * FROM usuarios 
                 WHERE nombre LIKE ? 
                 ORDER BY nombre
             ''', (f'%{nombre}%',))
             
-            rows = cursor.fetchall()
-            
-            # Convertir todas las filas a diccionarios
-            return [dict(row) for row in rows]
+            return cursor.fetchall()
             
         finally:
             conn.close()
     
-    def obtener_todos_usuarios(self, solo_activos: bool = False) -> List[Dict]:
+    def obtener_todos_usuarios(self, solo_activos: bool = False) -> List[Usuario]:
         """
         Obtiene todos los usuarios del sistema.
         
@@ -208,7 +210,7 @@ class UserModel:
                                 Si es False, devuelve todos los usuarios
             
         Returns:
-            List[Dict]: Lista de todos los usuarios
+            List[Usuario]: Lista de todos los usuarios
             
         Ejemplo:
             >>> user_model = UserModel()
@@ -221,6 +223,7 @@ class UserModel:
         cursor = conn.cursor()
         
         try:
+            cursor.row_factory = record_factory(Usuario)
             if solo_activos:
                 # Solo usuarios con estado 'Activo'
                 cursor.execute('''
@@ -232,8 +235,7 @@ class UserModel:
                 # Todos los usuarios
                 cursor.execute('SELECT * FROM usuarios ORDER BY numero')
             
-            rows = cursor.fetchall()
-            return [dict(row) for row in rows]
+            return cursor.fetchall()
             
         finally:
             conn.close()
@@ -321,3 +323,59 @@ class UserModel:
         
         # Usar el método general de actualización
         return self.actualizar_usuario(usuario_id, estado=estado)
+    
+    def cambiar_estado_usuarios(self, estado: str, filtro: Dict = None, ids: List[int] = None,
+                                solo_vista_previa: bool = False) -> int:
+        """
+        Cambia el estado de varios usuarios con un solo UPDATE.
+        
+        Args:
+            estado (str): Nuevo estado ('Activo' o 'Cancelado')
+            filtro (dict, opcional): Filtro de usuarios (ver database.condicion_usuarios)
+            ids (list, opcional): IDs de usuario (se combinan con el filtro)
+            solo_vista_previa (bool): Solo contar cuántos usuarios cambiarían
+            
+        Returns:
+            int: Usuarios que cambiaron (o cambiarían) de estado, -1 si hay error
+            
+        Ejemplo:
+            >>> user_model = UserModel()
+            >>> # Cancelar a todos los usuarios del 100 al 150
+            >>> user_model.cambiar_estado_usuarios('Cancelado', {'numero_desde': 100, 'numero_hasta': 150})
+        """
+        if estado not in ['Activo', 'Cancelado']:
+            return -1
+        
+        filtro = dict(filtro or {})
+        if ids is not None:
+            filtro['ids'] = ids
+        if not filtro:
+            return 0  # Sin filtro ni IDs no se cambia a todos por accidente
+        
+        condicion, parametros = condicion_usuarios(filtro)
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            if solo_vista_previa:
+                cursor.execute(f'''
+                    SELECT COUNT(*) FROM usuarios u
+                    WHERE u.estado != ? AND {condicion}
+                ''', [estado] + parametros)
+                return cursor.fetchone()[0]
+            
+            cursor.execute(f'''
+                UPDATE usuarios SET estado = ?
+                WHERE estado != ? AND id IN (SELECT u.id FROM usuarios u WHERE {condicion})
+            ''', [estado, estado] + parametros)
+            
+            conn.commit()
+            return cursor.rowcount
+            
+        except Exception as e:
+            print(f"Error al cambiar estado de usuarios: {e}")
+            conn.rollback()
+            return -1
+            
+        finally:
+            conn.close()
@@ -6,7 +6,8 @@ Módulo de registro de pagos para el sistema de agua potable
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-from database import get_db_manager
+from database import get_db_manager, MesesYaPagadosError
+from tarifas import Tarifas
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional
 
@@ -30,9 +31,44 @@ class PaymentRegistrationWindow:
         self.selected_months = []
         self.additional_concepts = []
         self.month_buttons = {}
+        self.tarifas = Tarifas([])
+        self.on_close = None  # Lo asigna WindowManager para reutilizar la ventana
         
         # Configurar la interfaz
         self.setup_ui()
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+    
+    def close(self):
+        """Cierra la ventana (si la administra WindowManager, solo se oculta)"""
+        if self.on_close:
+            self.on_close()
+        else:
+            self.root.destroy()
+    
+    def refresh_data(self, tablas):
+        """Recarga solo lo que depende de las tablas que cambiaron"""
+        if tablas & {'configuracion', 'tarifas'}:
+            self.update_monthly_fee_display()
+            self.update_totals()
+        
+        if 'conceptos_cobro' in tablas:
+            self.load_available_concepts()
+        
+        if self.current_user and tablas & {'usuarios', 'pagos', 'detalle_pagos'}:
+            db = get_db_manager()
+            user = db.buscar_usuario_por_numero(self.current_user['numero'])
+            if not user or user['id'] != self.current_user['id'] or user['estado'] != 'Activo':
+                self.clear_all()
+                return
+            
+            self.current_user = user
+            self.load_paid_months()
+            # Los meses que alguien más pagó ya no se pueden seleccionar
+            if any(m in self.paid_months for m in self.selected_months):
+                self.selected_months = [m for m in self.selected_months if m not in self.paid_months]
+                self.update_month_buttons()
+                self.update_totals()
+                self.update_payment_button_state()
     
     def setup_ui(self):
         """Configura la interfaz de usuario"""
@@ -490,7 +526,7 @@ class PaymentRegistrationWindow:
         close_btn = tk.Button(
             buttons_frame,
             text="Cerrar",
-            command=self.root.destroy,
+            command=self.close,
             bg='#e74c3c',
             fg='white',
             font=('Arial', 12),
@@ -761,20 +797,21 @@ class PaymentRegistrationWindow:
         """Actualiza la visualización de la cuota mensual"""
         try:
             db = get_db_manager()
-            monthly_fee = db.obtener_configuracion('cuota_mensual')
-            monthly_fee = float(monthly_fee) if monthly_fee else 50.0
-            
-            self.monthly_fee_label.config(text=f"Cuota mensual: ${monthly_fee:.2f}")
-            self.monthly_fee = monthly_fee
-            
+            self.tarifas = Tarifas(db.obtener_tarifas())
         except Exception as e:
-            self.monthly_fee = 50.0
-            self.monthly_fee_label.config(text="Cuota mensual: $50.00")
+            self.tarifas = Tarifas([])
+        
+        self.monthly_fee = self.tarifas.cuota_actual()
+        self.monthly_fee_label.config(text=f"Cuota mensual: ${self.monthly_fee:.2f}")
+    
+    def monthly_total(self) -> float:
+        """Total de los meses seleccionados, cada uno con la tarifa de su mes"""
+        return sum(self.tarifas.cuota(self.current_year, mes) for mes in self.selected_months)
     
     def update_totals(self):
         """Actualiza los totales de pago"""
         # Total mensualidades
-        monthly_total = len(self.selected_months) * self.monthly_fee
+        monthly_total = self.monthly_total()
         self.monthly_total_label.config(text=f"Mensualidades ({len(self.selected_months)} meses): ${monthly_total:.2f}")
         
         # Total conceptos adicionales
@@ -807,7 +844,7 @@ class PaymentRegistrationWindow:
             return
         
         # Confirmar pago
-        monthly_total = len(self.selected_months) * self.monthly_fee
+        monthly_total = self.monthly_total()
         concepts_total = sum(price for _, price in self.additional_concepts)
         total = monthly_total + concepts_total
         
@@ -862,6 +899,10 @@ TOTAL A PAGAR: ${total:.2f}"""
             else:
                 messagebox.showerror("Error", "No se pudo registrar el pago")
                 
+        except MesesYaPagadosError as e:
+            # Otro equipo o una importación los pagó después de cargar la pantalla
+            messagebox.showwarning("Meses ya pagados", f"No se registró el pago.\n\n{e}")
+            self.refresh_data({'pagos'})
         except Exception as e:
             messagebox.showerror("Error", f"Error al procesar el pago: {str(e)}")
     
@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Medición de consultas SQL (opcional)
+
+Con la medición activa, las conexiones de DatabaseManager registran cada
+consulta agrupada por su forma (el SQL sin valores): cuántas veces se
+ejecutó, errores, filas devueltas y latencias p50/p95/p99. Los métodos
+públicos de los gestores y modelos se envuelven para medir también su
+duración y saber qué método emitió cada consulta. Las consultas que tardan
+más de SLOW_QUERY_MS se anotan, con sus valores, en SLOW_QUERY_LOG.
+
+Desactivada (lo normal) no hay envolturas ni conexiones especiales: el
+único costo es leer FABRICA_CONEXION al abrir cada conexión.
+
+Se activa con QUERY_STATS_ENABLED = True en config/settings.py o con la
+variable de entorno AGUA_QUERY_STATS=1. Al cerrar la aplicación las
+estadísticas se escriben en QUERY_STATS_FILE.
+
+Uso:
+    import query_stats
+    query_stats.activar()
+    ...
+    print(query_stats.volcar_estadisticas())
+"""
+
+import atexit
+import functools
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from config.settings import (
+    QUERY_STATS_ENABLED, QUERY_STATS_FILE, SLOW_QUERY_LOG, SLOW_QUERY_MS
+)
+
+# Clase de conexión que usan los get_connection(); cambia al activar
+FABRICA_CONEXION = sqlite3.Connection
+
+# Latencias que se conservan por consulta o método para los percentiles
+MUESTRAS_MAXIMAS = 5000
+
+_SIN_METODO = '(sin método)'
+
+
+# === FORMA DE LAS CONSULTAS ===
+
+_ESPACIOS = re.compile(r'\s+')
+_CADENAS = re.compile(r"'(?:[^']|'')*'")
+_NUMEROS = re.compile(r'\b\d+(?:\.\d+)?\b')
+_LISTAS = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)+\s*\)', re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=2048)
+def forma_consulta(sql: str) -> str:
+    """
+    SQL normalizado: sin espacios repetidos y con literales y listas IN
+    reemplazados, para agrupar las ejecuciones de una misma consulta
+    """
+    forma = _ESPACIOS.sub(' ', sql).strip()
+    forma = _CADENAS.sub('?', forma)
+    forma = _NUMEROS.sub('?', forma)
+    return _LISTAS.sub('IN (?, ...)', forma)
+
+
+def _percentil(ordenados: List[float], p: float) -> float:
+    """Percentil por rango más cercano de una lista ya ordenada"""
+    if not ordenados:
+        return 0.0
+    indice = max(0, min(len(ordenados) - 1, int(round(p / 100 * len(ordenados) + 0.5)) - 1))
+    return ordenados[indice]
+
+
+# === ESTADÍSTICAS ===
+
+class _Medida:
+    """Contadores y latencias recientes de una consulta o un método"""
+    __slots__ = ('ejecuciones', 'errores', 'filas', 'total', 'muestras', 'metodos')
+
+    def __init__(self):
+        self.ejecuciones = 0
+        self.errores = 0
+        self.filas = 0
+        self.total = 0.0
+        self.muestras = deque(maxlen=MUESTRAS_MAXIMAS)
+        self.metodos = set()
+
+    def resumen(self) -> Dict:
+        ordenados = sorted(self.muestras)
+        return {
+            'ejecuciones': self.ejecuciones,
+            'errores': self.errores,
+            'filas': self.filas,
+            'total_ms': self.total * 1000,
+            'p50_ms': _percentil(ordenados, 50) * 1000,
+            'p95_ms': _percentil(ordenados, 95) * 1000,
+            'p99_ms': _percentil(ordenados, 99) * 1000,
+        }
+
+
+class QueryStats:
+    def __init__(self, umbral_lento_ms: float = SLOW_QUERY_MS, registro_lento: str = SLOW_QUERY_LOG):
+        """
+        Args:
+            umbral_lento_ms: Consultas más lentas que esto van al registro
+            registro_lento: Archivo de consultas lentas (None para no escribirlo)
+        """
+        self.umbral_lento = umbral_lento_ms / 1000
+        self.registro_lento = registro_lento
+        self.consultas: Dict[str, _Medida] = {}
+        self.metodos: Dict[str, _Medida] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def metodo_actual(self) -> str:
+        pila = getattr(self._local, 'pila', None)
+        return pila[-1] if pila else _SIN_METODO
+
+    def registrar_consulta(self, sql: str, segundos: float, filas: int, error: bool = False,
+                           sql_completo: str = None):
+        """Anota una ejecución de consulta (la llaman los cursores medidos)"""
+        forma = forma_consulta(sql)
+        metodo = self.metodo_actual()
+        local = self._local
+        local.segundos_bd = getattr(local, 'segundos_bd', 0.0) + segundos
+        local.consultas_bd = getattr(local, 'consultas_bd', 0) + 1
+        with self._lock:
+            medida = self.consultas.get(forma)
+            if medida is None:
+                medida = self.consultas[forma] = _Medida()
+            medida.ejecuciones += 1
+            medida.errores += error
+            medida.filas += filas
+            medida.total += segundos
+            medida.muestras.append(segundos)
+            medida.metodos.add(metodo)
+
+        if segundos >= self.umbral_lento and self.registro_lento:
+            self._anotar_lenta(sql_completo or sql, segundos, filas, metodo)
+
+    def tiempo_bd_hilo(self) -> Tuple[float, int]:
+        """(segundos, consultas) acumulados por el hilo actual; se mide por diferencia"""
+        return getattr(self._local, 'segundos_bd', 0.0), getattr(self._local, 'consultas_bd', 0)
+
+    def _anotar_lenta(self, sql: str, segundos: float, filas: int, metodo: str):
+        linea = (f"{datetime.now():%Y-%m-%d %H:%M:%S} | {segundos * 1000:9.1f} ms | "
+                 f"{filas:6d} filas | {metodo} | {_ESPACIOS.sub(' ', sql).strip()}\n")
+        try:
+            with self._lock, open(self.registro_lento, 'a', encoding='utf-8') as f:
+                f.write(linea)
+        except OSError as e:
+            print(f"No se pudo escribir el registro de consultas lentas: {e}")
+
+    def medir_metodo(self, nombre: str, funcion):
+        """Envuelve un método para medir su duración y atribuirle sus consultas"""
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            pila = getattr(self._local, 'pila', None)
+            if pila is None:
+                pila = self._local.pila = []
+            pila.append(nombre)
+            inicio = time.perf_counter()
+            error = False
+            try:
+                return funcion(*args, **kwargs)
+            except Exception:
+                error = True
+                raise
+            finally:
+                segundos = time.perf_counter() - inicio
+                pila.pop()
+                with self._lock:
+                    medida = self.metodos.get(nombre)
+                    if medida is None:
+                        medida = self.metodos[nombre] = _Medida()
+                    medida.ejecuciones += 1
+                    medida.errores += error
+                    medida.total += segundos
+                    medida.muestras.append(segundos)
+
+        envoltura._query_stats_original = funcion
+        return envoltura
+
+    def obtener(self) -> Dict:
+        """
+        Estadísticas acumuladas
+
+        Returns:
+            Dict: {'consultas': [...], 'metodos': [...]}, cada lista ordenada
+                  por tiempo total descendente
+        """
+        with self._lock:
+            consultas = [
+                {'forma': forma, **medida.resumen(), 'metodos': sorted(medida.metodos)}
+                for forma, medida in self.consultas.items()
+            ]
+            metodos = [
+                {'metodo': nombre, **medida.resumen()}
+                for nombre, medida in self.metodos.items()
+            ]
+        consultas.sort(key=lambda c: c['total_ms'], reverse=True)
+        metodos.sort(key=lambda m: m['total_ms'], reverse=True)
+        return {'consultas': consultas, 'metodos': metodos}
+
+    def reiniciar(self):
+        with self._lock:
+            self.consultas.clear()
+            self.metodos.clear()
+
+
+# === CONEXIONES MEDIDAS ===
+
+class _CursorMedido(sqlite3.Cursor):
+    """
+    Cursor que mide cada consulta: el tiempo de execute más el de leer sus
+    filas, hasta que se agotan, se ejecuta otra consulta o se cierra
+    """
+
+    def _iniciar(self, sql: str):
+        self._cerrar_medida()
+        self._sql = sql
+        self._segundos = 0.0
+        self._filas = 0
+        self._error = False
+
+    def _cerrar_medida(self):
+        sql = getattr(self, '_sql', None)
+        if sql is None:
+            return
+        self._sql = None
+        conexion = self.connection
+        conexion.stats.registrar_consulta(sql, self._segundos, self._filas, self._error,
+                                          conexion.ultima_sql)
+
+    def _medir(self, llamada, *args):
+        inicio = time.perf_counter()
+        try:
+            return llamada(*args)
+        except sqlite3.Error:
+            self._error = True
+            raise
+        finally:
+            self._segundos += time.perf_counter() - inicio
+
+    def execute(self, sql, parameters=()):
+        self._iniciar(sql)
+        try:
+            self._medir(super().execute, sql, parameters)
+        finally:
+            if self._error or self.description is None:
+                self._cerrar_medida()
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._iniciar(sql)
+        try:
+            self._medir(super().executemany, sql, seq_of_parameters)
+        finally:
+            self._cerrar_medida()
+        return self
+
+    def fetchone(self):
+        fila = self._medir(super().fetchone)
+        if fila is None:
+            self._cerrar_medida()
+        else:
+            self._filas += 1
+        return fila
+
+    def fetchmany(self, size=None):
+        filas = self._medir(super().fetchmany, size if size is not None else self.arraysize)
+        self._filas += len(filas)
+        if not filas:
+            self._cerrar_medida()
+        return filas
+
+    def fetchall(self):
+        filas = self._medir(super().fetchall)
+        self._filas += len(filas)
+        self._cerrar_medida()
+        return filas
+
+    def __next__(self):
+        try:
+            fila = self._medir(super().__next__)
+        except StopIteration:
+            self._cerrar_medida()
+            raise
+        self._filas += 1
+        return fila
+
+    def close(self):
+        self._cerrar_medida()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._cerrar_medida()
+        except Exception:
+            pass
+
+
+class _ConexionMedida(sqlite3.Connection):
+    """Conexión con cursores medidos y trace callback para el SQL con valores"""
+    stats: 'QueryStats' = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.ultima_sql = None
+        self.set_trace_callback(self._traza)
+
+    def _traza(self, sql: str):
+        # Las sentencias de triggers llegan como "-- TRIGGER nombre"
+        if not sql.startswith('--'):
+            self.ultima_sql = sql
+
+    def cursor(self, factory=_CursorMedido):
+        return super().cursor(factory)
+
+    # Connection.execute no pasa por Cursor.execute: se redirige al cursor medido
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+# === ACTIVACIÓN ===
+
+_stats: Optional[QueryStats] = None
+_originales: List[tuple] = []
+
+
+def _clases_predeterminadas() -> list:
+    from database import DatabaseManager
+    from models import ConfigurationModel, PaymentModel, UserModel
+    from models.database import DatabaseManager as ModelsDatabaseManager
+    return [DatabaseManager, ModelsDatabaseManager, UserModel, PaymentModel, ConfigurationModel]
+
+
+def activar(umbral_lento_ms: float = SLOW_QUERY_MS, registro_lento: str = SLOW_QUERY_LOG,
+            clases: list = None) -> QueryStats:
+    """
+    Activa la medición para las conexiones que se abran desde ahora
+
+    Args:
+        umbral_lento_ms: Consultas más lentas que esto van al registro
+        registro_lento: Archivo de consultas lentas (None para no escribirlo)
+        clases: Clases cuyos métodos públicos se miden (por omisión los
+                gestores de base de datos y los modelos)
+
+    Returns:
+        QueryStats: Las estadísticas que se van acumulando
+    """
+    global FABRICA_CONEXION, _stats
+    desactivar()
+
+    _stats = QueryStats(umbral_lento_ms, registro_lento)
+    _ConexionMedida.stats = _stats
+    FABRICA_CONEXION = _ConexionMedida
+
+    for clase in (clases if clases is not None else _clases_predeterminadas()):
+        for nombre, atributo in list(vars(clase).items()):
+            if nombre.startswith('_') or nombre == 'get_connection' or not callable(atributo):
+                continue
+            _originales.append((clase, nombre, atributo))
+            setattr(clase, nombre, _stats.medir_metodo(f"{clase.__name__}.{nombre}", atributo))
+
+    return _stats
+
+
+def desactivar():
+    """Quita las envolturas; las conexiones nuevas vuelven a ser normales"""
+    global FABRICA_CONEXION
+    FABRICA_CONEXION = sqlite3.Connection
+    while _originales:
+        clase, nombre, atributo = _originales.pop()
+        setattr(clase, nombre, atributo)
+
+
+def activa() -> bool:
+    return FABRICA_CONEXION is not sqlite3.Connection
+
+
+def obtener_estadisticas() -> Dict:
+    """Estadísticas de la última activación ({} si nunca se activó)"""
+    return _stats.obtener() if _stats else {}
+
+
+def tiempo_bd_hilo() -> Tuple[float, int]:
+    """(segundos, consultas) en la base del hilo actual desde que se activó la medición"""
+    return _stats.tiempo_bd_hilo() if _stats and activa() else (0.0, 0)
+
+
+def reiniciar_estadisticas():
+    if _stats:
+        _stats.reiniciar()
+
+
+def volcar_estadisticas(archivo: str = None, limite: int = 30) -> str:
+    """
+    Resumen legible de las estadísticas
+
+    Args:
+        archivo: Si se indica, también se escribe ahí
+        limite: Número máximo de consultas y de métodos listados
+
+    Returns:
+        str: El resumen
+    """
+    estadisticas = obtener_estadisticas()
+    if not estadisticas:
+        return "La medición de consultas no está activa"
+
+    lineas = [f"Estadísticas de consultas - {datetime.now():%Y-%m-%d %H:%M:%S}", ""]
+    encabezado = f"{'ejec.':>7} {'err.':>5} {'filas':>8} {'total ms':>10} {'p50':>8} {'p95':>8} {'p99':>8}"
+
+    lineas += ["MÉTODOS", f"{encabezado}  método"]
+    for m in estadisticas['metodos'][:limite]:
+        lineas.append(f"{m['ejecuciones']:>7} {m['errores']:>5} {'':>8} {m['total_ms']:>10.1f} "
+                      f"{m['p50_ms']:>8.2f} {m['p95_ms']:>8.2f} {m['p99_ms']:>8.2f}  {m['metodo']}")
+
+    lineas += ["", "CONSULTAS", f"{encabezado}  forma / métodos"]
+    for c in estadisticas['consultas'][:limite]:
+        lineas.append(f"{c['ejecuciones']:>7} {c['errores']:>5} {c['filas']:>8} {c['total_ms']:>10.1f} "
+                      f"{c['p50_ms']:>8.2f} {c['p95_ms']:>8.2f} {c['p99_ms']:>8.2f}  {c['forma']}")
+        lineas.append(f"{'':>60}  ← {', '.join(c['metodos'])}")
+
+    texto = '\n'.join(lineas) + '\n'
+    if archivo:
+        try:
+            with open(archivo, 'w', encoding='utf-8') as f:
+                f.write(texto)
+        except OSError as e:
+            print(f"No se pudieron guardar las estadísticas de consultas: {e}")
+    return texto
+
+
+def activar_si_configurado() -> bool:
+    """
+    Activa la medición si QUERY_STATS_ENABLED o AGUA_QUERY_STATS=1 lo piden,
+    y deja programado el volcado a QUERY_STATS_FILE al salir
+
+    Returns:
+        bool: True si quedó activa
+    """
+    if not (QUERY_STATS_ENABLED or os.environ.get('AGUA_QUERY_STATS') == '1'):
+        return False
+    activar()
+    atexit.register(volcar_estadisticas, QUERY_STATS_FILE)
+    return True
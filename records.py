@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Registros compactos para los resultados de las consultas
+
+Cada fila se guarda en un objeto con __slots__ en lugar de un dict, lo que
+reduce la memoria por registro a una fracción. Los registros se siguen
+usando como diccionarios (registro['nombre'], registro.get('email'),
+dict(registro), 'mes' in registro) para no cambiar las ventanas existentes,
+y además permiten acceso por atributo (registro.nombre).
+
+Uso:
+    cursor = conn.cursor()
+    cursor.row_factory = record_factory(Usuario)
+    cursor.execute('SELECT * FROM usuarios')
+    usuarios = cursor.fetchall()
+"""
+
+import sqlite3
+import sys
+from typing import Any, Callable, Dict, Tuple
+
+
+class Record:
+    """
+    Base de los registros: acceso tipo diccionario sobre __slots__
+
+    Los campos que no vienen en la consulta quedan sin asignar y se
+    comportan como claves ausentes de un dict (KeyError / get() -> default).
+    Las columnas que no están declaradas en la clase se guardan en `_extra`.
+    """
+
+    __slots__ = ('_extra',)
+
+    # Campos declarados por cada subclase, en orden
+    _fields: Tuple[str, ...] = ()
+
+    # Campos de texto con pocos valores distintos: se comparte una sola cadena
+    _intern: Tuple[str, ...] = ()
+
+    def __init__(self, **values):
+        self._extra = None
+        for key, value in values.items():
+            self[key] = value
+
+    # === ACCESO TIPO DICCIONARIO ===
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._fields:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key in self._fields:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __contains__(self, key) -> bool:
+        try:
+            self[key]
+            return True
+        except KeyError:
+            return False
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        keys = [f for f in self._fields if hasattr(self, f)]
+        if self._extra:
+            keys.extend(self._extra)
+        return keys
+
+    def values(self):
+        return [self[k] for k in self.keys()]
+
+    def items(self):
+        return [(k, self[k]) for k in self.keys()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Devuelve una copia como dict (por ejemplo para serializar a JSON)"""
+        data = dict(self.items())
+        for key, value in data.items():
+            if isinstance(value, list):
+                data[key] = [v.to_dict() if isinstance(v, Record) else v for v in value]
+        return data
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (Record, dict)):
+            return dict(self.items()) == dict(other.items())
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        campos = ', '.join(f"{k}={self[k]!r}" for k in self.keys())
+        return f"{type(self).__name__}({campos})"
+
+
+class Usuario(Record):
+    """Fila de la tabla usuarios"""
+    _fields = ('id', 'numero', 'nombre', 'direccion', 'telefono', 'email',
+               'estado', 'fecha_registro', 'uid')
+    _intern = ('estado',)
+    __slots__ = _fields
+
+
+class Pago(Record):
+    """Fila de la tabla pagos, con los datos del usuario y sus detalles"""
+    _fields = ('id', 'usuario_id', 'fecha_pago', 'total', 'observaciones', 'uid',
+               'nombre', 'numero', 'direccion', 'detalles')
+    __slots__ = _fields
+
+
+class DetallePago(Record):
+    """Fila de la tabla detalle_pagos"""
+    _fields = ('id', 'pago_id', 'usuario_id', 'concepto', 'mes', 'anio', 'precio', 'cantidad', 'uid')
+    _intern = ('concepto',)
+    __slots__ = _fields
+
+
+class Concepto(Record):
+    """Fila de la tabla conceptos_cobro"""
+    _fields = ('id', 'nombre', 'precio', 'activo', 'fecha_creacion')
+    __slots__ = _fields
+
+
+# Constructores ya generados por clase y columnas de la consulta
+_builders: Dict[Tuple[type, tuple], Callable[[tuple], Record]] = {}
+
+
+def _builder_for(cls, columns: tuple) -> Callable[[tuple], Record]:
+    """
+    Genera (una sola vez por consulta distinta) la función que convierte una
+    tupla en un registro. Se asignan todos los slots con un solo desempaque,
+    como hace collections.namedtuple, en lugar de un setattr por columna.
+    """
+    key = (cls, columns)
+    builder = _builders.get(key)
+    if builder is not None:
+        return builder
+
+    targets = []
+    extras = []
+    for index, name in enumerate(columns):
+        if name in cls._fields:
+            targets.append(f"r.{name}")
+        else:
+            targets.append('_')
+            extras.append(f"{name!r}: row[{index}]")
+
+    lines = ['def build(row):', '    r = new(cls)']
+    lines.append(f"    r._extra = {{{', '.join(extras)}}}" if extras else '    r._extra = None')
+    if targets:
+        lines.append(f"    {', '.join(targets)}, = row")
+    for name in cls._intern:
+        if name in columns:
+            lines.append(f"    if r.{name}.__class__ is str: r.{name} = intern(r.{name})")
+    lines.append('    return r')
+
+    namespace = {'new': cls.__new__, 'cls': cls, 'intern': sys.intern}
+    exec('\n'.join(lines), namespace)
+    builder = _builders[key] = namespace['build']
+    return builder
+
+
+def record_factory(cls) -> Callable[[sqlite3.Cursor, tuple], Record]:
+    """
+    Crea una row_factory de sqlite3 que construye registros de tipo `cls`
+
+    Args:
+        cls: Subclase de Record (Usuario, Pago, DetallePago, Concepto)
+    """
+    # Última descripción vista: todas las filas de una consulta comparten la misma
+    last = [(None, None)]
+
+    def factory(cursor: sqlite3.Cursor, row: tuple) -> Record:
+        description, builder = last[0]
+        if cursor.description is not description:
+            description = cursor.description
+            builder = _builder_for(cls, tuple(d[0] for d in description))
+            last[0] = (description, builder)
+        return builder(row)
+
+    return factory
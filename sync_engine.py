@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sincronización entre sedes a partir del registro de cambios
+
+Los triggers de la migración 6 anotan en la tabla cambios cada alta,
+modificación o baja de usuarios, pagos y detalle_pagos, identificando las
+filas por su uid global. Una sede exporta a otra solo los cambios con seq
+mayor que lo último que le envió, y la otra los aplica y recuerda hasta qué
+seq recibió (tabla sync_pares). El costo depende de cuánto cambió desde la
+última vez, no del tamaño de la base.
+
+Reglas de conflicto:
+    - Dos cambios a la misma fila (mismo uid): gana el de marca de tiempo más
+      reciente; si empatan, el de la sede con identificador mayor. La regla
+      es igual en todas las sedes, así que en esa fila todas coinciden.
+    - Un cambio que viola una restricción (número de usuario repetido, mes
+      ya pagado) no se aplica y se reporta como conflicto. No hay ganador
+      automático: si dos sedes cobraron el mismo mes, cada una conserva su
+      propio detalle (con otro uid y otro pago) y el total de cada pago
+      recibido no coincide con sus detalles. Las sedes quedan distintas
+      hasta que alguien resuelva el conflicto a mano (por ejemplo, borrando
+      el pago repetido en una sede y sincronizando de nuevo).
+
+Uso:
+    python sync_engine.py estado
+    python sync_engine.py exportar --para NODO --salida cambios.json
+    python sync_engine.py aplicar cambios.json
+    python sync_engine.py sincronizar otra_sede.db
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+from typing import Dict, List, Optional
+
+from config.settings import DATABASE_NAME
+from database import DatabaseManager
+
+# Columnas de cada tabla que viajan en los cambios (además de uid y referencias)
+COLUMNAS = {
+    'usuarios': ('numero', 'nombre', 'direccion', 'telefono', 'email', 'estado', 'fecha_registro'),
+    'pagos': ('fecha_pago', 'total', 'observaciones'),
+    'detalle_pagos': ('concepto', 'mes', 'anio', 'precio', 'cantidad'),
+}
+
+# Referencia por uid -> (columna local, tabla referenciada)
+REFERENCIAS = {
+    'usuarios': {},
+    'pagos': {'usuario_uid': ('usuario_id', 'usuarios')},
+    'detalle_pagos': {'pago_uid': ('pago_id', 'pagos')},
+}
+
+
+class ConflictoSync(Exception):
+    """Un cambio recibido no se puede aplicar en esta sede"""
+
+
+class SyncEngine:
+    def __init__(self, db_path: str = DATABASE_NAME):
+        self.db_path = db_path
+        # Crea o migra la base si hace falta (registro de cambios incluido)
+        DatabaseManager(db_path)
+        self.nodo = self._leer_nodo()
+
+    def get_connection(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        return conn
+
+    def _leer_nodo(self) -> str:
+        conn = self.get_connection()
+        try:
+            row = conn.execute("SELECT valor FROM configuracion WHERE clave = 'nodo_id'").fetchone()
+            return row['valor']
+        finally:
+            conn.close()
+
+    # === ESTADO ===
+
+    def obtener_pares(self) -> List[Dict]:
+        """
+        Sedes con las que se ha sincronizado
+
+        Returns:
+            List[Dict]: {'nodo', 'recibido', 'enviado', 'fecha'} por sede
+        """
+        conn = self.get_connection()
+        try:
+            return [dict(row) for row in conn.execute('SELECT * FROM sync_pares ORDER BY nodo')]
+        finally:
+            conn.close()
+
+    def obtener_marca_envio(self, nodo: str) -> int:
+        """Último seq local ya enviado a una sede (0 si nunca se le envió nada)"""
+        conn = self.get_connection()
+        try:
+            row = conn.execute('SELECT enviado FROM sync_pares WHERE nodo = ?', (nodo,)).fetchone()
+            return row['enviado'] if row else 0
+        finally:
+            conn.close()
+
+    def obtener_marca_recibido(self, nodo: str) -> int:
+        """Último seq de otra sede ya aplicado aquí (0 si nunca se recibió nada)"""
+        conn = self.get_connection()
+        try:
+            row = conn.execute('SELECT recibido FROM sync_pares WHERE nodo = ?', (nodo,)).fetchone()
+            return row['recibido'] if row else 0
+        finally:
+            conn.close()
+
+    # === EXPORTAR ===
+
+    def exportar_cambios(self, para: str = None, desde: int = None, limite: int = None) -> Dict:
+        """
+        Arma el paquete de cambios para otra sede
+
+        Los cambios que llegaron desde la sede destino no se le reenvían; los
+        de otras sedes sí, para que una sede intermedia pueda pasarlos.
+
+        Args:
+            para: Identificador de la sede destino
+            desde: Exportar cambios con seq mayor a este (por omisión, lo
+                   último enviado a `para`)
+            limite: Número máximo de cambios del paquete
+
+        Returns:
+            Dict: {'origen', 'desde', 'hasta', 'cambios': [...]}
+        """
+        if desde is None:
+            desde = self.obtener_marca_envio(para) if para else 0
+
+        conn = self.get_connection()
+        try:
+            # Misma instantánea para los cambios y el seq final
+            conn.execute('BEGIN')
+            consulta = '''
+                SELECT seq, tabla, uid, operacion, origen, marca, datos
+                FROM cambios
+                WHERE seq > ?
+                ORDER BY seq
+            '''
+            params = [desde]
+            if limite:
+                consulta += ' LIMIT ?'
+                params.append(limite)
+            filas = conn.execute(consulta, params).fetchall()
+
+            if limite and len(filas) == limite:
+                hasta = filas[-1]['seq']
+            else:
+                hasta = conn.execute('SELECT COALESCE(MAX(seq), 0) FROM cambios').fetchone()[0]
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+
+        cambios = [
+            {
+                'seq': fila['seq'],
+                'tabla': fila['tabla'],
+                'uid': fila['uid'],
+                'operacion': fila['operacion'],
+                'origen': fila['origen'],
+                'marca': fila['marca'],
+                'datos': json.loads(fila['datos']) if fila['datos'] else None,
+            }
+            for fila in filas
+            if fila['origen'] != para
+        ]
+        return {'origen': self.nodo, 'desde': desde, 'hasta': max(hasta, desde), 'cambios': cambios}
+
+    def confirmar_envio(self, nodo: str, hasta: int):
+        """Registra que la sede `nodo` ya aplicó los cambios locales hasta `hasta`"""
+        conn = self.get_connection()
+        try:
+            conn.execute('''
+                INSERT INTO sync_pares (nodo, enviado, fecha) VALUES (?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(nodo) DO UPDATE SET
+                    enviado = MAX(enviado, excluded.enviado),
+                    fecha = CURRENT_TIMESTAMP
+            ''', (nodo, hasta))
+        finally:
+            conn.close()
+
+    # === APLICAR ===
+
+    def aplicar_cambios(self, paquete: Dict) -> Dict:
+        """
+        Aplica un paquete exportado por otra sede en una sola transacción
+
+        Los cambios con seq ya recibido de esa sede se ignoran, así que aplicar
+        dos veces el mismo paquete no tiene efecto.
+
+        Args:
+            paquete: Resultado de exportar_cambios() en la otra sede
+
+        Returns:
+            Dict: {'aplicados', 'omitidos', 'conflictos': [texto, ...], 'hasta'}
+                  o {} si hubo un error
+        """
+        origen = paquete['origen']
+        resultado = {'aplicados': 0, 'omitidos': 0, 'conflictos': [], 'hasta': paquete['hasta']}
+        if origen == self.nodo:
+            resultado['conflictos'].append("El paquete fue exportado por esta misma sede")
+            return resultado
+
+        conn = self.get_connection()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT recibido FROM sync_pares WHERE nodo = ?', (origen,)).fetchone()
+            recibido = row['recibido'] if row else 0
+
+            for cambio in paquete['cambios']:
+                if cambio['seq'] <= recibido or not self._es_mas_reciente(conn, cambio):
+                    resultado['omitidos'] += 1
+                    continue
+
+                # Los triggers anotan el cambio con su origen y marca originales
+                conn.executemany(
+                    'INSERT OR REPLACE INTO sync_estado (clave, valor) VALUES (?, ?)',
+                    [('origen', cambio['origen']), ('marca', cambio['marca'])]
+                )
+                conn.execute('SAVEPOINT cambio')
+                try:
+                    self._aplicar_cambio(conn, cambio)
+                    conn.execute('RELEASE cambio')
+                    resultado['aplicados'] += 1
+                except (ConflictoSync, sqlite3.IntegrityError) as e:
+                    conn.execute('ROLLBACK TO cambio')
+                    conn.execute('RELEASE cambio')
+                    resultado['conflictos'].append(self._describir_conflicto(cambio, e))
+
+            conn.execute('DELETE FROM sync_estado')
+            conn.execute('''
+                INSERT INTO sync_pares (nodo, recibido, fecha) VALUES (?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(nodo) DO UPDATE SET
+                    recibido = MAX(recibido, excluded.recibido),
+                    fecha = CURRENT_TIMESTAMP
+            ''', (origen, paquete['hasta']))
+            conn.execute('COMMIT')
+            return resultado
+
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            print(f"Error al aplicar cambios de {origen}: {e}")
+            return {}
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _es_mas_reciente(conn: sqlite3.Connection, cambio: Dict) -> bool:
+        """
+        Compara (marca, origen) con el último cambio local de la misma fila
+
+        En su sede de origen la marca de una fila siempre crece, así que un
+        empate exacto es el mismo cambio llegado por otro camino y se omite.
+        """
+        row = conn.execute('''
+            SELECT marca, origen FROM cambios
+            WHERE tabla = ? AND uid = ?
+            ORDER BY seq DESC LIMIT 1
+        ''', (cambio['tabla'], cambio['uid'])).fetchone()
+        if row is None:
+            return True
+        return (cambio['marca'], cambio['origen']) > (row['marca'], row['origen'])
+
+    @staticmethod
+    def _aplicar_cambio(conn: sqlite3.Connection, cambio: Dict):
+        tabla = cambio['tabla']
+        if tabla not in COLUMNAS:
+            raise ConflictoSync(f"tabla desconocida '{tabla}'")
+
+        if cambio['operacion'] == 'delete':
+            conn.execute(f'DELETE FROM {tabla} WHERE uid = ?', (cambio['uid'],))
+            return
+
+        datos = cambio['datos']
+        valores = {columna: datos.get(columna) for columna in COLUMNAS[tabla]}
+        for referencia, (columna, tabla_ref) in REFERENCIAS[tabla].items():
+            row = conn.execute(f'SELECT id FROM {tabla_ref} WHERE uid = ?',
+                               (datos.get(referencia),)).fetchone()
+            if row is None:
+                raise ConflictoSync(f"falta el registro de {tabla_ref} al que pertenece")
+            valores[columna] = row['id']
+
+        columnas = list(valores)
+        asignaciones = ', '.join(f'{c} = ?' for c in columnas)
+        cursor = conn.execute(
+            f'UPDATE {tabla} SET {asignaciones} WHERE uid = ?',
+            [*valores.values(), cambio['uid']]
+        )
+        if cursor.rowcount == 0:
+            conn.execute(
+                f"INSERT INTO {tabla} (uid, {', '.join(columnas)}) "
+                f"VALUES (?, {', '.join('?' * len(columnas))})",
+                [cambio['uid'], *valores.values()]
+            )
+
+    @staticmethod
+    def _describir_conflicto(cambio: Dict, error: Exception) -> str:
+        datos = cambio.get('datos') or {}
+        if cambio['tabla'] == 'usuarios':
+            registro = f"usuario {datos.get('numero')} ({datos.get('nombre')})"
+        elif cambio['tabla'] == 'pagos':
+            registro = f"pago del {datos.get('fecha_pago')}"
+        else:
+            registro = f"{datos.get('concepto')} {datos.get('mes') or ''}/{datos.get('anio')}"
+        return f"{cambio['tabla']} {registro} de la sede {cambio['origen']}: {error}"
+
+    # === SINCRONIZAR ===
+
+    def sincronizar_con(self, otra: 'SyncEngine') -> Dict:
+        """
+        Sincroniza en ambos sentidos con otra base accesible localmente
+        (por ejemplo, la copia de otra sede en una memoria USB)
+
+        Returns:
+            Dict: {'enviados': resultado en la otra, 'recibidos': resultado aquí}
+        """
+        paquete = self.exportar_cambios(para=otra.nodo, desde=otra.obtener_marca_recibido(self.nodo))
+        enviados = otra.aplicar_cambios(paquete)
+        if enviados:
+            self.confirmar_envio(otra.nodo, paquete['hasta'])
+
+        paquete = otra.exportar_cambios(para=self.nodo, desde=self.obtener_marca_recibido(otra.nodo))
+        recibidos = self.aplicar_cambios(paquete)
+        if recibidos:
+            otra.confirmar_envio(self.nodo, paquete['hasta'])
+
+        return {'enviados': enviados, 'recibidos': recibidos}
+
+
+def _imprimir_resultado(titulo: str, resultado: Dict):
+    if not resultado:
+        print(f"{titulo}: error (ver mensajes anteriores)")
+        return
+    print(f"{titulo}: {resultado['aplicados']} aplicados, {resultado['omitidos']} omitidos, "
+          f"{len(resultado['conflictos'])} conflictos")
+    for conflicto in resultado['conflictos']:
+        print(f"  - {conflicto}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Sincronización entre sedes")
+    parser.add_argument('--db', default=DATABASE_NAME, help='Base de datos local')
+    sub = parser.add_subparsers(dest='comando', required=True)
+
+    sub.add_parser('estado', help='Identificador de la sede y sedes conocidas')
+
+    exportar = sub.add_parser('exportar', help='Exportar cambios nuevos a un archivo')
+    exportar.add_argument('--para', required=True, help='Identificador de la sede destino')
+    exportar.add_argument('--desde', type=int, help='Exportar desde este seq (por omisión, lo último enviado)')
+    exportar.add_argument('--salida', required=True)
+
+    aplicar = sub.add_parser('aplicar', help='Aplicar un archivo exportado por otra sede')
+    aplicar.add_argument('archivo')
+
+    sincronizar = sub.add_parser('sincronizar', help='Sincronizar en ambos sentidos con otra base')
+    sincronizar.add_argument('otra_db')
+
+    args = parser.parse_args(argv)
+    engine = SyncEngine(args.db)
+
+    if args.comando == 'estado':
+        print(f"Sede: {engine.nodo}")
+        for par in engine.obtener_pares():
+            print(f"  {par['nodo']}: recibido hasta {par['recibido']}, "
+                  f"enviado hasta {par['enviado']} ({par['fecha']})")
+
+    elif args.comando == 'exportar':
+        paquete = engine.exportar_cambios(para=args.para, desde=args.desde)
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(paquete, f, ensure_ascii=False)
+        # Se asume entregado; si se pierde, exportar de nuevo con --desde
+        engine.confirmar_envio(args.para, paquete['hasta'])
+        print(f"{len(paquete['cambios'])} cambios exportados a {args.salida}")
+
+    elif args.comando == 'aplicar':
+        with open(args.archivo, encoding='utf-8') as f:
+            paquete = json.load(f)
+        resultado = engine.aplicar_cambios(paquete)
+        _imprimir_resultado(f"Cambios de {paquete['origen']}", resultado)
+        if not resultado:
+            return 1
+
+    elif args.comando == 'sincronizar':
+        resultado = engine.sincronizar_con(SyncEngine(args.otra_db))
+        _imprimir_resultado("Enviados", resultado['enviados'])
+        _imprimir_resultado("Recibidos", resultado['recibidos'])
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
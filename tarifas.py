@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cuotas mensuales con su mes de vigencia
+
+La tabla tarifas guarda cada cuota junto con el primer mes (anio, mes) en
+que se cobra. Cambiar la cuota agrega una tarifa: los meses anteriores
+conservan su precio, así que un pago atrasado o un adeudo de otro año se
+calcula con la cuota de ese mes y no con la de hoy.
+
+Las tarifas de cada base se cargan una vez en dos listas ordenadas y cada
+(anio, mes) se busca con bisect. La copia en memoria se vuelve a leer solo
+cuando cambia la versión de la tabla en versiones_tablas (una consulta por
+clave primaria), así que los cambios hechos desde otra terminal se ven sin
+consultar la cuota en cada fila.
+
+Uso:
+    tarifas = tarifas_vigentes(conn, db_path)
+    precio = tarifas.cuota(2024, 3)
+"""
+
+import bisect
+import sqlite3
+import threading
+from datetime import date
+from typing import Dict, Iterable, List, Tuple
+
+from config.settings import DEFAULT_MONTHLY_FEE
+
+
+def indice_mes(anio: int, mes: int) -> int:
+    """Meses desde el año 0: los meses consecutivos tienen índices consecutivos"""
+    return anio * 12 + mes - 1
+
+
+class Tarifas:
+    """Cuotas ordenadas por su mes de vigencia"""
+
+    __slots__ = ('_desde', '_cuotas')
+
+    def __init__(self, filas: Iterable[Tuple[int, int, float]]):
+        """
+        Args:
+            filas: (anio, mes, cuota) con el primer mes en que rige cada cuota
+        """
+        ordenadas = sorted((indice_mes(anio, mes), float(cuota)) for anio, mes, cuota in filas)
+        self._desde = [indice for indice, _ in ordenadas]
+        self._cuotas = [cuota for _, cuota in ordenadas]
+
+    def cuota(self, anio: int, mes: int) -> float:
+        """Cuota del mes; antes de la primera tarifa rige la primera"""
+        return self.cuota_indice(indice_mes(anio, mes))
+
+    def cuota_indice(self, indice: int) -> float:
+        """Cuota del mes con ese indice_mes"""
+        if not self._cuotas:
+            return DEFAULT_MONTHLY_FEE
+        return self._cuotas[max(bisect.bisect_right(self._desde, indice) - 1, 0)]
+
+    def cuota_actual(self) -> float:
+        """Cuota del mes en curso"""
+        hoy = date.today()
+        return self.cuota(hoy.year, hoy.month)
+
+    def filas(self) -> List[Tuple[int, int, float]]:
+        """(anio, mes, cuota) de la más antigua a la más reciente"""
+        return [(desde // 12, desde % 12 + 1, cuota) for desde, cuota in zip(self._desde, self._cuotas)]
+
+    def __len__(self) -> int:
+        return len(self._cuotas)
+
+
+# db_path -> (versión de la tabla tarifas, Tarifas)
+_cache: Dict[str, Tuple[int, Tarifas]] = {}
+_lock = threading.Lock()
+
+
+def tarifas_vigentes(conn: sqlite3.Connection, db_path: str) -> Tarifas:
+    """
+    Tarifas de la base, leídas de nuevo solo si la tabla cambió
+
+    Dentro de una transacción devuelve lo que ve esa transacción, incluidas
+    sus propias modificaciones.
+
+    Args:
+        conn: Conexión abierta a la base
+        db_path: Archivo de la base (clave de la caché)
+    """
+    fila = conn.execute("SELECT version FROM versiones_tablas WHERE tabla = 'tarifas'").fetchone()
+    if fila is None:
+        # Base sin la migración 7: la cuota única de configuracion
+        fila = conn.execute("SELECT valor FROM configuracion WHERE clave = 'cuota_mensual'").fetchone()
+        return Tarifas([(0, 1, float(fila[0]) if fila and fila[0] else DEFAULT_MONTHLY_FEE)])
+
+    version = fila[0]
+    with _lock:
+        guardada = _cache.get(db_path)
+    if guardada is not None and guardada[0] == version:
+        return guardada[1]
+
+    tarifas = Tarifas(conn.execute('SELECT anio, mes, cuota FROM tarifas'))
+    with _lock:
+        _cache[db_path] = (version, tarifas)
+    return tarifas
+
+
+def limpiar_cache():
+    """Olvida las tarifas cargadas (al restaurar o cambiar de base)"""
+    with _lock:
+        _cache.clear()
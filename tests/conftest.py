@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+"""Fixtures comunes: cada prueba usa su propia base en tmp_path"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """DatabaseManager sobre una base nueva, también para get_db_manager()"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(database, 'API_SERVER_URL', None)
+    monkeypatch.setattr(database, '_db_manager', None)
+    return database.reiniciar_db_manager(str(tmp_path / 'agua.db'))
+
+
+@pytest.fixture
+def usuarios(db):
+    """Usuarios 1, 2 y 3"""
+    for numero in (1, 2, 3):
+        assert db.crear_usuario(numero, f"Usuario {numero}")
+    return db
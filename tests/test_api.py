@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""Las ventanas usan el servicio HTTP con los mismos métodos y errores que la base local"""
+
+import pytest
+
+import csv_parallel
+import database
+from api_client import ClienteAPI
+from api_server import iniciar_en_hilo
+from csv_importer import CSVImporter
+from database import MesesYaPagadosError
+from exporter import export_report
+
+
+@pytest.fixture
+def cliente(usuarios):
+    servidor, detener = iniciar_en_hilo(db_path=usuarios.db_path, host='127.0.0.1', port=0,
+                                        lectores=1)
+    yield ClienteAPI(f"http://127.0.0.1:{servidor.port}")
+    detener()
+
+
+def test_mes_ya_pagado_llega_como_meses_ya_pagados_error(usuarios, cliente):
+    usuario_id = cliente.buscar_usuario_por_numero(1)['id']
+    assert cliente.registrar_pago(usuario_id, [1, 2], 2024) > 0
+    
+    with pytest.raises(MesesYaPagadosError) as error:
+        cliente.registrar_pago(usuario_id, [2, 3, 1], 2024)
+    
+    assert (error.value.anio, error.value.meses) == (2024, [1, 2])
+    assert usuarios.obtener_pagos_usuario_anio(usuario_id, 2024) == [1, 2]
+
+
+def test_cambiar_estado_usuarios(usuarios, cliente):
+    filtro = {'numero_desde': 2}
+    
+    assert cliente.cambiar_estado_usuarios('Cancelado', filtro, solo_vista_previa=True) == 2
+    assert cliente.cambiar_estado_usuarios('Cancelado', filtro) == 2
+    
+    estados = {u['numero']: u['estado'] for u in usuarios.obtener_todos_usuarios()}
+    assert estados == {1: 'Activo', 2: 'Cancelado', 3: 'Cancelado'}
+
+
+def test_registrar_cargo_masivo(usuarios, cliente):
+    concepto = usuarios.obtener_conceptos_cobro()[0]
+    
+    vista = cliente.registrar_cargo_masivo(concepto['id'], anio=2024, solo_vista_previa=True)
+    assert (vista['usuarios'], vista['registrado']) == (3, False)
+    assert usuarios.obtener_historial_pagos_usuario(1) == []
+    
+    cargo = cliente.registrar_cargo_masivo(concepto['id'], anio=2024)
+    assert (cargo['usuarios'], cargo['total'], cargo['registrado']) == (3, 3 * concepto['precio'], True)
+    for numero in (1, 2, 3):
+        usuario_id = usuarios.buscar_usuario_por_numero(numero)['id']
+        historial = usuarios.obtener_historial_pagos_usuario(usuario_id)
+        assert [pago['total'] for pago in historial] == [concepto['precio']]
+
+
+def test_exportar_sin_base_local_da_un_error_claro(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, 'API_SERVER_URL', 'http://127.0.0.1:1')
+    
+    with pytest.raises(RuntimeError, match="servicio"):
+        export_report('usuarios', str(tmp_path / 'usuarios.csv'))
+
+
+def test_importar_con_campo_multilinea_no_repite_filas_guardadas(usuarios, cliente, tmp_path, monkeypatch):
+    dividir = csv_parallel.dividir_en_rangos
+    monkeypatch.setattr(csv_parallel, 'dividir_en_rangos', lambda ruta, inicio: dividir(ruta, inicio, 16))
+    ruta = tmp_path / 'usuarios.csv'
+    ruta.write_text('numero,nombre,direccion\n4,Usuario 4,Calle 4\n5,Usuario 5,"Calle 5\nInterior 2"\n',
+                    encoding='utf-8')
+    importador = CSVImporter()
+    importador.db = cliente
+    
+    importados, errores = importador.import_users_from_csv(str(ruta), procesos=2)
+    
+    assert (importados, errores) == (2, [])
+    assert usuarios.buscar_usuario_por_numero(5)['direccion'] == "Calle 5\nInterior 2"
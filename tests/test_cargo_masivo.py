@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""Cargo masivo: la vista previa no escribe y el cargo crea un pago por usuario"""
+
+import pytest
+
+from models import PaymentModel
+from models import DatabaseManager as ModelsDatabaseManager
+
+
+@pytest.fixture(params=['database', 'models'])
+def cargo(request, usuarios):
+    """registrar_cargo_masivo de database.py o del PaymentModel que usa el servicio HTTP"""
+    if request.param == 'database':
+        return usuarios.registrar_cargo_masivo
+    return PaymentModel(ModelsDatabaseManager(usuarios.db_path)).registrar_cargo_masivo
+
+
+@pytest.fixture
+def concepto(usuarios):
+    return usuarios.obtener_conceptos_cobro()[0]
+
+
+def _cargos(db):
+    conn = db.get_connection()
+    try:
+        return [tuple(fila) for fila in conn.execute('''
+            SELECT u.numero, p.total, p.observaciones, d.concepto, d.mes, d.anio, d.precio
+            FROM pagos p
+            JOIN usuarios u ON p.usuario_id = u.id
+            JOIN detalle_pagos d ON d.pago_id = p.id
+            ORDER BY u.numero
+        ''')]
+    finally:
+        conn.close()
+
+
+def test_vista_previa_no_registra_nada(usuarios, cargo, concepto):
+    resultado = cargo(concepto['id'], anio=2024, solo_vista_previa=True)
+    
+    assert resultado == {
+        'concepto': concepto['nombre'],
+        'precio': concepto['precio'],
+        'usuarios': 3,
+        'total': 3 * concepto['precio'],
+        'registrado': False,
+    }
+    assert _cargos(usuarios) == []
+
+
+def test_cargo_a_los_usuarios_activos(usuarios, cargo, concepto):
+    usuarios.cambiar_estado_usuario(usuarios.buscar_usuario_por_numero(2)['id'], 'Cancelado')
+    
+    resultado = cargo(concepto['id'], anio=2024, observaciones="Faena")
+    
+    assert (resultado['usuarios'], resultado['registrado']) == (2, True)
+    precio = concepto['precio']
+    assert _cargos(usuarios) == [
+        (1, precio, "Faena", concepto['nombre'], None, 2024, precio),
+        (3, precio, "Faena", concepto['nombre'], None, 2024, precio),
+    ]
+
+
+def test_cargo_con_filtro(usuarios, cargo, concepto):
+    resultado = cargo(concepto['id'], {'numero_desde': 2, 'numero_hasta': 2}, anio=2024)
+    
+    assert resultado['usuarios'] == 1
+    assert [fila[0] for fila in _cargos(usuarios)] == [2]
+
+
+def test_concepto_inexistente(usuarios, cargo):
+    assert cargo(9999, anio=2024) == {}
+    assert _cargos(usuarios) == []
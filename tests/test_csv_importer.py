@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""Importación de pagos: encabezados año-mes, formato largo y agrupación"""
+
+import sqlite3
+
+import pytest
+
+import database
+from csv_importer import _ANIO_MES, CSVImporter, _agrupar_pagos, _mes
+
+
+def _escribir(ruta, texto):
+    ruta.write_text(texto, encoding='utf-8')
+    return str(ruta)
+
+
+def _detalles(db):
+    conn = db.get_connection()
+    try:
+        return [tuple(fila) for fila in conn.execute('''
+            SELECT u.numero, p.id, p.total, d.concepto, d.anio, d.mes, d.precio
+            FROM detalle_pagos d
+            JOIN pagos p ON d.pago_id = p.id
+            JOIN usuarios u ON p.usuario_id = u.id
+            ORDER BY p.id, d.id
+        ''')]
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize('encabezado, anio_mes', [
+    ('2019-01', (2019, 1)),
+    ('2019_12', (2019, 12)),
+    ('2020/3', (2020, 3)),
+    ('2021 07', (2021, 7)),
+])
+def test_encabezado_anio_mes(encabezado, anio_mes):
+    coincidencia = _ANIO_MES.fullmatch(encabezado)
+    assert (int(coincidencia.group(1)), int(coincidencia.group(2))) == anio_mes
+
+
+@pytest.mark.parametrize('encabezado', ['201901', '19-01', 'mes_1', 'enero 2019'])
+def test_encabezado_sin_anio(encabezado):
+    assert _ANIO_MES.fullmatch(encabezado) is None
+
+
+@pytest.mark.parametrize('texto, mes', [
+    ('1', 1), ('01', 1), ('mes_10', 10), ('Month 3', 3), ('marzo', 3), ('Sep', 9),
+    ('13', None), ('0', None), ('numero', None), ('2019-01', None),
+])
+def test_mes(texto, mes):
+    assert _mes(texto) == mes
+
+
+def test_agrupar_pagos_seguidos_por_usuario_folio_y_fecha():
+    filas = [
+        (2, ((1, 'A', None), (2024, 1, None, None))),
+        (3, ((1, 'A', None), (2025, 1, None, None))),
+        (4, ((1, 'B', None), (2024, 2, None, None))),
+        (5, ((2, 'B', None), (2024, 2, 'Multa', 10.0))),
+        (6, ((1, 'A', None), (2024, 3, None, None))),
+    ]
+    assert list(_agrupar_pagos(iter(filas))) == [
+        (2, (1, None, ((2024, 1, None, None), (2025, 1, None, None)))),
+        (4, (1, None, ((2024, 2, None, None),))),
+        (5, (2, None, ((2024, 2, 'Multa', 10.0),))),
+        (6, (1, None, ((2024, 3, None, None),))),
+    ]
+
+
+def test_agrupar_pagos_vacio():
+    assert list(_agrupar_pagos(iter([]))) == []
+
+
+def test_importar_columnas_de_varios_anios(usuarios, tmp_path):
+    ruta = _escribir(tmp_path / 'pagos.csv', "numero,2019-11,2019-12,2020-01,notas\n1,x,x,x,a\n2,,,si,\n")
+    importados, errores = CSVImporter().import_payments_from_csv(ruta)
+    
+    assert (importados, errores) == (2, [])
+    assert _detalles(usuarios) == [
+        (1, 1, 150.0, 'Mensualidad', 2019, 11, 50.0),
+        (1, 1, 150.0, 'Mensualidad', 2019, 12, 50.0),
+        (1, 1, 150.0, 'Mensualidad', 2020, 1, 50.0),
+        (2, 2, 50.0, 'Mensualidad', 2020, 1, 50.0),
+    ]
+
+
+def test_importar_formato_largo_agrupa_un_pago(usuarios, tmp_path):
+    ruta = _escribir(tmp_path / 'pagos.csv', "numero,anio,mes,concepto,monto,fecha\n"
+                                             "1,2023,12,,,2024-01-05\n"
+                                             "1,2024,enero,Mensualidad,60,2024-01-05\n"
+                                             "1,2024,,Toma Nueva,,2024-01-05\n"
+                                             "2,2024,1,,,\n")
+    importados, errores = CSVImporter().import_payments_from_csv(ruta)
+    
+    assert (importados, errores) == (2, [])
+    assert _detalles(usuarios) == [
+        (1, 1, 610.0, 'Mensualidad', 2023, 12, 50.0),
+        (1, 1, 610.0, 'Mensualidad', 2024, 1, 60.0),
+        (1, 1, 610.0, 'Toma Nueva', 2024, None, 500.0),
+        (2, 2, 50.0, 'Mensualidad', 2024, 1, 50.0),
+    ]
+    conn = usuarios.get_connection()
+    assert conn.execute('SELECT fecha_pago FROM pagos WHERE id = 1').fetchone()[0] == '2024-01-05 00:00:00'
+    conn.close()
+
+
+def test_importar_formato_largo_errores(usuarios, tmp_path):
+    ruta = _escribir(tmp_path / 'pagos.csv', "numero,anio,mes,concepto,monto\n"
+                                             "1,2024,13,,\n"
+                                             "1,2024,2,,\n"
+                                             "1,2024,2,,\n"
+                                             "2,2024,,Desconocido,\n"
+                                             "9,2024,1,,\n")
+    importados, errores = CSVImporter().import_payments_from_csv(ruta)
+    
+    assert importados == 0
+    assert errores == [
+        "Fila 2: Mes '13' no es válido",
+        "Fila 3: Usuario 1: Meses ya pagados en 2024: Febrero",
+        "Fila 5: Usuario 2: concepto sin monto ni precio registrado: Desconocido",
+        "Fila 6: No existe usuario con número 9",
+    ]
+    assert _detalles(usuarios) == []
+
+
+def test_importar_meses_sin_anio_necesita_anio(usuarios, tmp_path):
+    ruta = _escribir(tmp_path / 'pagos.csv', "numero,enero,mes_2\n1,x,x\n")
+    importador = CSVImporter()
+    
+    importados, errores = importador.import_payments_from_csv(ruta)
+    assert importados == 0 and errores[0].startswith("Indique el año")
+    
+    assert importador.import_payments_from_csv(ruta, 2024) == (1, [])
+    assert [fila[4:6] for fila in _detalles(usuarios)] == [(2024, 1), (2024, 2)]
+
+
+@pytest.fixture
+def base_con_mes_repetido(tmp_path, monkeypatch):
+    """Base creada antes de la migración 5 con enero de 2024 pagado dos veces"""
+    ruta = str(tmp_path / 'anterior.db')
+    database.aplicar_migraciones(ruta, hasta=4)
+    conn = sqlite3.connect(ruta)
+    conn.execute("INSERT INTO usuarios (id, numero, nombre) VALUES (1, 1, 'Usuario 1')")
+    for pago_id in (1, 2):
+        conn.execute("INSERT INTO pagos (id, usuario_id, total) VALUES (?, 1, 50.0)", (pago_id,))
+        conn.execute("INSERT INTO detalle_pagos (pago_id, concepto, mes, anio, precio) "
+                     "VALUES (?, 'Mensualidad', 1, 2024, 50.0)", (pago_id,))
+    conn.commit()
+    conn.close()
+    
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(database, 'API_SERVER_URL', None)
+    monkeypatch.setattr(database, '_db_manager', None)
+    return database.reiniciar_db_manager(ruta)
+
+
+@pytest.mark.parametrize('validar', [False, True])
+def test_importar_pagos_con_meses_repetidos_de_antes_de_la_migracion(base_con_mes_repetido, tmp_path, validar):
+    ruta = _escribir(tmp_path / 'pagos.csv', "numero,2024-01,2024-02\n1,,x\n1,x,\n")
+    
+    importados, errores = CSVImporter().import_payments_from_csv(ruta, validar=validar)
+    
+    assert importados == 1
+    assert errores == ["Fila 3: Usuario 1: Meses ya pagados en 2024: Enero"]
+    meses = base_con_mes_repetido.obtener_pagos_usuario_anio(1, 2024)
+    assert meses == ([1] if validar else [1, 2])
+
+
+def test_importar_pagos_no_reutiliza_ids_de_pagos_borrados(usuarios, tmp_path):
+    usuario_id = usuarios.buscar_usuario_por_numero(1)['id']
+    usuarios.registrar_pago(usuario_id, [1], 2024)
+    borrado = usuarios.registrar_pago(usuario_id, [2], 2024)
+    conn = sqlite3.connect(usuarios.db_path)
+    conn.execute('DELETE FROM detalle_pagos WHERE pago_id = ?', (borrado,))
+    conn.execute('DELETE FROM pagos WHERE id = ?', (borrado,))
+    conn.commit()
+    conn.close()
+    ruta = _escribir(tmp_path / 'pagos.csv', "numero,2024-03\n1,x\n")
+    
+    assert CSVImporter().import_payments_from_csv(ruta) == (1, [])
+    
+    historial = usuarios.obtener_historial_pagos_usuario(usuario_id)
+    assert sorted(pago['id'] for pago in historial) == [borrado - 1, borrado + 1]
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""XLSX: las filas que no caben en una hoja siguen en hojas nuevas"""
+
+import re
+import zipfile
+
+from exporter import StreamingXLSXWriter, write_xlsx
+
+
+def _hojas(ruta):
+    """{nombre de la hoja: [números de la primera columna por fila]}"""
+    with zipfile.ZipFile(ruta) as libro:
+        nombres = re.findall(r'<sheet name="([^"]+)" sheetId="(\d+)"', libro.read('xl/workbook.xml').decode())
+        hojas = {}
+        for nombre, numero in nombres:
+            xml = libro.read(f'xl/worksheets/sheet{numero}.xml').decode()
+            hojas[nombre] = re.findall(r'<c r="A\d+"[^>]*>(?:<v>|<is><t[^>]*>)([^<]*)<', xml)
+        return hojas
+
+
+def test_hoja_llena_continua_en_otra_con_encabezados(tmp_path, monkeypatch):
+    monkeypatch.setattr(StreamingXLSXWriter, 'MAX_FILAS', 3)
+    ruta = str(tmp_path / 'usuarios.xlsx')
+
+    total = write_xlsx(['numero', 'nombre'], [(n, f"Usuario {n}") for n in range(1, 6)], ruta, 'Usuarios')
+
+    assert total == 5
+    assert _hojas(ruta) == {
+        'Usuarios': ['numero', '1', '2'],
+        'Usuarios (2)': ['numero', '3', '4'],
+        'Usuarios (3)': ['numero', '5'],
+    }
+
+
+def test_una_hoja_si_caben_todas(tmp_path, monkeypatch):
+    monkeypatch.setattr(StreamingXLSXWriter, 'MAX_FILAS', 3)
+    ruta = str(tmp_path / 'usuarios.xlsx')
+
+    write_xlsx(['numero'], [(1,), (2,)], ruta, 'Usuarios')
+
+    assert _hojas(ruta) == {'Usuarios': ['numero', '1', '2']}
+
+
+def test_nombre_largo_de_hoja_conserva_el_numero(tmp_path, monkeypatch):
+    monkeypatch.setattr(StreamingXLSXWriter, 'MAX_FILAS', 2)
+    ruta = str(tmp_path / 'detalle.xlsx')
+
+    write_xlsx(['pago'], [(1,), (2,)], ruta, 'Detalle de pagos de todos los usuarios')
+
+    nombres = list(_hojas(ruta))
+    assert nombres == ['Detalle de pagos de todos los u', 'Detalle de pagos de todos l (2)']
+    assert all(len(nombre) <= 31 for nombre in nombres)
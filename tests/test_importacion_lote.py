@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""Importaciones en bloque: actualización del padrón y modo de solo validar"""
+
+import sqlite3
+
+import pytest
+
+from csv_importer import CSVImporter
+
+
+def _escribir_desde_otra_terminal(db, numero):
+    """Registra un usuario con timeout 0: falla si la base está bloqueada"""
+    conn = sqlite3.connect(db.db_path, timeout=0)
+    try:
+        conn.execute("INSERT INTO usuarios (numero, nombre) VALUES (?, 'Otra terminal')", (numero,))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _filas(db, filas):
+    """Filas de archivo que, a mitad de la lectura, escriben desde otra terminal"""
+    for i, fila in enumerate(filas):
+        if i == 1:
+            _escribir_desde_otra_terminal(db, 99)
+        yield fila
+
+
+@pytest.mark.parametrize('metodo, filas', [
+    ('crear_usuarios_lote', [(2, (10, 'Diez', '', '', '')), (3, (11, 'Once', '', '', ''))]),
+    ('actualizar_usuarios_lote', [(2, (1, 'Uno', 'Calle 1', '', '')), (3, (12, 'Doce', '', '', ''))]),
+    ('registrar_pagos_lote', [(2, (1, None, [(2024, 1, None, None)])),
+                              (3, (2, None, [(2024, 1, None, None)]))]),
+])
+def test_validar_no_bloquea_a_otras_terminales(usuarios, metodo, filas):
+    _validos, errores = getattr(usuarios, metodo)(_filas(usuarios, filas), solo_validar=True)
+    
+    assert errores == []
+    assert usuarios.buscar_usuario_por_numero(99) is not None
+    assert [u['numero'] for u in usuarios.obtener_todos_usuarios()] == [1, 2, 3, 99]
+
+
+def _escribir(ruta, texto):
+    ruta.write_text(texto, encoding='utf-8')
+    return str(ruta)
+
+
+def _padron(db):
+    return [(u['numero'], u['nombre'], u['direccion'], u['telefono'])
+            for u in db.obtener_todos_usuarios()]
+
+
+def test_actualizar_padron_crea_actualiza_y_no_borra(usuarios, tmp_path):
+    usuarios.actualizar_usuario(usuarios.buscar_usuario_por_numero(2)['id'], direccion='Calle 2')
+    ruta = _escribir(tmp_path / 'padron.csv', "numero,nombre,direccion\n"
+                                              "1,Usuario 1,Calle 1\n"
+                                              "2,Usuario 2,\n"
+                                              "4,Usuario 4,Calle 4\n")
+    
+    resumen, errores = CSVImporter().upsert_users_from_csv(ruta)
+    
+    assert errores == []
+    assert resumen == {'insertados': 1, 'actualizados': 1, 'sin_cambios': 1}
+    assert _padron(usuarios) == [
+        (1, 'Usuario 1', 'Calle 1', ''),
+        (2, 'Usuario 2', 'Calle 2', ''),
+        (3, 'Usuario 3', '', ''),
+        (4, 'Usuario 4', 'Calle 4', ''),
+    ]
+
+
+def test_actualizar_padron_numero_repetido_en_el_archivo(usuarios, tmp_path):
+    ruta = _escribir(tmp_path / 'padron.csv', "numero,nombre\n5,Cinco\n5,Otro cinco\n")
+    
+    resumen, errores = CSVImporter().upsert_users_from_csv(ruta)
+    
+    assert resumen['insertados'] == 1
+    assert len(errores) == 1 and "5" in errores[0]
+    assert usuarios.buscar_usuario_por_numero(5)['nombre'] == 'Cinco'
+
+
+@pytest.mark.parametrize('importar, texto, resultado', [
+    ('import_users_from_csv', "numero,nombre\n1,Repetido\n4,Nuevo\n", 1),
+    ('upsert_users_from_csv', "numero,nombre\n1,Nombre nuevo\n4,Nuevo\n",
+     {'insertados': 1, 'actualizados': 1, 'sin_cambios': 0}),
+])
+def test_validar_informa_sin_guardar(usuarios, tmp_path, importar, texto, resultado):
+    antes = _padron(usuarios)
+    ruta = _escribir(tmp_path / 'usuarios.csv', texto)
+    
+    importados, errores = getattr(CSVImporter(), importar)(ruta, validar=True)
+    
+    assert importados == resultado
+    assert len(errores) == (1 if importar == 'import_users_from_csv' else 0)
+    assert _padron(usuarios) == antes
+
+
+def test_validar_pagos_informa_sin_guardar(usuarios, tmp_path):
+    usuarios.registrar_pago(usuarios.buscar_usuario_por_numero(1)['id'], [1], 2024)
+    ruta = _escribir(tmp_path / 'pagos.csv', "numero,2024-01,2024-02\n1,x,x\n2,x,\n9,x,\n")
+    
+    importados, errores = CSVImporter().import_payments_from_csv(ruta, validar=True)
+    
+    assert importados == 1
+    assert len(errores) == 2
+    assert usuarios.obtener_pagos_usuario_anio(usuarios.buscar_usuario_por_numero(2)['id'], 2024) == []
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""Un mes se paga una sola vez, por cualquiera de los caminos de registro"""
+
+import pytest
+
+from database import MesesYaPagadosError
+from models import PaymentModel
+from models import DatabaseManager as ModelsDatabaseManager
+
+
+@pytest.fixture(params=['database', 'models'])
+def registrar(request, usuarios):
+    """registrar_pago de database.py o del PaymentModel que usa el servicio HTTP"""
+    if request.param == 'database':
+        return usuarios.registrar_pago
+    return PaymentModel(ModelsDatabaseManager(usuarios.db_path)).registrar_pago
+
+
+def _meses(db, usuario_id, anio):
+    return db.obtener_pagos_usuario_anio(usuario_id, anio)
+
+
+def test_meses_repetidos_en_el_pago_cuentan_una_vez(usuarios, registrar):
+    usuario_id = usuarios.buscar_usuario_por_numero(1)['id']
+    
+    pago_id = registrar(usuario_id, [3, 1, 3], 2024)
+    
+    assert pago_id > 0
+    assert _meses(usuarios, usuario_id, 2024) == [1, 3]
+    assert usuarios.obtener_detalle_pago(pago_id)['total'] == 100.0
+
+
+def test_mes_ya_pagado_rechaza_el_pago_completo(usuarios, registrar):
+    usuario_id = usuarios.buscar_usuario_por_numero(1)['id']
+    assert registrar(usuario_id, [1, 2], 2024) > 0
+    
+    with pytest.raises(MesesYaPagadosError) as error:
+        registrar(usuario_id, [2, 3, 1], 2024, [('Multa por Inasistencia', 25.0)])
+    
+    assert (error.value.anio, error.value.meses) == (2024, [1, 2])
+    assert _meses(usuarios, usuario_id, 2024) == [1, 2]
+    conn = usuarios.get_connection()
+    assert conn.execute('SELECT COUNT(*) FROM pagos').fetchone()[0] == 1
+    conn.close()
+
+
+def test_mismo_mes_de_otro_anio_u_otro_usuario(usuarios, registrar):
+    uno = usuarios.buscar_usuario_por_numero(1)['id']
+    dos = usuarios.buscar_usuario_por_numero(2)['id']
+    
+    assert registrar(uno, [5], 2024) > 0
+    assert registrar(uno, [5], 2025) > 0
+    assert registrar(dos, [5], 2024) > 0
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""Los registros de las tablas migradas no necesitan el dict _extra"""
+
+from models import DatabaseManager as ModelsDatabaseManager
+from models import PaymentModel, UserModel
+from records import Usuario
+
+
+def _sin_extra(registros):
+    for registro in registros:
+        assert registro._extra is None, (type(registro).__name__, registro._extra)
+        for detalle in registro.get('detalles') or []:
+            assert detalle._extra is None, (type(detalle).__name__, detalle._extra)
+
+
+def test_registros_de_database_sin_extra(usuarios):
+    usuario = usuarios.buscar_usuario_por_numero(1)
+    pago_id = usuarios.registrar_pago(usuario['id'], [1, 2], 2024, [('Multa por Inasistencia', 25.0)])
+    
+    assert usuario['uid']
+    _sin_extra([usuario])
+    _sin_extra(usuarios.obtener_todos_usuarios())
+    _sin_extra(usuarios.buscar_usuarios_por_nombre('Usuario'))
+    _sin_extra(usuarios.obtener_historial_pagos_usuario(usuario['id']))
+    _sin_extra([usuarios.obtener_detalle_pago(pago_id)])
+    _sin_extra(usuarios.obtener_conceptos_cobro())
+
+
+def test_registros_de_models_sin_extra(usuarios):
+    db = ModelsDatabaseManager(usuarios.db_path)
+    usuario = UserModel(db).buscar_usuario_por_numero(1)
+    pago_id = PaymentModel(db).registrar_pago(usuario['id'], [1], 2024)
+    
+    _sin_extra([usuario])
+    _sin_extra(UserModel(db).obtener_todos_usuarios())
+    _sin_extra(PaymentModel(db).obtener_historial_pagos_usuario(usuario['id']))
+    _sin_extra([PaymentModel(db).obtener_detalle_pago(pago_id)])
+
+
+def test_columna_no_declarada_va_a_extra():
+    usuario = Usuario(numero=1, otra='x')
+    assert usuario._extra == {'otra': 'x'}
+    assert usuario['otra'] == 'x' and usuario.numero == 1
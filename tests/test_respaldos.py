@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""Restaurar reemplaza la base y reinicia solo los gestores que la usan"""
+
+import os
+import sqlite3
+import threading
+
+import pytest
+
+import database
+from backup_manager import BackupManager, copy_database
+
+
+def test_restaurar_reinicia_el_gestor_de_esa_base(usuarios, tmp_path):
+    gestor = BackupManager(usuarios.db_path, str(tmp_path / 'respaldos'))
+    respaldo = str(tmp_path / 'respaldo.db')
+    database.DatabaseManager(respaldo)
+    
+    exito, errores = gestor.restore_database(respaldo)
+    
+    assert (exito, errores) == (True, [])
+    assert database.get_db_manager() is not usuarios
+    assert database.get_db_manager().db_path == usuarios.db_path
+
+
+def test_restaurar_otra_base_no_crea_la_base_por_omision(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(database, '_db_manager', None)
+    base = str(tmp_path / 'otra.db')
+    database.DatabaseManager(base)
+    gestor = BackupManager(base, str(tmp_path / 'respaldos'))
+    
+    exito, _errores = gestor.restore_snapshot(gestor.create_snapshot())
+    
+    assert exito
+    assert database._db_manager is None
+    assert not os.path.exists(tmp_path / 'agua_potable.db')
+
+
+def test_una_conexion_abierta_ve_la_base_restaurada(usuarios, tmp_path):
+    gestor = BackupManager(usuarios.db_path, str(tmp_path / 'respaldos'))
+    respaldo = str(tmp_path / 'respaldo.db')
+    database.DatabaseManager(respaldo).crear_usuario(7, "Usuario 7")
+    otra_terminal = sqlite3.connect(usuarios.db_path)
+    
+    exito, _errores = gestor.restore_database(respaldo)
+    
+    assert exito
+    numeros = [fila[0] for fila in otra_terminal.execute('SELECT numero FROM usuarios')]
+    otra_terminal.close()
+    assert numeros == [7]
+
+
+def test_restaurar_espera_al_escritor_y_no_toca_la_base_si_no_termina(usuarios, tmp_path):
+    gestor = BackupManager(usuarios.db_path, str(tmp_path / 'respaldos'))
+    respaldo = str(tmp_path / 'respaldo.db')
+    database.DatabaseManager(respaldo)
+    escritor = sqlite3.connect(usuarios.db_path, isolation_level=None)
+    escritor.execute('BEGIN IMMEDIATE')
+    
+    with pytest.raises(TimeoutError):
+        gestor._write_into_database(respaldo, timeout=0.2)
+    
+    escritor.execute('ROLLBACK')
+    escritor.close()
+    assert len(usuarios.obtener_todos_usuarios()) == 3
+
+
+def test_se_puede_escribir_mientras_se_comprime_el_snapshot(usuarios, tmp_path):
+    gestor = BackupManager(usuarios.db_path, str(tmp_path / 'respaldos'))
+    escribir_objeto = gestor._write_object
+    escrituras = []
+    
+    def escribir_y_registrar_un_usuario(digest, datos):
+        if not escrituras:
+            otra_terminal = sqlite3.connect(usuarios.db_path, timeout=0)
+            otra_terminal.execute("INSERT INTO usuarios (numero, nombre) VALUES (9, 'Usuario 9')")
+            otra_terminal.commit()
+            otra_terminal.close()
+            escrituras.append(digest)
+        return escribir_objeto(digest, datos)
+    
+    gestor._write_object = escribir_y_registrar_un_usuario
+    nombre = gestor.create_snapshot()
+    
+    assert nombre and escrituras
+    restaurada = gestor.restore_snapshot_to(nombre, str(tmp_path / 'snapshot.db'))
+    numeros = database.DatabaseManager(restaurada).obtener_todos_usuarios()
+    assert [u['numero'] for u in numeros] == [1, 2, 3]
+
+
+def test_la_retencion_de_otra_terminal_espera_al_snapshot_en_curso(usuarios, tmp_path):
+    respaldos = str(tmp_path / 'respaldos')
+    gestor = BackupManager(usuarios.db_path, respaldos)
+    otra_terminal = BackupManager(usuarios.db_path, respaldos)
+    assert gestor.create_snapshot()
+    usuarios.crear_usuario(4, "Usuario 4")
+    escribir_objeto = gestor._write_object
+    retencion = []
+    
+    def escribir_y_aplicar_retencion_en_otra_terminal(digest, datos):
+        if not retencion:
+            hilo = threading.Thread(target=otra_terminal.apply_retention, args=(0, 0, 0))
+            hilo.start()
+            hilo.join(0.3)
+            retencion.append(hilo)
+        return escribir_objeto(digest, datos)
+    
+    gestor._write_object = escribir_y_aplicar_retencion_en_otra_terminal
+    nombre = gestor.create_snapshot()
+    retencion[0].join()
+    
+    assert [s['nombre'] for s in gestor.list_snapshots()] == [nombre]
+    restaurada = gestor.restore_snapshot_to(nombre, str(tmp_path / 'snapshot.db'))
+    numeros = database.DatabaseManager(restaurada).obtener_todos_usuarios()
+    assert [u['numero'] for u in numeros] == [1, 2, 3, 4]
+
+
+def test_restaurar_un_respaldo_y_deshacer(usuarios, tmp_path):
+    gestor = BackupManager(usuarios.db_path, str(tmp_path / 'respaldos'))
+    respaldo = str(tmp_path / 'respaldo.db')
+    copy_database(usuarios.db_path, respaldo)
+    usuarios.crear_usuario(4, "Usuario 4")
+    
+    exito, errores = gestor.restore_database(respaldo)
+    
+    assert (exito, errores) == (True, [])
+    numeros = [u['numero'] for u in database.get_db_manager().obtener_todos_usuarios()]
+    assert numeros == [1, 2, 3]
+    
+    # El estado anterior quedó en un snapshot
+    deshacer = gestor.list_snapshots()[0]['nombre']
+    assert gestor.restore_snapshot(deshacer) == (True, [])
+    numeros = [u['numero'] for u in database.get_db_manager().obtener_todos_usuarios()]
+    assert numeros == [1, 2, 3, 4]
+
+
+def test_restaurar_archivo_invalido_no_toca_la_base(usuarios, tmp_path):
+    gestor = BackupManager(usuarios.db_path, str(tmp_path / 'respaldos'))
+    respaldo = tmp_path / 'respaldo.db'
+    respaldo.write_bytes(b'no es una base de datos')
+    
+    exito, errores = gestor.restore_database(str(respaldo))
+    
+    assert not exito and errores
+    assert len(usuarios.obtener_todos_usuarios()) == 3
+    assert gestor.list_snapshots() == []
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""Sincronización entre dos sedes, cada una con su propia base"""
+
+import time
+
+import pytest
+
+from database import DatabaseManager
+from sync_engine import SyncEngine
+
+
+@pytest.fixture
+def sede_a(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'sede_a.db'))
+    for numero in (1, 2, 3):
+        assert db.crear_usuario(numero, f"Usuario {numero}")
+    return SyncEngine(db.db_path)
+
+
+@pytest.fixture
+def sede_b(tmp_path):
+    return SyncEngine(DatabaseManager(str(tmp_path / 'sede_b.db')).db_path)
+
+
+def _usuarios(sede):
+    conn = sede.get_connection()
+    try:
+        return [tuple(fila) for fila in conn.execute('SELECT numero, nombre FROM usuarios ORDER BY numero')]
+    finally:
+        conn.close()
+
+
+def _mensualidades(sede, numero):
+    """(pago, total, mes) de cada mensualidad del usuario, por uid del pago"""
+    conn = sede.get_connection()
+    try:
+        return sorted(tuple(fila) for fila in conn.execute('''
+            SELECT p.uid, p.total, d.mes
+            FROM pagos p
+            JOIN usuarios u ON p.usuario_id = u.id
+            LEFT JOIN detalle_pagos d ON d.pago_id = p.id
+            WHERE u.numero = ?
+        ''', (numero,)))
+    finally:
+        conn.close()
+
+
+def _id(sede, numero):
+    return DatabaseManager(sede.db_path).buscar_usuario_por_numero(numero)['id']
+
+
+def test_exportar_envia_solo_lo_nuevo(sede_a, sede_b):
+    paquete = sede_a.exportar_cambios(para=sede_b.nodo)
+    
+    assert paquete['origen'] == sede_a.nodo
+    assert [(c['tabla'], c['operacion'], c['datos']['numero']) for c in paquete['cambios']] == [
+        ('usuarios', 'upsert', 1), ('usuarios', 'upsert', 2), ('usuarios', 'upsert', 3),
+    ]
+    
+    sede_a.confirmar_envio(sede_b.nodo, paquete['hasta'])
+    assert sede_a.exportar_cambios(para=sede_b.nodo)['cambios'] == []
+    
+    DatabaseManager(sede_a.db_path).crear_usuario(4, "Usuario 4")
+    nuevos = sede_a.exportar_cambios(para=sede_b.nodo)['cambios']
+    assert [c['datos']['numero'] for c in nuevos] == [4]
+
+
+def test_aplicar_y_volver_a_aplicar_el_mismo_paquete(sede_a, sede_b):
+    paquete = sede_a.exportar_cambios(para=sede_b.nodo)
+    
+    resultado = sede_b.aplicar_cambios(paquete)
+    
+    assert resultado == {'aplicados': 3, 'omitidos': 0, 'conflictos': [], 'hasta': paquete['hasta']}
+    assert _usuarios(sede_b) == _usuarios(sede_a)
+    assert sede_b.obtener_marca_recibido(sede_a.nodo) == paquete['hasta']
+    
+    repetido = sede_b.aplicar_cambios(paquete)
+    
+    assert (repetido['aplicados'], repetido['omitidos'], repetido['conflictos']) == (0, 3, [])
+    assert _usuarios(sede_b) == _usuarios(sede_a)
+
+
+def test_no_aplica_un_paquete_de_la_misma_sede(sede_a):
+    resultado = sede_a.aplicar_cambios(sede_a.exportar_cambios())
+    
+    assert resultado['aplicados'] == 0
+    assert resultado['conflictos'] == ["El paquete fue exportado por esta misma sede"]
+
+
+def test_pagos_y_bajas_llegan_a_la_otra_sede(sede_a, sede_b):
+    db_a = DatabaseManager(sede_a.db_path)
+    assert db_a.registrar_pago(_id(sede_a, 1), [1, 2], 2024)
+    conn = sede_a.get_connection()
+    conn.execute('DELETE FROM usuarios WHERE numero = 3')
+    conn.close()
+    
+    resultado = sede_a.sincronizar_con(sede_b)
+    
+    assert resultado['enviados']['conflictos'] == []
+    assert _usuarios(sede_b) == [(1, 'Usuario 1'), (2, 'Usuario 2')]
+    assert DatabaseManager(sede_b.db_path).obtener_pagos_usuario_anio(_id(sede_b, 1), 2024) == [1, 2]
+
+
+def test_gana_el_cambio_mas_reciente_de_la_misma_fila(sede_a, sede_b):
+    sede_a.sincronizar_con(sede_b)
+    DatabaseManager(sede_a.db_path).actualizar_usuario(_id(sede_a, 1), nombre="Nombre en A")
+    time.sleep(0.01)
+    DatabaseManager(sede_b.db_path).actualizar_usuario(_id(sede_b, 1), nombre="Nombre en B")
+    
+    sede_a.sincronizar_con(sede_b)
+    
+    assert _usuarios(sede_a)[0] == _usuarios(sede_b)[0] == (1, "Nombre en B")
+
+
+def test_numero_de_usuario_repetido_es_conflicto(sede_a, sede_b):
+    DatabaseManager(sede_b.db_path).crear_usuario(2, "Otro 2")
+    
+    resultado = sede_b.aplicar_cambios(sede_a.exportar_cambios(para=sede_b.nodo))
+    
+    assert resultado['aplicados'] == 2
+    assert len(resultado['conflictos']) == 1
+    assert resultado['conflictos'][0].startswith(f"usuarios usuario 2 (Usuario 2) de la sede {sede_a.nodo}")
+    assert _usuarios(sede_b) == [(1, 'Usuario 1'), (2, 'Otro 2'), (3, 'Usuario 3')]
+
+
+def test_mes_pagado_en_las_dos_sedes_es_conflicto_y_no_converge(sede_a, sede_b):
+    sede_a.sincronizar_con(sede_b)
+    assert DatabaseManager(sede_a.db_path).registrar_pago(_id(sede_a, 1), [1], 2024)
+    assert DatabaseManager(sede_b.db_path).registrar_pago(_id(sede_b, 1), [1, 2], 2024)
+    
+    resultado = sede_a.sincronizar_con(sede_b)
+    
+    enviados, recibidos = resultado['enviados']['conflictos'], resultado['recibidos']['conflictos']
+    assert len(enviados) == 1 and enviados[0].startswith("detalle_pagos Mensualidad 1/2024")
+    assert len(recibidos) == 1 and recibidos[0].startswith("detalle_pagos Mensualidad 1/2024")
+    # Cada sede conserva su propio detalle de enero; los pagos recibidos
+    # quedan con el total original y sin ese detalle
+    en_a, en_b = _mensualidades(sede_a, 1), _mensualidades(sede_b, 1)
+    assert en_a != en_b
+    assert sorted(mes for _uid, _total, mes in en_a if mes) == [1, 2]
+    assert sorted(mes for _uid, _total, mes in en_b if mes) == [1, 2]
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""Tarifas con fecha de vigencia: búsqueda, pagos, importación y adeudos"""
+
+import csv
+from datetime import date
+
+from config.settings import DEFAULT_MONTHLY_FEE
+from exporter import export_report
+from tarifas import Tarifas
+
+
+def _precios(db, pago_id):
+    conn = db.get_connection()
+    try:
+        return [tuple(fila) for fila in conn.execute(
+            'SELECT anio, mes, precio FROM detalle_pagos WHERE pago_id = ? ORDER BY anio, mes', (pago_id,))]
+    finally:
+        conn.close()
+
+
+def test_cuota_por_mes_de_vigencia():
+    tarifas = Tarifas([(2024, 7, 80.0), (1900, 1, 50.0), (2025, 1, 100.0)])
+    
+    assert tarifas.cuota(1850, 1) == 50.0
+    assert tarifas.cuota(2024, 6) == 50.0
+    assert tarifas.cuota(2024, 7) == 80.0
+    assert tarifas.cuota(2024, 12) == 80.0
+    assert tarifas.cuota(2025, 1) == 100.0
+    assert tarifas.filas() == [(1900, 1, 50.0), (2024, 7, 80.0), (2025, 1, 100.0)]
+
+
+def test_sin_tarifas_usa_la_cuota_predeterminada():
+    assert Tarifas([]).cuota(2024, 1) == DEFAULT_MONTHLY_FEE
+
+
+def test_migracion_toma_la_cuota_de_configuracion(db):
+    assert db.obtener_tarifas() == [(1900, 1, float(db.obtener_configuracion('cuota_mensual')))]
+
+
+def test_registrar_pago_cobra_la_tarifa_de_cada_mes(usuarios):
+    assert usuarios.agregar_tarifa(80.0, 2024, 7)
+    usuario_id = usuarios.buscar_usuario_por_numero(1)['id']
+    
+    pago_id = usuarios.registrar_pago(usuario_id, [6, 7, 8], 2024)
+    
+    assert _precios(usuarios, pago_id) == [(2024, 6, 50.0), (2024, 7, 80.0), (2024, 8, 80.0)]
+    assert usuarios.obtener_detalle_pago(pago_id)['total'] == 210.0
+
+
+def test_agregar_tarifa_en_el_mismo_mes_la_reemplaza(db):
+    assert db.agregar_tarifa(80.0, 2024, 7)
+    assert db.agregar_tarifa(90.0, 2024, 7)
+    assert db.obtener_tarifas()[1:] == [(2024, 7, 90.0)]
+
+
+def test_cuota_mensual_queda_con_la_tarifa_del_mes_en_curso(db):
+    hoy = date.today()
+    assert db.agregar_tarifa(70.0, hoy.year, hoy.month)
+    assert db.agregar_tarifa(99.0, hoy.year + 1, 1)
+    assert float(db.obtener_configuracion('cuota_mensual')) == 70.0
+
+
+def test_importacion_cobra_la_tarifa_de_cada_mes(usuarios, tmp_path):
+    from csv_importer import CSVImporter
+    assert usuarios.agregar_tarifa(80.0, 2024, 1)
+    ruta = tmp_path / 'pagos.csv'
+    ruta.write_text("numero,2023-12,2024-01\n1,x,x\n", encoding='utf-8')
+    
+    assert CSVImporter().import_payments_from_csv(str(ruta)) == (1, [])
+    assert _precios(usuarios, 1) == [(2023, 12, 50.0), (2024, 1, 80.0)]
+
+
+def test_reporte_de_adeudos(usuarios, tmp_path):
+    hoy = date.today()
+    anterior = (hoy.year, hoy.month - 1) if hoy.month > 1 else (hoy.year - 1, 12)
+    conn = usuarios.get_connection()
+    conn.execute("UPDATE usuarios SET fecha_registro = ? WHERE numero IN (1, 2)",
+                 (f"{anterior[0]}-{anterior[1]:02d}-15 10:00:00",))
+    conn.execute("UPDATE usuarios SET estado = 'Cancelado' WHERE numero = 3")
+    conn.commit()
+    conn.close()
+    assert usuarios.agregar_tarifa(80.0, hoy.year, hoy.month)
+    assert usuarios.registrar_pago(usuarios.buscar_usuario_por_numero(2)['id'], [anterior[1]], anterior[0])
+    
+    ruta = str(tmp_path / 'adeudos.csv')
+    assert export_report('adeudos', ruta) == 2
+    with open(ruta, encoding='utf-8-sig', newline='') as f:
+        filas = list(csv.reader(f))
+    
+    mes_anterior, mes_actual = f"{anterior[0]}-{anterior[1]:02d}", f"{hoy:%Y-%m}"
+    assert filas == [
+        ['numero', 'nombre', 'meses_adeudados', 'desde', 'hasta', 'adeudo'],
+        ['1', 'Usuario 1', '2', mes_anterior, mes_actual, '130.0'],
+        ['2', 'Usuario 2', '1', mes_actual, mes_actual, '80.0'],
+    ]
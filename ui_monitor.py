@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Monitor de congelamientos de la interfaz (opcional)
+
+Dos mediciones:
+    - Latido: cada UI_LAG_INTERVAL_MS se programa root.after y se mide
+      cuánto tarde llega. Ese retraso es el tiempo que el bucle de eventos
+      de Tk estuvo bloqueado (lo que el usuario ve como ventana congelada).
+    - Manejadores: los callbacks de botones (command=), de eventos (bind) y
+      de root.after definidos en los módulos de MODULOS_MEDIDOS se envuelven
+      para medir su duración y cuánto de ella fue consulta a la base (con
+      query_stats). Los que pasan de UI_HANDLER_THRESHOLD_MS se anotan en
+      UI_MONITOR_LOG.
+
+Desactivado no se envuelve nada. Se activa con UI_MONITOR_ENABLED = True en
+config/settings.py o con la variable de entorno AGUA_UI_MONITOR=1; al cerrar
+la aplicación el resumen queda al final de UI_MONITOR_LOG.
+
+Uso:
+    import ui_monitor
+    ui_monitor.activar()
+    ui_monitor.iniciar_latido(root)
+    ...
+    print(ui_monitor.resumen())
+"""
+
+import atexit
+import functools
+import os
+import threading
+import time
+import tkinter as tk
+from collections import deque
+from datetime import datetime
+from typing import Dict, Optional
+
+import query_stats
+from config.settings import (
+    UI_HANDLER_THRESHOLD_MS, UI_LAG_INTERVAL_MS, UI_MONITOR_ENABLED, UI_MONITOR_LOG
+)
+
+# Módulos cuyas ventanas se miden
+MODULOS_MEDIDOS = ('user_management', 'payment_registration', 'configuration')
+
+# Muestras que se conservan para los percentiles
+MUESTRAS_MAXIMAS = 5000
+
+
+def _percentil(ordenados, p: float) -> float:
+    if not ordenados:
+        return 0.0
+    return ordenados[max(0, min(len(ordenados) - 1, -(-p * len(ordenados) // 100) - 1))]
+
+
+class UIMonitor:
+    def __init__(self, umbral_ms: float = UI_HANDLER_THRESHOLD_MS, registro: str = UI_MONITOR_LOG,
+                 modulos=MODULOS_MEDIDOS):
+        """
+        Args:
+            umbral_ms: Manejadores y retrasos del latido mayores a esto se anotan
+            registro: Archivo donde anotarlos (None para no escribirlo)
+            modulos: Módulos cuyos callbacks se envuelven
+        """
+        self.umbral = umbral_ms / 1000
+        self.registro = registro
+        self.modulos = set(modulos)
+        # nombre -> {'llamadas', 'lentas', 'max', 'bd', 'muestras'}
+        self.manejadores: Dict[str, dict] = {}
+        self.retrasos = deque(maxlen=MUESTRAS_MAXIMAS)
+        self.bloqueo_maximo = 0.0
+        self._lock = threading.Lock()
+
+    # === MANEJADORES ===
+
+    def _nombre_callback(self, func) -> Optional[str]:
+        """Nombre 'modulo.Clase.metodo' si el callback es de un módulo medido"""
+        if isinstance(func, functools.partial):
+            func = func.func
+        modulo = getattr(func, '__module__', None)
+        if modulo not in self.modulos:
+            return None
+        return f"{modulo}.{getattr(func, '__qualname__', getattr(func, '__name__', repr(func)))}"
+
+    def envolver(self, func, origen: str):
+        """Devuelve func medido si pertenece a un módulo medido; si no, func tal cual"""
+        if getattr(func, '_ui_monitor', False):
+            return func
+        nombre = self._nombre_callback(func)
+        if nombre is None:
+            return func
+
+        def manejador(*args):
+            bd_inicio, consultas_inicio = query_stats.tiempo_bd_hilo()
+            inicio = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                duracion = time.perf_counter() - inicio
+                bd_fin, consultas_fin = query_stats.tiempo_bd_hilo()
+                self.registrar_manejador(nombre, origen, duracion, bd_fin - bd_inicio,
+                                         consultas_fin - consultas_inicio, args)
+
+        manejador.__name__ = getattr(func, '__name__', 'manejador')
+        manejador._ui_monitor = True
+        return manejador
+
+    def registrar_manejador(self, nombre: str, origen: str, duracion: float, bd: float,
+                            consultas: int, args: tuple = ()):
+        with self._lock:
+            datos = self.manejadores.get(nombre)
+            if datos is None:
+                datos = self.manejadores[nombre] = {
+                    'llamadas': 0, 'lentas': 0, 'max': 0.0, 'total': 0.0, 'bd': 0.0,
+                    'muestras': deque(maxlen=MUESTRAS_MAXIMAS),
+                }
+            datos['llamadas'] += 1
+            datos['total'] += duracion
+            datos['bd'] += bd
+            datos['max'] = max(datos['max'], duracion)
+            datos['muestras'].append(duracion)
+            lenta = duracion >= self.umbral
+            datos['lentas'] += lenta
+
+        if lenta:
+            evento = ''
+            if args and isinstance(args[0], tk.Event):
+                evento = f" <{args[0].type}>"
+            self._anotar(f"manejador {duracion * 1000:8.1f} ms (BD {bd * 1000:.1f} ms en "
+                         f"{consultas} consultas) | {origen}{evento} | {nombre}")
+
+    # === LATIDO ===
+
+    def iniciar_latido(self, root: tk.Misc, intervalo_ms: int = UI_LAG_INTERVAL_MS):
+        """Programa el latido sobre `root` hasta que la ventana se destruya"""
+        intervalo = intervalo_ms / 1000
+        esperado = [time.perf_counter() + intervalo]
+
+        def latido():
+            ahora = time.perf_counter()
+            retraso = max(0.0, ahora - esperado[0])
+            with self._lock:
+                self.retrasos.append(retraso)
+                self.bloqueo_maximo = max(self.bloqueo_maximo, retraso)
+            if retraso >= self.umbral:
+                self._anotar(f"bucle de eventos bloqueado {retraso * 1000:8.1f} ms")
+            esperado[0] = ahora + intervalo
+            try:
+                root.after(intervalo_ms, latido)
+            except tk.TclError:
+                pass  # La ventana ya se cerró
+
+        latido._ui_monitor = True
+        root.after(intervalo_ms, latido)
+
+    # === RESULTADOS ===
+
+    def _anotar(self, texto: str):
+        if not self.registro:
+            return
+        try:
+            with self._lock, open(self.registro, 'a', encoding='utf-8') as f:
+                f.write(f"{datetime.now():%Y-%m-%d %H:%M:%S} | {texto}\n")
+        except OSError as e:
+            print(f"No se pudo escribir el registro del monitor de interfaz: {e}")
+
+    def resumen(self, limite: int = 20) -> str:
+        """Retrasos del bucle de eventos y manejadores más costosos"""
+        with self._lock:
+            retrasos = sorted(self.retrasos)
+            manejadores = sorted(self.manejadores.items(), key=lambda m: m[1]['total'], reverse=True)
+            filas = [(nombre, dict(d, muestras=sorted(d['muestras']))) for nombre, d in manejadores[:limite]]
+
+        lineas = [f"Monitor de interfaz - {datetime.now():%Y-%m-%d %H:%M:%S}", ""]
+        if retrasos:
+            lineas.append(
+                f"Retraso del bucle de eventos ({len(retrasos)} latidos): "
+                f"p50 {_percentil(retrasos, 50) * 1000:.1f} ms, p95 {_percentil(retrasos, 95) * 1000:.1f} ms, "
+                f"p99 {_percentil(retrasos, 99) * 1000:.1f} ms, máximo {self.bloqueo_maximo * 1000:.1f} ms"
+            )
+        lineas += ["", f"{'llamadas':>8} {'lentas':>6} {'p95 ms':>8} {'máx ms':>8} {'% BD':>5}  manejador"]
+        for nombre, d in filas:
+            porcentaje_bd = d['bd'] / d['total'] * 100 if d['total'] else 0.0
+            lineas.append(f"{d['llamadas']:>8} {d['lentas']:>6} {_percentil(d['muestras'], 95) * 1000:>8.1f} "
+                          f"{d['max'] * 1000:>8.1f} {porcentaje_bd:>5.0f}  {nombre}")
+        return '\n'.join(lineas) + '\n'
+
+
+# === ACTIVACIÓN ===
+
+_monitor: Optional[UIMonitor] = None
+_originales = {}
+
+
+def activar(umbral_ms: float = UI_HANDLER_THRESHOLD_MS, registro: str = UI_MONITOR_LOG,
+            modulos=MODULOS_MEDIDOS) -> UIMonitor:
+    """
+    Empieza a envolver los callbacks que se registren desde ahora
+
+    Todo callback de Tk (command=, bind, after) pasa por Misc._register o
+    Misc.after, así que basta con interceptar esos dos. También activa
+    query_stats, si no lo estaba, para conocer el tiempo en la base.
+    """
+    global _monitor
+    desactivar()
+    _monitor = UIMonitor(umbral_ms, registro, modulos)
+    if not query_stats.activa():
+        query_stats.activar()
+
+    registrar_original = _originales['_register'] = tk.Misc._register
+    after_original = _originales['after'] = tk.Misc.after
+
+    def _register(self, func, subst=None, needcleanup=1):
+        return registrar_original(self, _monitor.envolver(func, 'evento'), subst, needcleanup)
+
+    def after(self, ms, func=None, *args):
+        if func is not None:
+            func = _monitor.envolver(func, f'after {ms}')
+        return after_original(self, ms, func, *args)
+
+    tk.Misc._register = _register
+    tk.Misc.after = after
+    return _monitor
+
+
+def desactivar():
+    """Deja de envolver callbacks nuevos (los ya registrados siguen medidos)"""
+    for nombre, original in _originales.items():
+        setattr(tk.Misc, nombre, original)
+    _originales.clear()
+
+
+def iniciar_latido(root: tk.Misc, intervalo_ms: int = UI_LAG_INTERVAL_MS):
+    """Mide el retraso del bucle de eventos de `root` si el monitor está activo"""
+    if _monitor and _originales:
+        _monitor.iniciar_latido(root, intervalo_ms)
+
+
+def resumen() -> str:
+    return _monitor.resumen() if _monitor else "El monitor de interfaz no está activo"
+
+
+def _guardar_resumen():
+    if _monitor and _monitor.registro:
+        _monitor._anotar("resumen\n" + _monitor.resumen())
+
+
+def activar_si_configurado() -> bool:
+    """
+    Activa el monitor si UI_MONITOR_ENABLED o AGUA_UI_MONITOR=1 lo piden
+
+    Returns:
+        bool: True si quedó activo
+    """
+    if not (UI_MONITOR_ENABLED or os.environ.get('AGUA_UI_MONITOR') == '1'):
+        return False
+    activar()
+    atexit.register(_guardar_resumen)
+    return True
@@ -6,6 +6,7 @@ Módulo de gestión de usuarios para el sistema de agua potable
 
 import tkinter as tk
 from tkinter import ttk, messagebox
+from datetime import datetime
 from database import get_db_manager
 from typing import Dict, List, Optional
 
@@ -25,13 +26,37 @@ class UserManagementWindow:
         # Variables
         self.current_user = None
         self.users_data = []
+        self.on_close = None  # Lo asigna WindowManager para reutilizar la ventana
         
         # Configurar la interfaz
         self.setup_ui()
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
         
         # Cargar datos iniciales
         self.refresh_users_list()
     
+    def close(self):
+        """Cierra la ventana (si la administra WindowManager, solo se oculta)"""
+        if self.on_close:
+            self.on_close()
+        else:
+            self.root.destroy()
+    
+    def refresh_data(self, tablas):
+        """Recarga solo lo que depende de las tablas que cambiaron"""
+        if 'usuarios' not in tablas:
+            return
+        
+        self.refresh_users_list()
+        
+        # Volver a cargar el usuario seleccionado con sus datos actuales
+        if self.current_user:
+            user = next((u for u in self.users_data if u['id'] == self.current_user['id']), None)
+            if user:
+                self.load_user_details(user)
+            else:
+                self.clear_user_details()
+    
     def setup_ui(self):
         """Configura la interfaz de usuario"""
         # Frame principal
@@ -341,11 +366,38 @@ class UserManagementWindow:
         )
         self.history_btn.pack(side=tk.LEFT, padx=5)
         
+        # Botón cambio de estado masivo (sobre los usuarios de la lista filtrada)
+        self.bulk_status_btn = tk.Button(
+            parent,
+            text="Cambiar Estado ▾",
+            command=self.show_bulk_status_menu,
+            bg='#e67e22',
+            fg='white',
+            font=('Arial', 12, 'bold'),
+            height=2
+        )
+        self.bulk_status_btn.pack(side=tk.LEFT, padx=5)
+        
+        self.bulk_status_menu = tk.Menu(self.root, tearoff=0)
+        self.bulk_status_menu.add_command(
+            label="Cancelar usuarios de la lista",
+            command=lambda: self.change_listed_users_status('Cancelado')
+        )
+        self.bulk_status_menu.add_command(
+            label="Activar usuarios de la lista",
+            command=lambda: self.change_listed_users_status('Activo')
+        )
+        self.bulk_status_menu.add_separator()
+        self.bulk_status_menu.add_command(
+            label="Cancelar usuarios sin pagos en 3 años",
+            command=self.cancel_users_without_payments
+        )
+        
         # Botón cerrar
         close_btn = tk.Button(
             parent,
             text="Cerrar",
-            command=self.root.destroy,
+            command=self.close,
             bg='#95a5a6',
             fg='white',
             font=('Arial', 12),
@@ -540,6 +592,56 @@ class UserManagementWindow:
         if dialog.result:
             self.refresh_users_list()
     
+    def show_bulk_status_menu(self):
+        """Muestra el menú de cambio de estado masivo debajo del botón"""
+        x = self.bulk_status_btn.winfo_rootx()
+        y = self.bulk_status_btn.winfo_rooty() + self.bulk_status_btn.winfo_height()
+        self.bulk_status_menu.tk_popup(x, y)
+    
+    def change_listed_users_status(self, estado: str):
+        """Cambia el estado de todos los usuarios que muestra la lista (según los filtros)"""
+        ids = [user['id'] for user in self.users_data if user['estado'] != estado]
+        if not ids:
+            messagebox.showinfo("Sin cambios", f"Todos los usuarios de la lista ya están en estado {estado}")
+            return
+        
+        if not messagebox.askyesno("Confirmar",
+                                   f"¿Cambiar a {estado} a {len(ids)} usuarios de la lista?"):
+            return
+        
+        self.apply_bulk_status(estado, ids=ids)
+    
+    def cancel_users_without_payments(self):
+        """Cancela a los usuarios activos que no han pagado en los últimos 3 años"""
+        hoy = datetime.now()
+        try:
+            limite = hoy.replace(year=hoy.year - 3)
+        except ValueError:
+            limite = hoy.replace(year=hoy.year - 3, day=28)  # 29 de febrero
+        
+        filtro = {'estado': 'Activo', 'sin_pagos_desde': limite.strftime('%Y-%m-%d')}
+        total = get_db_manager().cambiar_estado_usuarios('Cancelado', filtro, solo_vista_previa=True)
+        if total <= 0:
+            messagebox.showinfo("Sin cambios", "No hay usuarios activos sin pagos en los últimos 3 años")
+            return
+        
+        if not messagebox.askyesno("Confirmar",
+                                   f"{total} usuarios activos no tienen pagos desde el "
+                                   f"{limite.strftime('%d/%m/%Y')}.\n\n¿Cancelarlos?"):
+            return
+        
+        self.apply_bulk_status('Cancelado', filtro=filtro)
+    
+    def apply_bulk_status(self, estado: str, filtro: Dict = None, ids: List[int] = None):
+        """Ejecuta el cambio de estado masivo y recarga la lista"""
+        cambiados = get_db_manager().cambiar_estado_usuarios(estado, filtro, ids)
+        if cambiados < 0:
+            messagebox.showerror("Error", "No se pudo cambiar el estado de los usuarios")
+            return
+        
+        self.refresh_data({'usuarios'})
+        messagebox.showinfo("Éxito", f"{cambiados} usuarios cambiaron a estado {estado}")
+    
     def show_payment_history(self):
         """Muestra el historial de pagos del usuario seleccionado"""
         if not self.current_user:
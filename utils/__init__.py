@@ -19,11 +19,26 @@ Las utilidades pueden ser usadas por cualquier capa (Model, View o Controller)
 =============================================================================
 """
 
-from .receipt_generator import ReceiptGenerator
-from .csv_importer import CSVImporter, ImporterGUI
+import importlib
+
+# Se importan bajo demanda: receipt_generator carga ReportLab, que no
+# siempre se necesita
+_UTILIDADES = {
+    'ReceiptGenerator': '.receipt_generator',
+    'CSVImporter': '.csv_importer',
+    'ImporterGUI': '.csv_importer',
+}
 
 __all__ = [
     'ReceiptGenerator',
     'CSVImporter',
     'ImporterGUI'
 ]
+
+
+def __getattr__(name):
+    if name in _UTILIDADES:
+        value = getattr(importlib.import_module(_UTILIDADES[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
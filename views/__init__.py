@@ -27,16 +27,28 @@ Toda la lógica debe estar en Controllers o Models.
 =============================================================================
 """
 
-# Importar las vistas principales para facilitar su uso
-from .auth_view import AuthView
-from .main_view import MainView
-
-# Estas se importarán bajo demanda para ahorrar recursos
-# from .user_view import UserManagementView
-# from .payment_view import PaymentRegistrationView
-# from .configuration_view import ConfigurationView
+import importlib
+
+# Las vistas se importan bajo demanda (la primera vez que se usan) para que
+# "from views.auth_view import AuthView" no cargue también el menú principal
+# y todos los módulos que éste importa
+_VISTAS = {
+    'AuthView': '.auth_view',
+    'MainView': '.main_view',
+    'UserManagementView': '.user_view',
+    'PaymentRegistrationView': '.payment_view',
+    'ConfigurationView': '.configuration_view',
+}
 
 __all__ = [
     'AuthView',
     'MainView'
 ]
+
+
+def __getattr__(name):
+    if name in _VISTAS:
+        value = getattr(importlib.import_module(_VISTAS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Gestor de ventanas de los módulos
+
+Mantiene una sola instancia por módulo (usuarios, pagos, configuración).
+Al cerrarla solo se oculta; al volver a abrirla se muestra de inmediato y
+únicamente se recargan los datos de las tablas que cambiaron mientras
+estuvo oculta (según versiones_tablas).
+
+Las ventanas administradas deben tener:
+    - self.root: su Toplevel
+    - self.on_close: callback que el gestor asigna; close() lo llama en
+      lugar de destruir la ventana
+    - refresh_data(tablas): recarga lo que depende de esas tablas
+"""
+
+from typing import Dict, Optional, Set
+
+from database import get_db_manager, registrar_al_reiniciar
+
+# Tablas de las que dependen las ventanas
+TABLAS = ('usuarios', 'configuracion', 'conceptos_cobro', 'pagos', 'detalle_pagos')
+
+
+class WindowManager:
+    def __init__(self, parent):
+        """
+        Args:
+            parent: Ventana principal de la aplicación
+        """
+        self.parent = parent
+        self._windows: Dict[str, object] = {}
+        # Versiones de las tablas en el momento en que se ocultó cada ventana
+        self._hidden_versions: Dict[str, Optional[Dict[str, int]]] = {}
+
+        # Si se restaura un respaldo, los datos de todas las ventanas quedan viejos
+        registrar_al_reiniciar(self.invalidate_all)
+
+    def show(self, key: str, window_class):
+        """
+        Muestra la ventana del módulo `key`, creándola solo la primera vez
+
+        Args:
+            key: Nombre del módulo ('usuarios', 'pagos', 'configuracion')
+            window_class: Clase de la ventana (recibe el padre en el constructor)
+
+        Returns:
+            La instancia de la ventana
+        """
+        window = self._windows.get(key)
+
+        if window is None or not window.root.winfo_exists():
+            window = window_class(self.parent)
+            window.on_close = lambda: self.hide(key)
+            self._windows[key] = window
+            self._hidden_versions.pop(key, None)
+            return window
+
+        if key in self._hidden_versions:
+            changed = self._changed_tables(self._hidden_versions.pop(key))
+            if changed:
+                window.refresh_data(changed)
+            window.root.deiconify()
+
+        window.root.lift()
+        window.root.focus_force()
+        return window
+
+    def hide(self, key: str):
+        """Oculta la ventana del módulo y guarda las versiones actuales de las tablas"""
+        window = self._windows.get(key)
+        if window is None or not window.root.winfo_exists():
+            return
+
+        self._hidden_versions[key] = get_db_manager().obtener_versiones_tablas()
+        window.root.withdraw()
+
+    def invalidate_all(self):
+        """Marca todas las ventanas ocultas para recargarse por completo"""
+        for key in self._hidden_versions:
+            self._hidden_versions[key] = None
+
+    def destroy_all(self):
+        """Destruye todas las ventanas administradas"""
+        for window in self._windows.values():
+            if window.root.winfo_exists():
+                window.root.destroy()
+        self._windows.clear()
+        self._hidden_versions.clear()
+
+    def _changed_tables(self, before: Optional[Dict[str, int]]) -> Set[str]:
+        """Tablas cuya versión cambió desde `before` (todas si no se conocen)"""
+        now = get_db_manager().obtener_versiones_tablas()
+        if not before or not now:
+            return set(TABLAS)
+        return {tabla for tabla, version in now.items() if before.get(tabla) != version}